@@ -0,0 +1,523 @@
+#!/usr/bin/env python3
+"""
+Compact columnar storage for ActivityWatch raw events (data/activitywatch/<date>.awc).
+
+Layout of one .awc file (native byte order, recorded in the header):
+  magic "AWC1" | uint32 header length | header JSON | padding to 8 bytes | column blocks
+
+- timestamp_us (int64, µs since epoch) and duration (float64) are typed arrays, sorted by timestamp.
+- title/url/app/extra are dictionary-encoded: a uint32 index column per event plus a
+  string table (uint32 offsets + one UTF-8 blob), decoded lazily per referenced string.
+- Reads mmap the file and cast column blocks with memoryview, so range queries bisect the
+  timestamp column instead of parsing JSON.
+
+Usage examples:
+  python scripts/aw_columnar.py convert data/activitywatch/2025-01-06.json
+  python scripts/aw_columnar.py query --from 2025-01-01 --to 2025-03-31
+  python scripts/aw_columnar.py bench data/activitywatch/*.json
+  python scripts/aw_columnar.py bench --synthetic 50000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import mmap
+import os
+import random
+import struct
+import sys
+import tempfile
+import time
+from array import array
+from bisect import bisect_left
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+MAGIC = b"AWC1"
+VERSION = 1
+DEFAULT_DIR = Path("data/activitywatch")
+DICT_FIELDS = ("title", "url", "app")
+# Extra per-event keys (audible, incognito, tabCount, ...) are kept as one dictionary-encoded
+# JSON string; on a busy day only a handful of distinct combinations exist.
+EXTRA_FIELD = "extra"
+NO_VALUE = 0xFFFFFFFF
+
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def parse_ts_us(value: str) -> int:
+    dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return (dt - _EPOCH) // timedelta(microseconds=1)
+
+
+def us_to_iso(us: int) -> str:
+    return (_EPOCH + timedelta(microseconds=us)).isoformat()
+
+
+def day_bounds_us(start_day: date, end_day: date) -> Tuple[int, int]:
+    """Microsecond bounds of [start_day, end_day] in UTC, matching fetch_aw.py's day window."""
+    start = datetime.combine(start_day, datetime.min.time(), tzinfo=timezone.utc)
+    end = datetime.combine(end_day + timedelta(days=1), datetime.min.time(), tzinfo=timezone.utc)
+    return (start - _EPOCH) // timedelta(microseconds=1), (end - _EPOCH) // timedelta(microseconds=1)
+
+
+class _StringTable:
+    def __init__(self) -> None:
+        self.index: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    def add(self, value: Optional[str]) -> int:
+        if value is None:
+            return NO_VALUE
+        idx = self.index.get(value)
+        if idx is None:
+            idx = len(self.values)
+            self.index[value] = idx
+            self.values.append(value)
+        return idx
+
+    def encode(self) -> Tuple[array, bytes]:
+        offsets = array("I", [0])
+        chunks: List[bytes] = []
+        pos = 0
+        for value in self.values:
+            raw = value.encode("utf-8")
+            chunks.append(raw)
+            pos += len(raw)
+            offsets.append(pos)
+        return offsets, b"".join(chunks)
+
+
+def _pad8(n: int) -> int:
+    return (8 - n % 8) % 8
+
+
+def encode_payload(payload: Dict[str, Any]) -> bytes:
+    """Encode a fetch_aw.py payload (buckets with raw events) into .awc bytes."""
+    tables = {name: _StringTable() for name in DICT_FIELDS + (EXTRA_FIELD,)}
+    rows: List[Tuple[int, float, int, int, int, int, int, int]] = []
+    bucket_meta: List[Dict[str, Any]] = []
+
+    for b_idx, bucket in enumerate(payload.get("buckets") or []):
+        bucket_meta.append({"bucket": bucket.get("bucket"), "aggregate": bucket.get("aggregate")})
+        for evt in bucket.get("events") or []:
+            data = dict(evt.get("data") or {})
+            title = data.pop("title", None)
+            url = data.pop("url", None)
+            app = data.pop("app", None)
+            extra = json.dumps(data, ensure_ascii=False, sort_keys=True) if data else None
+            rows.append(
+                (
+                    parse_ts_us(evt["timestamp"]),
+                    float(evt.get("duration", 0.0)),
+                    -1 if evt.get("id") is None else int(evt["id"]),
+                    b_idx,
+                    tables["title"].add(title),
+                    tables["url"].add(url),
+                    tables["app"].add(app),
+                    tables[EXTRA_FIELD].add(extra),
+                )
+            )
+
+    # ActivityWatch returns newest-first; store ascending so range reads can bisect.
+    rows.sort(key=lambda r: r[0])
+    columns: List[Tuple[str, array]] = [
+        ("timestamp_us", array("q", (r[0] for r in rows))),
+        ("duration", array("d", (r[1] for r in rows))),
+        ("event_id", array("q", (r[2] for r in rows))),
+        ("bucket_idx", array("I", (r[3] for r in rows))),
+    ]
+    for pos, name in enumerate(DICT_FIELDS + (EXTRA_FIELD,), start=4):
+        columns.append((f"{name}_idx", array("I", (r[pos] for r in rows))))
+
+    blobs: List[Tuple[str, bytes]] = []
+    for name, table in tables.items():
+        offsets, blob = table.encode()
+        blobs.append((f"{name}_offsets", offsets.tobytes()))
+        blobs.append((f"{name}_blob", blob))
+
+    layout: List[Dict[str, Any]] = []
+    body_parts: List[bytes] = []
+    cursor = 0
+    for name, arr in columns:
+        raw = arr.tobytes()
+        layout.append({"name": name, "type": arr.typecode, "offset": cursor, "length": len(raw)})
+        body_parts.append(raw + b"\0" * _pad8(len(raw)))
+        cursor += len(raw) + _pad8(len(raw))
+    for name, raw in blobs:
+        typecode = "I" if name.endswith("_offsets") else "B"
+        layout.append({"name": name, "type": typecode, "offset": cursor, "length": len(raw)})
+        body_parts.append(raw + b"\0" * _pad8(len(raw)))
+        cursor += len(raw) + _pad8(len(raw))
+
+    header = {
+        "version": VERSION,
+        "byteorder": sys.byteorder,
+        "source": payload.get("source", "activitywatch"),
+        "base_url": payload.get("base_url"),
+        "date": payload.get("date"),
+        "generated_at": payload.get("generated_at"),
+        "count": len(rows),
+        "buckets": bucket_meta,
+        "dict_sizes": {name: len(table.values) for name, table in tables.items()},
+        "columns": layout,
+    }
+    header_raw = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    prefix_len = len(MAGIC) + 4 + len(header_raw)
+    prefix = MAGIC + struct.pack("<I", len(header_raw)) + header_raw + b"\0" * _pad8(prefix_len)
+    return prefix + b"".join(body_parts)
+
+
+def write_columnar(path: Path, payload: Dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = encode_payload(payload)
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+class ColumnarDay:
+    """Memory-mapped view over one .awc file; strings are decoded only when an event is read."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._file = path.open("rb")
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"Empty columnar file: {path}")
+        if self._mm[:4] != MAGIC:
+            self.close()
+            raise ValueError(f"Not an AWC file: {path}")
+        (header_len,) = struct.unpack_from("<I", self._mm, 4)
+        header_end = 8 + header_len
+        self.header: Dict[str, Any] = json.loads(self._mm[8:header_end].decode("utf-8"))
+        if self.header.get("byteorder") != sys.byteorder:
+            self.close()
+            raise ValueError(f"{path} was written with {self.header.get('byteorder')}-endian columns")
+        base = header_end + _pad8(header_end)
+        view = memoryview(self._mm)
+        self._cols: Dict[str, memoryview] = {}
+        for col in self.header["columns"]:
+            start = base + col["offset"]
+            block = view[start : start + col["length"]]
+            self._cols[col["name"]] = block if col["type"] == "B" else block.cast(col["type"])
+        self._decoded: Dict[str, Dict[int, str]] = {name: {} for name in DICT_FIELDS + (EXTRA_FIELD,)}
+
+    def __len__(self) -> int:
+        return int(self.header["count"])
+
+    def __enter__(self) -> "ColumnarDay":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        # Views must be released before the mmap can be closed.
+        for col in getattr(self, "_cols", {}).values():
+            col.release()
+        self._cols = {}
+        if getattr(self, "_mm", None) is not None and not self._mm.closed:
+            self._mm.close()
+        self._file.close()
+
+    @property
+    def timestamps(self) -> memoryview:
+        return self._cols["timestamp_us"]
+
+    @property
+    def durations(self) -> memoryview:
+        return self._cols["duration"]
+
+    def string(self, field: str, idx: int) -> Optional[str]:
+        if idx == NO_VALUE:
+            return None
+        cache = self._decoded[field]
+        value = cache.get(idx)
+        if value is None:
+            offsets = self._cols[f"{field}_offsets"]
+            blob = self._cols[f"{field}_blob"]
+            value = bytes(blob[offsets[idx] : offsets[idx + 1]]).decode("utf-8")
+            cache[idx] = value
+        return value
+
+    def index_range(self, start_us: Optional[int] = None, end_us: Optional[int] = None) -> Tuple[int, int]:
+        ts = self.timestamps
+        lo = 0 if start_us is None else bisect_left(ts, start_us)
+        hi = len(ts) if end_us is None else bisect_left(ts, end_us, lo)
+        return lo, hi
+
+    def total_seconds(self, start_us: Optional[int] = None, end_us: Optional[int] = None) -> float:
+        lo, hi = self.index_range(start_us, end_us)
+        return float(sum(self.durations[lo:hi]))
+
+    def event(self, i: int) -> Dict[str, Any]:
+        data: Dict[str, Any] = {}
+        extra = self.string(EXTRA_FIELD, self._cols[f"{EXTRA_FIELD}_idx"][i])
+        if extra:
+            data.update(json.loads(extra))
+        for field in DICT_FIELDS:
+            value = self.string(field, self._cols[f"{field}_idx"][i])
+            if value is not None:
+                data[field] = value
+        evt: Dict[str, Any] = {
+            "timestamp": us_to_iso(self.timestamps[i]),
+            "duration": self.durations[i],
+            "data": data,
+        }
+        event_id = self._cols["event_id"][i]
+        if event_id >= 0:
+            evt["id"] = event_id
+        evt["bucket"] = self.header["buckets"][self._cols["bucket_idx"][i]]["bucket"]
+        return evt
+
+    def events(self, start_us: Optional[int] = None, end_us: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        lo, hi = self.index_range(start_us, end_us)
+        for i in range(lo, hi):
+            yield self.event(i)
+
+    def to_payload(self) -> Dict[str, Any]:
+        """Rebuild the fetch_aw.py JSON shape (events newest-first per bucket, as the API returns)."""
+        per_bucket: List[List[Dict[str, Any]]] = [[] for _ in self.header["buckets"]]
+        bucket_col = self._cols["bucket_idx"]
+        for i in range(len(self)):
+            evt = self.event(i)
+            evt.pop("bucket", None)
+            per_bucket[bucket_col[i]].append(evt)
+        return {
+            "source": self.header.get("source"),
+            "base_url": self.header.get("base_url"),
+            "date": self.header.get("date"),
+            "buckets": [
+                {"bucket": meta["bucket"], "aggregate": meta["aggregate"], "events": list(reversed(evts))}
+                for meta, evts in zip(self.header["buckets"], per_bucket)
+            ],
+            "generated_at": self.header.get("generated_at"),
+        }
+
+
+def iter_range(data_dir: Path, start_day: date, end_day: date) -> Iterator[Dict[str, Any]]:
+    """Yield events in [start_day, end_day] across the per-day .awc files, oldest first."""
+    start_us, end_us = day_bounds_us(start_day, end_day)
+    day = start_day
+    while day <= end_day:
+        path = data_dir / f"{day.isoformat()}.awc"
+        if path.exists():
+            with ColumnarDay(path) as col:
+                yield from col.events(start_us, end_us)
+        day += timedelta(days=1)
+
+
+def convert_file(src: Path, dest: Optional[Path] = None) -> Path:
+    payload = json.loads(src.read_text(encoding="utf-8"))
+    out = dest or src.with_suffix(".awc")
+    write_columnar(out, payload)
+    return out
+
+
+def _comparable(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Payload with timestamps as instants (µs), so "Z" vs "+00:00" spellings compare equal; all else as-is."""
+    out = dict(payload)
+    out["buckets"] = [
+        dict(bucket, events=[dict(evt, timestamp=parse_ts_us(evt["timestamp"])) for evt in bucket.get("events") or []])
+        for bucket in payload.get("buckets") or []
+    ]
+    return out
+
+
+def round_trip_diff(original: Dict[str, Any], restored: Dict[str, Any]) -> Optional[str]:
+    """First difference between a source payload and its decoded .awc, or None when nothing was lost."""
+    try:
+        a, b = _comparable(original), _comparable(restored)
+    except (KeyError, TypeError, ValueError) as exc:
+        return f"unreadable event ({exc})"
+    for key in sorted(set(a) | set(b)):
+        if key != "buckets" and a.get(key) != b.get(key):
+            return f"{key}: {a.get(key)!r} -> {b.get(key)!r}"
+    if len(a["buckets"]) != len(b["buckets"]):
+        return f"bucket count {len(a['buckets'])} -> {len(b['buckets'])}"
+    for bucket_a, bucket_b in zip(a["buckets"], b["buckets"]):
+        name = bucket_a.get("bucket")
+        if set(bucket_a) != set(bucket_b) or any(bucket_a[k] != bucket_b[k] for k in bucket_a if k != "events"):
+            return f"bucket {name}: metadata differs"
+        for i, (evt_a, evt_b) in enumerate(zip(bucket_a["events"], bucket_b["events"])):
+            if evt_a != evt_b:
+                return f"bucket {name} event {i}: {evt_a!r} -> {evt_b!r}"
+        if len(bucket_a["events"]) != len(bucket_b["events"]):
+            return f"bucket {name}: {len(bucket_a['events'])} -> {len(bucket_b['events'])} events"
+    return None
+
+
+def synthetic_payload(n_events: int, day: date, seed: int = 7) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    sites = [f"https://site{i}.example.com/page/{j}" for i in range(40) for j in range(25)]
+    start = datetime.combine(day, datetime.min.time(), tzinfo=timezone.utc)
+    events = []
+    for i in range(n_events):
+        url = rng.choice(sites)
+        events.append(
+            {
+                "id": i + 1,
+                "timestamp": (start + timedelta(seconds=i * 86400 / max(n_events, 1))).isoformat(),
+                "duration": round(rng.uniform(0.5, 30.0), 3),
+                "data": {
+                    "url": url,
+                    "title": f"Page {url.rsplit('/', 1)[-1]} - {url.split('/')[2]}",
+                    "audible": rng.random() < 0.05,
+                    "incognito": False,
+                    "tabCount": rng.randint(1, 30),
+                },
+            }
+        )
+    events.reverse()
+    return {
+        "source": "activitywatch",
+        "base_url": "synthetic",
+        "date": day.isoformat(),
+        "buckets": [{"bucket": "aw-watcher-web-synthetic", "aggregate": {}, "events": events}],
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def bench(sources: List[Path], synthetic: int, repeat: int) -> Dict[str, Any]:
+    results: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_dir = Path(tmp)
+        if synthetic:
+            src = tmp_dir / "synthetic.json"
+            src.write_text(
+                json.dumps(synthetic_payload(synthetic, date.today()), ensure_ascii=False, indent=2),
+                encoding="utf-8",
+            )
+            sources = sources + [src]
+        for src in sources:
+            awc = convert_file(src, tmp_dir / f"{src.stem}.awc")
+            json_times, awc_times, awc_range_times = [], [], []
+            total_json = total_awc = 0.0
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                payload = json.loads(src.read_text(encoding="utf-8"))
+                total_json = sum(float(e.get("duration", 0.0)) for b in payload["buckets"] for e in b["events"])
+                json_times.append(time.perf_counter() - t0)
+
+                t0 = time.perf_counter()
+                with ColumnarDay(awc) as col:
+                    total_awc = col.total_seconds()
+                awc_times.append(time.perf_counter() - t0)
+
+                t0 = time.perf_counter()
+                with ColumnarDay(awc) as col:
+                    ts = col.timestamps
+                    if len(ts):
+                        mid = ts[len(ts) // 2]
+                        sum(1 for _ in col.events(mid, mid + 3_600_000_000))
+                awc_range_times.append(time.perf_counter() - t0)
+            results.append(
+                {
+                    "file": str(src),
+                    "json_bytes": src.stat().st_size,
+                    "awc_bytes": awc.stat().st_size,
+                    "size_ratio": round(awc.stat().st_size / max(src.stat().st_size, 1), 4),
+                    "json_load_total_ms": round(min(json_times) * 1000, 3),
+                    "awc_load_total_ms": round(min(awc_times) * 1000, 3),
+                    "awc_range_1h_ms": round(min(awc_range_times) * 1000, 3),
+                    "totals_match": abs(total_json - total_awc) < 1e-6,
+                }
+            )
+    return {"repeat": repeat, "results": results}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Columnar (.awc) storage for ActivityWatch raw events.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_conv = sub.add_parser("convert", help="Convert fetch_aw.py JSON files to .awc next to them")
+    p_conv.add_argument("paths", nargs="*", type=Path, help="JSON files (default: all in data/activitywatch)")
+    p_conv.add_argument("--remove-json", action="store_true", help="Delete the JSON source once the decoded .awc matches it exactly (kept otherwise)")
+
+    p_query = sub.add_parser("query", help="Summarise events in a date range from .awc files")
+    p_query.add_argument("--from", dest="start", required=True, help="Start date YYYY-MM-DD")
+    p_query.add_argument("--to", dest="end", required=True, help="End date YYYY-MM-DD (inclusive)")
+    p_query.add_argument("--data-dir", type=Path, default=DEFAULT_DIR, help="Directory with .awc files")
+    p_query.add_argument("--top", type=int, default=10, help="Number of titles to print")
+
+    p_bench = sub.add_parser("bench", help="Compare size and load time of JSON vs .awc")
+    p_bench.add_argument("paths", nargs="*", type=Path, help="JSON files to benchmark")
+    p_bench.add_argument("--synthetic", type=int, default=0, help="Also benchmark a synthetic day with N events")
+    p_bench.add_argument("--repeat", type=int, default=5, help="Repetitions per measurement (best is reported)")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    if args.cmd == "convert":
+        paths = args.paths or sorted(DEFAULT_DIR.glob("*.json"))
+        if not paths:
+            print("No JSON files to convert", file=sys.stderr)
+            return 1
+        kept = 0
+        for src in paths:
+            out = convert_file(src)
+            source_payload = json.loads(src.read_text(encoding="utf-8"))
+            with ColumnarDay(out) as col:
+                decoded = col.to_payload()
+            restored = sum(len(b["events"]) for b in decoded["buckets"])
+            original = sum(len(b.get("events") or []) for b in source_payload.get("buckets") or [])
+            if restored != original:
+                print(f"Event count mismatch for {src}: {original} -> {restored}", file=sys.stderr)
+                return 1
+            if args.remove_json:
+                # Only a lossless round trip may replace the source (null data keys, extra event keys,
+                # event order and the aggregate must all survive).
+                diff = round_trip_diff(source_payload, decoded)
+                if diff is None:
+                    src.unlink()
+                else:
+                    kept += 1
+                    print(f"Kept {src}: .awc does not reproduce it ({diff})", file=sys.stderr)
+            print(f"Wrote {out} ({restored} events, {src.stat().st_size if src.exists() else 0} -> {out.stat().st_size} bytes)")
+        return 1 if kept else 0
+
+    if args.cmd == "query":
+        try:
+            start_day = date.fromisoformat(args.start)
+            end_day = date.fromisoformat(args.end)
+        except ValueError:
+            print("Invalid --from/--to, expected YYYY-MM-DD", file=sys.stderr)
+            return 1
+        total = 0.0
+        count = 0
+        per_title: Dict[str, float] = {}
+        for evt in iter_range(args.data_dir, start_day, end_day):
+            data = evt["data"]
+            title = data.get("title") or data.get("url") or "unknown"
+            per_title[title] = per_title.get(title, 0.0) + evt["duration"]
+            total += evt["duration"]
+            count += 1
+        top = sorted(per_title.items(), key=lambda kv: kv[1], reverse=True)[: args.top]
+        print(json.dumps({"event_count": count, "total_seconds": total, "top_titles": top}, ensure_ascii=False, indent=2))
+        return 0
+
+    report = bench(args.paths, args.synthetic, args.repeat)
+    if not report["results"]:
+        print("Nothing to benchmark: pass JSON files or --synthetic N", file=sys.stderr)
+        return 1
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
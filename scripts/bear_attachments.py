@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Materialise Bear attachments into an export directory without doubling disk usage.
+
+Each file lands at <output-dir>/attachments/<uid>/<filename>. The cheapest transfer that works
+is used: a hardlink (same volume), a reflink/clone (copy-on-write filesystems), the kernel-side
+os.copy_file_range, and finally a streamed copy. State is kept in attachments/.state.json
+(size, mtime_ns, method per file), so files whose source size+mtime are unchanged are skipped.
+"""
+
+import errno
+import json
+import os
+import pathlib
+import shutil
+import sys
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+ATTACHMENTS_DIRNAME = "attachments"
+STATE_NAME = ".state.json"
+STATE_VERSION = 1
+METHODS = ("auto", "hardlink", "reflink", "copy")
+COPY_CHUNK = 1 << 20
+# Linux FICLONE ioctl (_IOW(0x94, 9, int)); btrfs, XFS with reflink=1, bcachefs.
+FICLONE = 0x40049409
+
+
+def _reflink(src: str, dst: str) -> None:
+    if sys.platform == "darwin":
+        # APFS clonefile(2) is not exposed by the stdlib; `cp -c` uses it.
+        import subprocess
+
+        result = subprocess.run(["cp", "-c", src, dst], capture_output=True)
+        if result.returncode != 0:
+            raise OSError(errno.EOPNOTSUPP, "clonefile failed", src)
+        return
+    import fcntl
+
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        try:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        except OSError:
+            fdst.close()
+            os.unlink(dst)
+            raise
+
+
+def _copy_range(src: str, dst: str) -> None:
+    """os.copy_file_range where available (in-kernel, reflinks on some filesystems), else a streamed copy."""
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        if hasattr(os, "copy_file_range"):
+            remaining = os.fstat(fsrc.fileno()).st_size
+            try:
+                while remaining > 0:
+                    sent = os.copy_file_range(fsrc.fileno(), fdst.fileno(), min(remaining, 1 << 30))
+                    if sent == 0:
+                        break
+                    remaining -= sent
+                if remaining <= 0:
+                    return
+            except OSError as exc:
+                if exc.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EPERM):
+                    raise
+            fsrc.seek(0)
+            fdst.seek(0)
+            fdst.truncate()
+        shutil.copyfileobj(fsrc, fdst, COPY_CHUNK)
+
+
+def _transfer(src: str, dst: str, method: str) -> str:
+    """Place `src` at `dst` with the requested method; returns the method actually used."""
+    order = ["hardlink", "reflink", "copy"] if method == "auto" else [method]
+    last_error: Optional[OSError] = None
+    for candidate in order:
+        try:
+            if candidate == "hardlink":
+                os.link(src, dst)
+            elif candidate == "reflink":
+                _reflink(src, dst)
+            else:
+                _copy_range(src, dst)
+                shutil.copystat(src, dst)
+            return candidate
+        except OSError as exc:
+            last_error = exc
+            if os.path.lexists(dst):
+                os.unlink(dst)
+    assert last_error is not None
+    raise last_error
+
+
+class AttachmentMirror:
+    """Keeps <output-dir>/attachments in sync with the attachment files referenced by exported notes."""
+
+    def __init__(self, out_dir: pathlib.Path, method: str = "auto") -> None:
+        if method not in METHODS:
+            raise ValueError(f"unknown attachment method {method!r}")
+        self.root = out_dir / ATTACHMENTS_DIRNAME
+        self.method = method
+        self.state_path = self.root / STATE_NAME
+        self.state: Dict[str, Dict[str, object]] = self._load_state()
+        self.stats = {"linked": 0, "reflinked": 0, "copied": 0, "unchanged": 0, "missing": 0, "removed": 0}
+        self._lock = threading.Lock()
+
+    def _load_state(self) -> Dict[str, Dict[str, object]]:
+        try:
+            data = json.loads(self.state_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        if data.get("version") != STATE_VERSION:
+            return {}
+        return data.get("files", {})
+
+    def save_state(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        payload = {"version": STATE_VERSION, "files": dict(sorted(self.state.items()))}
+        tmp = self.state_path.with_name(f"{STATE_NAME}.tmp")
+        tmp.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp, self.state_path)
+
+    @staticmethod
+    def relative_path(uid: str, filename: str) -> str:
+        return f"{ATTACHMENTS_DIRNAME}/{uid}/{filename}"
+
+    def sync_one(self, item: Tuple[str, str]) -> Optional[str]:
+        """Mirror one (source path, relative path) pair; returns the method used, 'unchanged' or None if missing."""
+        src, rel = item
+        try:
+            st = os.stat(src)
+        except FileNotFoundError:
+            with self._lock:
+                self.stats["missing"] += 1
+            return None
+        dst = self.root.parent / rel
+        with self._lock:
+            previous = self.state.get(rel)
+        if (
+            previous
+            and previous.get("size") == st.st_size
+            and previous.get("mtime_ns") == st.st_mtime_ns
+            and os.path.exists(dst)
+        ):
+            with self._lock:
+                self.stats["unchanged"] += 1
+            return "unchanged"
+
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        # Build next to the destination and swap in, so readers never see a half-written file.
+        tmp = dst.with_name(f".{dst.name}.tmp")
+        if os.path.lexists(tmp):
+            os.unlink(tmp)
+        used = _transfer(src, str(tmp), self.method)
+        os.replace(tmp, dst)
+        key = {"hardlink": "linked", "reflink": "reflinked", "copy": "copied"}[used]
+        with self._lock:
+            self.state[rel] = {"source": src, "size": st.st_size, "mtime_ns": st.st_mtime_ns, "method": used}
+            self.stats[key] += 1
+        return used
+
+    def prune(self, keep: Iterable[str]) -> None:
+        """Drop mirrored files no longer referenced (only files this mirror created are touched)."""
+        keep_set = set(keep)
+        for rel in [r for r in self.state if r not in keep_set]:
+            path = self.root.parent / rel
+            try:
+                path.unlink()
+                self.stats["removed"] += 1
+            except FileNotFoundError:
+                pass
+            try:
+                path.parent.rmdir()
+            except OSError:
+                pass
+            del self.state[rel]
+
+
+def attachment_items(attachments_map: Dict[int, List[Dict[str, str]]]) -> List[Tuple[str, str]]:
+    """Unique (source path, relative export path) pairs in first-seen order."""
+    items: Dict[str, str] = {}
+    for entries in attachments_map.values():
+        for entry in entries:
+            if "local_path" in entry:
+                items.setdefault(entry["local_path"], entry["path"])
+    return [(src, rel) for rel, src in items.items()]
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+Link resolution for the Bear exporter.
+
+- Titles are normalised (casefold + collapsed whitespace) so `[[weekly  Plan]]` finds "Weekly Plan";
+  an exact title match is tried first, so "Plan" and "plan" stay distinct notes.
+- `[[Title|alias]]` keeps the alias as display text; `[[Title/Heading]]` resolves the title part and
+  carries the heading into the bear:// link.
+- Unlinked mentions (plain-text occurrences of other notes' titles) are found with an Aho-Corasick
+  automaton built once over all titles, so each note is scanned in one pass however big the library is.
+- With mentions on, the same automaton pass also finds the `[[`/`]]` markers, so each note is scanned once.
+- Per-note parses are cached by content hash in a JSON file. Entries hold only what does not depend on
+  the title set (link candidates, raw title matches) and are resolved against the current index; when
+  titles are added, only notes whose text contains one of the new titles are rescanned.
+"""
+
+import hashlib
+import json
+import os
+import pathlib
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import quote
+
+WIKI_LINK_RE = re.compile(r"\[\[(.+?)\]\]")
+CACHE_VERSION = 2
+LINK_OPEN, LINK_CLOSE = "[[", "]]"
+# Past this many new titles, checking every cached note for them costs more than a rescan.
+MAX_ADDED_TITLES = 64
+# Shorter titles ("To", "AI") produce mostly noise as unlinked mentions.
+DEFAULT_MIN_MENTION_LENGTH = 3
+
+TitleIndex = Dict[str, List[Dict[str, Optional[str]]]]
+
+
+def normalize_title(title: str) -> str:
+    return " ".join(title.split()).casefold()
+
+
+def bear_link(identifier: Optional[str], heading: Optional[str] = None) -> Optional[str]:
+    if not identifier:
+        return None
+    link = f"bear://x-callback-url/open-note?id={identifier}"
+    if heading:
+        link += f"&header={quote(heading)}"
+    return link
+
+
+def split_link(inner: str) -> Tuple[str, Optional[str]]:
+    """`Target|alias` -> (target, alias)."""
+    target, sep, alias = inner.partition("|")
+    return target.strip(), (alias.strip() or None) if sep else None
+
+
+def candidate_keys(target: str) -> List[Tuple[str, str, Optional[str]]]:
+    """
+    (title, key, heading) readings of a link target: the whole target first, then each
+    `Title/Heading` split from the right (titles may themselves contain `/`).
+    """
+    candidates: List[Tuple[str, str, Optional[str]]] = [(target, normalize_title(target), None)]
+    pos = len(target)
+    while True:
+        pos = target.rfind("/", 0, pos)
+        if pos <= 0:
+            break
+        title = target[:pos].strip()
+        candidates.append((title, normalize_title(title), target[pos + 1 :].strip() or None))
+    return candidates
+
+
+def link_target_keys(texts: Iterable[Optional[str]]) -> set:
+    """Every normalised key the [[links]] in `texts` could resolve to (used to scope title lookups)."""
+    keys = set()
+    for text in texts:
+        for inner in WIKI_LINK_RE.findall(text or ""):
+            target, _ = split_link(inner)
+            keys.update(key for _, key, _ in candidate_keys(target))
+    return keys
+
+
+def wiki_link_spans(text: str, opens: List[int], closes: List[int]) -> List[Tuple[int, int]]:
+    """
+    (start, end) of every [[...]] given the sorted offsets of all `[[` and `]]` in `text`;
+    same matches as WIKI_LINK_RE.finditer (non-empty, single-line, leftmost first).
+    """
+    spans: List[Tuple[int, int]] = []
+    pos = 0
+    j = 0
+    for start in opens:
+        if start < pos:
+            continue
+        while j < len(closes) and closes[j] < start + 3:
+            j += 1
+        if j == len(closes):
+            break
+        if text.find("\n", start + 2, closes[j]) != -1:
+            continue
+        pos = closes[j] + 2
+        spans.append((start, pos))
+    return spans
+
+
+def _is_word_char(ch: str) -> bool:
+    # CJK text has no word separators, so only alphanumerics outside CJK ranges need a boundary.
+    return ch.isalnum() and ord(ch) < 0x2E80
+
+
+class TitleAutomaton:
+    """Aho-Corasick automaton over normalised titles; transitions live in one int-keyed dict."""
+
+    def __init__(self, keys: Iterable[str]) -> None:
+        self.keys: List[str] = []
+        self._goto: Dict[int, int] = {}
+        self._fail: List[int] = [0]
+        self._out: List[int] = [-1]  # key id ending exactly at this state
+        self._dict_link: List[int] = [0]  # nearest proper-suffix state that ends a key
+        for key in keys:
+            self._insert(key)
+        self._build()
+
+    @staticmethod
+    def _edge(state: int, ch: str) -> int:
+        return (state << 21) | ord(ch)
+
+    def _insert(self, key: str) -> None:
+        state = 0
+        for ch in key:
+            edge = self._edge(state, ch)
+            nxt = self._goto.get(edge)
+            if nxt is None:
+                nxt = len(self._fail)
+                self._goto[edge] = nxt
+                self._fail.append(0)
+                self._out.append(-1)
+                self._dict_link.append(0)
+            state = nxt
+        if self._out[state] == -1:
+            self._out[state] = len(self.keys)
+            self.keys.append(key)
+
+    def _build(self) -> None:
+        children: Dict[int, List[Tuple[str, int]]] = {}
+        for edge, child in self._goto.items():
+            children.setdefault(edge >> 21, []).append((chr(edge & 0x1FFFFF), child))
+        queue = [child for _, child in children.get(0, [])]
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for ch, child in children.get(state, []):
+                f = self._fail[state]
+                while f and self._edge(f, ch) not in self._goto:
+                    f = self._fail[f]
+                target = self._goto.get(self._edge(f, ch), 0)
+                self._fail[child] = target if target != child else 0
+                fail = self._fail[child]
+                self._dict_link[child] = fail if self._out[fail] != -1 else self._dict_link[fail]
+                queue.append(child)
+
+    def scan(self, text: str) -> List[Tuple[int, int, int]]:
+        """All (start, end, key_id) matches in `text`, with offsets into the original string."""
+        matches: List[Tuple[int, int, int]] = []
+        goto, fail, out, dict_link = self._goto, self._fail, self._out, self._dict_link
+        origin: List[int] = []  # original index of every normalised character fed in
+        state = 0
+        prev_space = True
+        for i, raw in enumerate(text):
+            if raw.isspace():
+                if prev_space:
+                    continue
+                prev_space = True
+                chars = " "
+            else:
+                prev_space = False
+                chars = raw.casefold()
+            for ch in chars:
+                origin.append(i)
+                while True:
+                    nxt = goto.get((state << 21) | ord(ch))
+                    if nxt is not None or state == 0:
+                        state = nxt or 0
+                        break
+                    state = fail[state]
+                hit = state if out[state] != -1 else dict_link[state]
+                while hit:
+                    key_id = out[hit]
+                    length = len(self.keys[key_id])
+                    matches.append((origin[len(origin) - length], i + 1, key_id))
+                    hit = dict_link[hit]
+        return matches
+
+
+class LinkResolver:
+    """Resolves forward links and (optionally) unlinked mentions for note texts."""
+
+    def __init__(
+        self,
+        title_index: TitleIndex,
+        mentions: bool = False,
+        min_mention_length: int = DEFAULT_MIN_MENTION_LENGTH,
+        cache_path: Optional[pathlib.Path] = None,
+    ) -> None:
+        # Exact titles win over normalised ones, so "Plan" and "plan" still resolve to their own notes.
+        self.exact: TitleIndex = title_index
+        self.index: TitleIndex = {}
+        for title, notes in title_index.items():
+            self.index.setdefault(normalize_title(title), []).extend(notes)
+        self.mentions = mentions
+        self.automaton: Optional[TitleAutomaton] = None
+        self.mention_keys: Optional[set] = None
+        if mentions:
+            self.mention_keys = {k for k in self.index if len(k) >= min_mention_length}
+            self.automaton = TitleAutomaton([*sorted(self.mention_keys), LINK_OPEN, LINK_CLOSE])
+            self._open_id = self.automaton.keys.index(LINK_OPEN)
+            self._close_id = self.automaton.keys.index(LINK_CLOSE)
+        self.cache_path = cache_path
+        self._cache: Dict[str, Dict[str, list]] = {}
+        # Titles that are new since the cached matches were computed (None: the matches are unusable).
+        self._added: Optional[List[str]] = None
+        self._seen: set = set()
+        self._dirty = False
+        self._lock = threading.Lock()
+        if cache_path:
+            self._load_cache()
+
+    # -- cache -------------------------------------------------------------
+
+    def _load_cache(self) -> None:
+        try:
+            data = json.loads(self.cache_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if data.get("version") != CACHE_VERSION:
+            return
+        self._cache = data.get("entries", {})
+        if self.mention_keys is not None and data.get("keys") is not None:
+            cached = set(data["keys"])
+            added = [k for k in self.mention_keys if k not in cached]
+            self._added = added if len(added) <= MAX_ADDED_TITLES else None
+
+    def save_cache(self, prune: bool = False) -> None:
+        """Persist the cache; `prune` (full-library runs only) drops entries of notes not seen this run."""
+        if not self.cache_path or not (self._dirty or prune):
+            return
+        entries = self._cache
+        if prune or (self.mention_keys is not None and self._added != []):
+            # Entries not checked this run may be missing matches for the new titles.
+            entries = {h: v for h, v in entries.items() if h in self._seen}
+        keys = sorted(self.mention_keys) if self.mention_keys is not None else None
+        payload = {"version": CACHE_VERSION, "keys": keys, "entries": entries}
+        tmp = self.cache_path.with_name(f".{self.cache_path.name}.tmp")
+        tmp.write_text(json.dumps(payload, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, self.cache_path)
+
+    def _reusable(self, parsed: Optional[Dict[str, list]], text: str) -> bool:
+        if parsed is None:
+            return False
+        if self.mention_keys is None:
+            return True
+        if self._added is None or "matches" not in parsed:
+            return False
+        if not self._added:
+            return True
+        normalized = normalize_title(text)
+        return not any(key in normalized for key in self._added)
+
+    # -- resolution --------------------------------------------------------
+
+    def _parse(self, text: str, own_key: Optional[str]) -> Dict[str, list]:
+        """Title-independent parse: link candidates and, with mentions on, every usable title match."""
+        if self.automaton:
+            found = self.automaton.scan(text)
+            opens = sorted(s for s, _, key_id in found if key_id == self._open_id)
+            closes = sorted(s for s, _, key_id in found if key_id == self._close_id)
+            spans = wiki_link_spans(text, opens, closes)
+        else:
+            found = []
+            spans = [m.span() for m in WIKI_LINK_RE.finditer(text)]
+
+        links = []
+        for start, end in spans:
+            inner = text[start + 2 : end - 2]
+            target, alias = split_link(inner)
+            links.append([inner, alias, candidate_keys(target)])
+        parsed: Dict[str, list] = {"links": links}
+
+        if self.automaton:
+            keys = self.automaton.keys
+            matches = []
+            # Outside [[...]], on word boundaries; ordered for the leftmost-longest pick in resolve().
+            for start, end, key_id in sorted(found, key=lambda m: (m[0], -(m[1] - m[0]))):
+                key = keys[key_id]
+                if key == own_key or key not in self.mention_keys:
+                    continue
+                if any(s <= start < e for s, e in spans):
+                    continue
+                if (start > 0 and _is_word_char(text[start - 1]) and _is_word_char(text[start])) or (
+                    end < len(text) and _is_word_char(text[end]) and _is_word_char(text[end - 1])
+                ):
+                    continue
+                matches.append([start, end, key])
+            parsed["matches"] = matches
+        return parsed
+
+    def resolve(self, text: str, own_title: Optional[str] = None) -> Tuple[list, list]:
+        """(forward_links, unlinked_mentions) for one note's text."""
+        text = text or ""
+        own_key = normalize_title(own_title) if own_title else None
+        digest = self.content_key(text, own_title)
+        self._seen.add(digest)
+        parsed = self._cache.get(digest)
+        if not self._reusable(parsed, text):
+            parsed = self._parse(text, own_key)
+            with self._lock:
+                self._cache[digest] = parsed
+                self._dirty = True
+
+        forward = []
+        linked = set()
+        for inner, alias, candidates in parsed["links"]:
+            title, key, heading = next((c for c in candidates if c[1] in self.index), candidates[0])
+            linked.add(key)
+            matches = (
+                (alias is None and heading is None and self.exact.get(inner))
+                or self.exact.get(title)
+                or self.index.get(key, [])
+            )
+            identifier = matches[0]["identifier"] if matches else None
+            entry: Dict[str, Optional[str]] = {
+                # Plain links keep the text exactly as written, like the original exporter did.
+                "title": inner if alias is None and heading is None else title,
+                "identifier": identifier,
+                "bear_link": bear_link(identifier, heading),
+            }
+            if heading:
+                entry["heading"] = heading
+            if alias:
+                entry["alias"] = alias
+            forward.append(entry)
+
+        mentions = []
+        if self.mention_keys is not None:
+            taken_end = -1
+            for start, end, key in parsed["matches"]:
+                # Leftmost-longest and non-overlapping among titles that exist now.
+                if key in linked or key not in self.mention_keys or start < taken_end:
+                    continue
+                taken_end = end
+                linked.add(key)
+                matches = self.exact.get(text[start:end]) or self.index.get(key)
+                if matches:
+                    ident = matches[0]["identifier"]
+                    mentions.append({"title": matches[0]["title"], "identifier": ident, "bear_link": bear_link(ident)})
+        return forward, mentions
+
+    def content_key(self, text: str, own_title: Optional[str] = None) -> str:
+        """Cache key: the note text plus its own title (excluded from its mentions)."""
+        own_key = normalize_title(own_title) if own_title else None
+        return hashlib.sha1(f"{own_key}\0{text or ''}".encode("utf-8")).hexdigest()
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+SQLite FTS5 search index over exported Bear notes (the project's own search layer; Bear's DB stays read-only).
+
+The index lives next to the export (<output-dir>/search.sqlite by default) and holds title, body,
+tags and backlink titles in an FTS5 table plus a plain `notes` table for dates/paths and a
+`note_tags` table for tag filters. Rows carry the hash of the rendered note, so re-indexing an
+unchanged note is a dictionary lookup.
+
+CJK text has no word separators, so CJK characters are indexed (and queried) as single-character
+tokens: "周报" becomes the phrase "周 报". Snippets are joined back before printing.
+
+Usage examples:
+  python scripts/export_bear_notes.py --incremental --search-index --output-dir data/notes_export/all
+  python scripts/bear_search.py query "weekly plan" --index data/notes_export/all/search.sqlite
+  python scripts/bear_search.py query 周报 --tag work --since 2024-01-01 --limit 5
+  python scripts/bear_search.py query 'title:sprint NOT draft' --raw
+  python scripts/bear_search.py index data/notes_export/all   # (re)build from Markdown files
+"""
+
+import argparse
+import hashlib
+import json
+import pathlib
+import re
+import sqlite3
+import sys
+import time
+from typing import Dict, Iterable, List, Optional
+
+INDEX_NAME = "search.sqlite"
+SCHEMA_VERSION = 1
+# bm25 column weights: title, body, tags, backlinks.
+BM25_WEIGHTS = (10.0, 1.0, 5.0, 2.0)
+SNIPPET_TOKENS = 16
+
+CJK_CLASS = "\u2e80-\u9fff\uac00-\ud7af\uf900-\ufaff\uff00-\uffef"
+CJK_RE = re.compile(f"([{CJK_CLASS}])")
+# A space between two CJK characters, possibly with snippet highlight brackets around it.
+CJK_GAP_RE = re.compile(f"(?<=[{CJK_CLASS}])(\\]?) (\\[?)(?=[{CJK_CLASS}])")
+FTS_OPERATORS = {"AND", "OR", "NOT"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS notes (
+    id INTEGER PRIMARY KEY,
+    note_id TEXT NOT NULL UNIQUE,
+    title TEXT,
+    path TEXT,
+    created TEXT,
+    modified TEXT,
+    trashed INTEGER NOT NULL DEFAULT 0,
+    hash TEXT
+);
+CREATE INDEX IF NOT EXISTS notes_modified ON notes (modified);
+CREATE TABLE IF NOT EXISTS note_tags (tag TEXT NOT NULL, id INTEGER NOT NULL, PRIMARY KEY (tag, id)) WITHOUT ROWID;
+CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(
+    title, body, tags, backlinks, tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+
+def segment_cjk(text: Optional[str]) -> str:
+    """Put spaces around CJK characters so unicode61 indexes each one as a token."""
+    return CJK_RE.sub(r" \1 ", text or "")
+
+
+def join_cjk(text: str) -> str:
+    """Undo segment_cjk for display (also across the snippet highlight brackets)."""
+    return CJK_GAP_RE.sub(r"\1\2", " ".join(text.split()))
+
+
+def to_match(query: str) -> str:
+    """Plain search words -> FTS5 MATCH: every word must appear, `word*` is a prefix, CJK runs are phrases."""
+    terms = []
+    for word in query.split():
+        if word in FTS_OPERATORS:
+            terms.append(word)
+            continue
+        prefix = word.endswith("*")
+        word = word.rstrip("*").replace('"', '""')
+        if not word:
+            continue
+        terms.append(f'"{" ".join(segment_cjk(word).split())}"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+
+def document_from_meta(meta: Dict[str, object], body: str, path: str, digest: str) -> Dict[str, object]:
+    """The indexable subset of an exported note (front matter as written by export_bear_notes)."""
+    return {
+        "note_id": str(meta.get("identifier") or path),
+        "title": meta.get("title") or "",
+        "body": body,
+        "tags": list(meta.get("tags") or []),
+        "backlinks": [b.get("title") or "" for b in meta.get("backlinks") or [] if isinstance(b, dict)],
+        "created": meta.get("creation_date"),
+        "modified": meta.get("modification_date"),
+        "trashed": bool(meta.get("trashed")),
+        "path": path,
+        "hash": digest,
+    }
+
+
+def parse_markdown(text: str) -> tuple:
+    """(meta, body) from an exported note; list values are JSON, scalars are plain text."""
+    meta: Dict[str, object] = {}
+    if not text.startswith("---\n"):
+        return meta, text
+    end = text.find("\n---\n", 4)
+    if end < 0:
+        return meta, text
+    for line in text[4:end].splitlines():
+        key, sep, value = line.partition(": ")
+        if not sep:
+            continue
+        if value.startswith("["):
+            try:
+                meta[key] = json.loads(value)
+                continue
+            except ValueError:
+                pass
+        meta[key] = {"null": None, "true": True, "false": False}.get(value, value)
+    return meta, text[end + 5 :].lstrip("\n")
+
+
+class SearchIndex:
+    """
+    Incrementally maintained FTS5 index; writes happen in one transaction until commit().
+    With readonly=True (queries) the file is opened with mode=ro: no schema/meta writes and no hash map load.
+    """
+
+    def __init__(self, path: pathlib.Path, readonly: bool = False) -> None:
+        self.path = path
+        self.hashes: Dict[str, str] = {}
+        if readonly:
+            self.conn = sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True)
+            self.conn.row_factory = sqlite3.Row
+            self._check_schema()
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self.conn = sqlite3.connect(str(path))
+            self.conn.row_factory = sqlite3.Row
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.executescript(SCHEMA)
+            self._check_schema()
+            self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('schema_version', ?)", (str(SCHEMA_VERSION),))
+            self.hashes = {r[0]: r[1] for r in self.conn.execute("SELECT note_id, hash FROM notes")}
+        self.seen: set = set()
+        self.stats = {"indexed": 0, "unchanged": 0, "removed": 0}
+
+    def _check_schema(self) -> None:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+        if row and int(row[0]) != SCHEMA_VERSION:
+            raise RuntimeError(f"{self.path}: unsupported search index schema {row[0]} (delete it to rebuild)")
+
+    def upsert(self, doc: Dict[str, object]) -> bool:
+        """Index one document unless its hash is unchanged; returns True when the row was (re)written."""
+        note_id = str(doc["note_id"])
+        self.seen.add(note_id)
+        if self.hashes.get(note_id) == doc["hash"]:
+            self.stats["unchanged"] += 1
+            return False
+        self._delete(note_id)
+        cur = self.conn.execute(
+            "INSERT INTO notes (note_id, title, path, created, modified, trashed, hash) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (note_id, doc["title"], doc["path"], doc["created"], doc["modified"], int(bool(doc["trashed"])), doc["hash"]),
+        )
+        rowid = cur.lastrowid
+        tags = list(dict.fromkeys(doc["tags"]))
+        self.conn.executemany("INSERT INTO note_tags (tag, id) VALUES (?, ?)", [(t, rowid) for t in tags])
+        self.conn.execute(
+            "INSERT INTO notes_fts (rowid, title, body, tags, backlinks) VALUES (?, ?, ?, ?, ?)",
+            (
+                rowid,
+                segment_cjk(str(doc["title"])),
+                segment_cjk(str(doc["body"])),
+                segment_cjk(" ".join(tags)),
+                segment_cjk("\n".join(doc["backlinks"])),
+            ),
+        )
+        self.hashes[note_id] = str(doc["hash"])
+        self.stats["indexed"] += 1
+        return True
+
+    def _delete(self, note_id: str) -> None:
+        row = self.conn.execute("SELECT id FROM notes WHERE note_id = ?", (note_id,)).fetchone()
+        if row is None:
+            return
+        self.conn.execute("DELETE FROM notes_fts WHERE rowid = ?", (row[0],))
+        self.conn.execute("DELETE FROM note_tags WHERE id = ?", (row[0],))
+        self.conn.execute("DELETE FROM notes WHERE id = ?", (row[0],))
+
+    def remove(self, note_ids: Iterable[str]) -> None:
+        for note_id in note_ids:
+            if note_id in self.hashes:
+                self._delete(note_id)
+                del self.hashes[note_id]
+                self.stats["removed"] += 1
+
+    def prune(self) -> None:
+        """Drop every note not upserted since the index was opened (full-library runs only)."""
+        self.remove([n for n in list(self.hashes) if n not in self.seen])
+
+    def commit(self) -> None:
+        self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def search(
+        self,
+        query: str,
+        tags: Optional[List[str]] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        include_trashed: bool = False,
+        limit: int = 20,
+        raw: bool = False,
+    ) -> List[Dict[str, object]]:
+        """Best matches first (bm25, title-weighted) with a highlighted body snippet."""
+        where = ["notes_fts MATCH ?"]
+        params: List[object] = [query if raw else to_match(query)]
+        for tag in tags or []:
+            # A tag filter also matches its nested tags (work -> work/meetings).
+            where.append(
+                "EXISTS (SELECT 1 FROM note_tags t WHERE t.id = n.id AND (t.tag = ? OR (t.tag >= ? AND t.tag < ?)))"
+            )
+            params.extend([tag, tag + "/", tag + "0"])
+        if since:
+            where.append("n.modified >= ?")
+            params.append(since)
+        if until:
+            where.append("substr(n.modified, 1, ?) <= ?")
+            params.extend([len(until), until])
+        if not include_trashed:
+            where.append("n.trashed = 0")
+        weights = ", ".join(str(w) for w in BM25_WEIGHTS)
+        sql = f"""
+            SELECT n.note_id, n.title, n.path, n.modified, bm25(notes_fts, {weights}) AS score,
+                   snippet(notes_fts, 1, '[', ']', '…', {SNIPPET_TOKENS}) AS snippet,
+                   (SELECT group_concat(tag, ',') FROM note_tags t WHERE t.id = n.id) AS tags
+            FROM notes_fts JOIN notes n ON n.id = notes_fts.rowid
+            WHERE {' AND '.join(where)}
+            ORDER BY score
+            LIMIT ?
+        """
+        params.append(limit)
+        results = []
+        for r in self.conn.execute(sql, params):
+            results.append(
+                {
+                    "note_id": r["note_id"],
+                    "title": r["title"],
+                    "path": r["path"],
+                    "modified": r["modified"],
+                    "tags": sorted((r["tags"] or "").split(",")) if r["tags"] else [],
+                    "score": round(r["score"], 6),
+                    "snippet": join_cjk(r["snippet"]),
+                }
+            )
+        return results
+
+
+def index_directory(export_dir: pathlib.Path, index: SearchIndex) -> None:
+    """(Re)index every exported note-*.md in `export_dir`, pruning notes whose files are gone."""
+    for path in sorted(export_dir.glob("note-*.md")):
+        text = path.read_text(encoding="utf-8")
+        meta, body = parse_markdown(text)
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        index.upsert(document_from_meta(meta, body, path.name, digest))
+    index.prune()
+    index.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search exported Bear notes (SQLite FTS5).")
+    sub = parser.add_subparsers(dest="mode", required=True)
+
+    p_query = sub.add_parser("query", help="Search the index.")
+    p_query.add_argument("query", help="Search words (all must match; word* = prefix), or an FTS5 expression with --raw.")
+    p_query.add_argument("--index", default=f"output-export/{INDEX_NAME}", help="Path to search.sqlite.")
+    p_query.add_argument("--tag", action="append", help="Only notes with this tag (or a nested tag); repeatable.")
+    p_query.add_argument("--since", help="Modified on/after this date (YYYY-MM-DD).")
+    p_query.add_argument("--until", help="Modified on/before this date (YYYY-MM-DD).")
+    p_query.add_argument("--include-trashed", action="store_true", help="Include notes in Bear's trash.")
+    p_query.add_argument("--limit", type=int, default=20, help="Maximum results.")
+    p_query.add_argument("--raw", action="store_true", help="Pass the query to FTS5 MATCH unchanged.")
+    p_query.add_argument("--json", action="store_true", help="Print results as JSON.")
+
+    p_index = sub.add_parser("index", help="(Re)build the index from an export directory's Markdown files.")
+    p_index.add_argument("export_dir", help="Directory with exported note-*.md files.")
+    p_index.add_argument("--index", help=f"Index path (default: <export_dir>/{INDEX_NAME}).")
+
+    args = parser.parse_args()
+
+    if args.mode == "index":
+        export_dir = pathlib.Path(args.export_dir)
+        index = SearchIndex(pathlib.Path(args.index) if args.index else export_dir / INDEX_NAME)
+        t0 = time.perf_counter()
+        index_directory(export_dir, index)
+        index.close()
+        stats = index.stats
+        print(
+            f"Indexed {stats['indexed']}, unchanged {stats['unchanged']}, removed {stats['removed']} "
+            f"in {time.perf_counter() - t0:.2f}s -> {index.path}"
+        )
+        return 0
+
+    index_path = pathlib.Path(args.index)
+    if not index_path.exists():
+        sys.stderr.write(f"Search index not found: {index_path}\n")
+        return 1
+    try:
+        index = SearchIndex(index_path, readonly=True)
+    except sqlite3.DatabaseError as exc:
+        sys.stderr.write(f"Cannot open search index {index_path}: {exc}\n")
+        return 1
+    t0 = time.perf_counter()
+    try:
+        results = index.search(
+            args.query, args.tag, args.since, args.until, args.include_trashed, args.limit, args.raw
+        )
+    except sqlite3.OperationalError as exc:
+        sys.stderr.write(f"Invalid query: {exc}\n")
+        return 1
+    finally:
+        index.close()
+    elapsed_ms = (time.perf_counter() - t0) * 1000
+    if args.json:
+        print(json.dumps({"query": args.query, "elapsed_ms": round(elapsed_ms, 2), "results": results}, ensure_ascii=False, indent=2))
+        return 0
+    for r in results:
+        tags = f"  #{' #'.join(r['tags'])}" if r["tags"] else ""
+        print(f"{r['title']}  ({r['modified'] or '-'}){tags}\n  {r['path']}\n  {r['snippet']}\n")
+    print(f"{len(results)} result(s) in {elapsed_ms:.1f} ms", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
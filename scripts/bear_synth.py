@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Create a synthetic Bear-schema database.sqlite so export_bear_notes.py can run off a Mac.
+
+Only the tables/columns the exporter reads are created (ZSFNOTE, ZSFNOTETAG, Z_5TAGS,
+ZSFNOTEBACKLINK, ZSFNOTEFILE). Content is deterministic for a given --seed. With --files-dir the
+attachment files are created too, laid out like Bear's "Note Files/<uid>/<name>".
+
+Usage examples:
+  python scripts/bear_synth.py --notes 10000 --output /tmp/bear-10k.sqlite
+  python scripts/bear_synth.py --notes 1000 --tags 200 --links-per-note 5 --note-size 8000 \
+      --attachment-ratio 0.3 --files-dir /tmp/bear-files --output /tmp/bear-1k.sqlite
+"""
+
+import argparse
+import json
+import os
+import pathlib
+import random
+import sqlite3
+import sys
+import uuid
+from typing import Dict, Optional
+
+SCHEMA = """
+CREATE TABLE ZSFNOTE (
+    Z_PK INTEGER PRIMARY KEY, ZTITLE TEXT, ZTEXT TEXT, ZUNIQUEIDENTIFIER TEXT,
+    ZCREATIONDATE TIMESTAMP, ZMODIFICATIONDATE TIMESTAMP,
+    ZARCHIVED INTEGER, ZPINNED INTEGER, ZTRASHED INTEGER, ZPERMANENTLYDELETED INTEGER,
+    ZTODOCOMPLETED INTEGER, ZHASSOURCECODE INTEGER, ZHASIMAGES INTEGER, ZHASFILES INTEGER,
+    ZLASTEDITINGDEVICE VARCHAR, ZSUBTITLE VARCHAR
+);
+CREATE TABLE ZSFNOTETAG (Z_PK INTEGER PRIMARY KEY, ZTITLE VARCHAR);
+CREATE TABLE Z_5TAGS (Z_5NOTES INTEGER, Z_13TAGS INTEGER, PRIMARY KEY (Z_5NOTES, Z_13TAGS));
+CREATE TABLE ZSFNOTEBACKLINK (Z_PK INTEGER PRIMARY KEY, ZLINKEDBY INTEGER, ZLINKINGTO INTEGER);
+CREATE TABLE ZSFNOTEFILE (Z_PK INTEGER PRIMARY KEY, ZNOTE INTEGER, ZUNIQUEIDENTIFIER VARCHAR, ZFILENAME VARCHAR);
+CREATE INDEX Z_5TAGS_Z_13TAGS_INDEX ON Z_5TAGS (Z_13TAGS, Z_5NOTES);
+CREATE INDEX ZSFNOTEBACKLINK_ZLINKINGTO_INDEX ON ZSFNOTEBACKLINK (ZLINKINGTO);
+CREATE INDEX ZSFNOTEFILE_ZNOTE_INDEX ON ZSFNOTEFILE (ZNOTE);
+CREATE INDEX ZSFNOTE_ZUNIQUEIDENTIFIER_INDEX ON ZSFNOTE (ZUNIQUEIDENTIFIER);
+"""
+
+WORDS = (
+    "focus review plan sprint note idea draft weekly energy calendar reading project meeting "
+    "design bug release habit journal system archive inbox research summary goal"
+).split()
+# Apple epoch seconds for 2020-01-01 .. 2025-01-01
+APPLE_START = 599_616_000.0
+APPLE_SPAN = 5 * 365 * 86400.0
+
+
+def make_title(rng: random.Random, pk: int) -> str:
+    return f"{rng.choice(WORDS).title()} {rng.choice(WORDS)} {pk}"
+
+
+def make_body(rng: random.Random, title: str, size: int, link_titles: list) -> str:
+    parts = [f"# {title}", ""]
+    words = [rng.choice(WORDS) for _ in range(max(1, size // 7))]
+    for t in link_titles:
+        words.insert(rng.randrange(len(words) + 1), f"[[{t}]]")
+    line: list = []
+    for w in words:
+        line.append(w)
+        if len(line) >= 12:
+            parts.append(" ".join(line))
+            line = []
+    if line:
+        parts.append(" ".join(line))
+    return "\n".join(parts)
+
+
+def generate(
+    path: pathlib.Path,
+    notes: int,
+    tags: int = 50,
+    tags_per_note: int = 2,
+    links_per_note: int = 2,
+    attachment_ratio: float = 0.1,
+    note_size: int = 1500,
+    trashed_ratio: float = 0.01,
+    deleted_ratio: float = 0.01,
+    seed: int = 42,
+    files_dir: Optional[pathlib.Path] = None,
+    attachment_size: int = 64 * 1024,
+) -> Dict[str, int]:
+    """Create the database at `path` (overwriting it) and return row counts per table."""
+    if path.exists():
+        path.unlink()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    conn = sqlite3.connect(str(path))
+    conn.executescript(SCHEMA)
+
+    tag_names = [f"tag{i}" if i % 5 else f"area/tag{i}" for i in range(1, tags + 1)]
+    conn.executemany("INSERT INTO ZSFNOTETAG (Z_PK, ZTITLE) VALUES (?, ?)", enumerate(tag_names, start=1))
+
+    titles = [make_title(rng, pk) for pk in range(1, notes + 1)]
+    batch = []
+    tag_rows = []
+    link_rows = []
+    file_rows = []
+    for pk in range(1, notes + 1):
+        targets = rng.sample(range(1, notes + 1), min(links_per_note, notes))
+        body = make_body(rng, titles[pk - 1], int(rng.uniform(0.5, 1.5) * note_size), [titles[t - 1] for t in targets])
+        created = APPLE_START + rng.random() * APPLE_SPAN
+        has_file = rng.random() < attachment_ratio
+        batch.append(
+            (
+                pk,
+                titles[pk - 1],
+                body,
+                str(uuid.UUID(int=rng.getrandbits(128))).upper(),
+                created,
+                created + rng.random() * 86400 * 30,
+                int(rng.random() < 0.05),
+                int(rng.random() < 0.02),
+                int(rng.random() < trashed_ratio),
+                int(rng.random() < deleted_ratio),
+                0,
+                0,
+                int(has_file),
+                int(has_file),
+                "MacBook",
+                body[:80],
+            )
+        )
+        for tag_pk in rng.sample(range(1, tags + 1), min(tags_per_note, tags)):
+            tag_rows.append((pk, tag_pk))
+        for target in targets:
+            link_rows.append((pk, target))
+        if has_file:
+            file_uid = str(uuid.UUID(int=rng.getrandbits(128))).upper()
+            file_rows.append((pk, file_uid, f"image-{pk}.png"))
+            if files_dir is not None:
+                target_dir = files_dir / file_uid
+                target_dir.mkdir(parents=True, exist_ok=True)
+                (target_dir / f"image-{pk}.png").write_bytes(rng.randbytes(attachment_size))
+        if len(batch) >= 5000:
+            conn.executemany(f"INSERT INTO ZSFNOTE VALUES ({','.join('?' * 16)})", batch)
+            batch = []
+    if batch:
+        conn.executemany(f"INSERT INTO ZSFNOTE VALUES ({','.join('?' * 16)})", batch)
+    conn.executemany("INSERT INTO Z_5TAGS (Z_5NOTES, Z_13TAGS) VALUES (?, ?)", tag_rows)
+    conn.executemany("INSERT INTO ZSFNOTEBACKLINK (ZLINKEDBY, ZLINKINGTO) VALUES (?, ?)", link_rows)
+    conn.executemany("INSERT INTO ZSFNOTEFILE (ZNOTE, ZUNIQUEIDENTIFIER, ZFILENAME) VALUES (?, ?, ?)", file_rows)
+    conn.commit()
+    conn.close()
+    return {"notes": notes, "tags": tags, "note_tags": len(tag_rows), "backlinks": len(link_rows), "attachments": len(file_rows)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic Bear database.sqlite.")
+    parser.add_argument("--output", required=True, help="Path of the database to create (overwritten).")
+    parser.add_argument("--notes", type=int, default=1000, help="Number of notes.")
+    parser.add_argument("--tags", type=int, default=50, help="Number of distinct tags.")
+    parser.add_argument("--tags-per-note", type=int, default=2, help="Tags attached to each note.")
+    parser.add_argument("--links-per-note", type=int, default=2, help="[[wiki links]] / backlinks per note.")
+    parser.add_argument("--attachment-ratio", type=float, default=0.1, help="Share of notes with one attachment.")
+    parser.add_argument("--note-size", type=int, default=1500, help="Average note body size in characters.")
+    parser.add_argument("--trashed-ratio", type=float, default=0.01, help="Share of notes in the trash.")
+    parser.add_argument("--deleted-ratio", type=float, default=0.01, help="Share of permanently deleted notes.")
+    parser.add_argument("--files-dir", help="Also create attachment files under this 'Note Files' directory.")
+    parser.add_argument("--attachment-size", type=int, default=64 * 1024, help="Bytes per generated attachment file.")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed.")
+    args = parser.parse_args()
+
+    out = pathlib.Path(args.output)
+    counts = generate(
+        out,
+        args.notes,
+        tags=args.tags,
+        tags_per_note=args.tags_per_note,
+        links_per_note=args.links_per_note,
+        attachment_ratio=args.attachment_ratio,
+        note_size=args.note_size,
+        trashed_ratio=args.trashed_ratio,
+        deleted_ratio=args.deleted_ratio,
+        seed=args.seed,
+        files_dir=pathlib.Path(args.files_dir) if args.files_dir else None,
+        attachment_size=args.attachment_size,
+    )
+    print(f"Wrote {out} ({os.path.getsize(out) / 1e6:.1f} MB): {json.dumps(counts)}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Benchmark export_bear_notes.py on synthetic Bear databases (runs on Linux, no Bear needed).
+
+Modes:
+  phases   time each export phase (selection, lookups, link resolution, writing) in-process at
+           several library sizes and append the results to a JSONL file for regression tracking;
+           each run is compared against the previous record of the same size.
+  workers  time full CLI exports at each --workers value and check all runs produced identical files.
+
+Usage examples:
+  python scripts/bench_bear_export.py phases --sizes 1000,10000,100000
+  python scripts/bench_bear_export.py workers --notes 10000 --workers 1,4,8
+"""
+
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import pathlib
+import platform
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+import export_bear_notes as exporter
+from bear_links import LinkResolver
+from bear_synth import generate
+
+BASE = pathlib.Path(__file__).resolve().parent.parent
+EXPORTER = pathlib.Path(exporter.__file__).resolve()
+DEFAULT_RESULTS = BASE / "artifacts" / "bench" / "bear_export_phases.jsonl"
+PHASES = ["selection", "lookups", "link_resolution", "writing"]
+
+
+def tree_digest(out_dir: pathlib.Path) -> str:
+    h = hashlib.sha256()
+    for path in sorted(out_dir.glob("*.md")):
+        h.update(path.name.encode("utf-8"))
+        h.update(path.read_bytes())
+    return h.hexdigest()
+
+
+def git_revision() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "-C", str(BASE), "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip() or None
+
+
+@contextmanager
+def timed(timings: Dict[str, float], name: str) -> Iterator[None]:
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = round(time.perf_counter() - t0, 4)
+
+
+def time_phases(db: pathlib.Path, out_dir: pathlib.Path, workers: int, mentions: bool = False) -> Dict[str, float]:
+    """Run a full-library export phase by phase with the exporter's own functions."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    snapshot = exporter.BearSnapshot(db)
+    conn = snapshot.conn
+    timings: Dict[str, float] = {}
+    try:
+        with timed(timings, "selection"):
+            selected = exporter.select_note_pks(conn, None, None, None)
+        with timed(timings, "lookups"):
+            title_index = exporter.fetch_title_index(conn)
+            note_tags_map = exporter.fetch_note_tags(conn)
+            backlinks_map = exporter.fetch_backlinks(conn)
+            attachments_map = exporter.fetch_attachments(conn, "/synthetic/files")
+        with timed(timings, "link_resolution"):
+            resolver = LinkResolver(title_index, mentions=mentions)
+            resolved = {
+                row["Z_PK"]: resolver.resolve(row["ZTEXT"] or "", row["ZTITLE"])
+                for row in exporter.query_notes(conn, False, "n.Z_PK, n.ZTEXT, n.ZTITLE")
+            }
+
+        def export_one(note: sqlite3.Row) -> pathlib.Path:
+            # Links come from the phase above, so "writing" times only rendering and file writes.
+            links = resolved[note["Z_PK"]]
+            meta = exporter.build_meta(note, resolver, note_tags_map, backlinks_map, attachments_map, links)
+            return exporter.write_note(out_dir, note, meta)
+
+        with timed(timings, "writing"):
+            for _ in exporter.run_pipeline(exporter.query_notes(conn, False), export_one, workers):
+                pass
+    finally:
+        snapshot.close()
+    timings["total"] = round(sum(timings[p] for p in PHASES), 4)
+    timings["selected"] = selected
+    return timings
+
+
+def load_previous(results_path: pathlib.Path) -> Dict[int, Dict[str, float]]:
+    """Latest recorded phase timings per library size."""
+    previous: Dict[int, Dict[str, float]] = {}
+    if not results_path.exists():
+        return previous
+    for line in results_path.read_text(encoding="utf-8").splitlines():
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        for entry in record.get("sizes", []):
+            previous[entry["notes"]] = entry["phases"]
+    return previous
+
+
+def run_phases(args: argparse.Namespace) -> int:
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    results_path = pathlib.Path(args.results)
+    previous = load_previous(results_path)
+    entries: List[Dict[str, object]] = []
+    with tempfile.TemporaryDirectory(prefix="bear-bench-") as tmp:
+        tmp_dir = pathlib.Path(tmp)
+        for n in sizes:
+            db = tmp_dir / f"bear-{n}.sqlite"
+            t0 = time.perf_counter()
+            counts = generate(
+                db,
+                n,
+                links_per_note=args.links_per_note,
+                attachment_ratio=args.attachment_ratio,
+                note_size=args.note_size,
+            )
+            gen_seconds = time.perf_counter() - t0
+            best: Optional[Dict[str, float]] = None
+            for i in range(args.repeat):
+                timings = time_phases(db, tmp_dir / f"out-{n}-{i}", args.workers, args.unlinked_mentions)
+                if best is None or timings["total"] < best["total"]:
+                    best = timings
+            entry: Dict[str, object] = {"notes": n, "rows": counts, "phases": best, "generate_seconds": round(gen_seconds, 3)}
+            if n in previous:
+                entry["delta_pct"] = {
+                    p: round((best[p] - previous[n][p]) / previous[n][p] * 100, 1)
+                    for p in PHASES + ["total"]
+                    if previous[n].get(p)
+                }
+            entries.append(entry)
+            print(f"[bench] {n} notes: " + ", ".join(f"{p}={best[p]:.3f}s" for p in PHASES + ["total"]), file=sys.stderr)
+
+    record = {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "git": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "sqlite": sqlite3.sqlite_version,
+        "workers": args.workers,
+        "unlinked_mentions": args.unlinked_mentions,
+        "repeat": args.repeat,
+        "sizes": entries,
+    }
+    results_path.parent.mkdir(parents=True, exist_ok=True)
+    with results_path.open("a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    print(json.dumps(record, ensure_ascii=False, indent=2))
+    print(f"Appended results to {results_path}", file=sys.stderr)
+    return 0
+
+
+def run_export(db: pathlib.Path, out_dir: pathlib.Path, workers: int) -> float:
+    cmd = [
+        sys.executable,
+        str(EXPORTER),
+        "--db-path",
+        str(db),
+        "--output-dir",
+        str(out_dir),
+        "--attachments-dir",
+        "/synthetic/files",
+        "--workers",
+        str(workers),
+        "--progress-interval",
+        "-1",
+    ]
+    # Benchmark runs must not leave instrument reports in the repo's artifacts/reports.
+    env = dict(os.environ, ORCHARD_REPORT="0")
+    t0 = time.perf_counter()
+    subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, env=env)
+    return time.perf_counter() - t0
+
+
+def run_workers(args: argparse.Namespace) -> int:
+    worker_counts = [int(w) for w in args.workers.split(",") if w.strip()]
+    with tempfile.TemporaryDirectory(prefix="bear-bench-") as tmp:
+        tmp_dir = pathlib.Path(tmp)
+        db = pathlib.Path(args.db_path) if args.db_path else tmp_dir / "database.sqlite"
+        if not args.db_path:
+            generate(db, args.notes)
+        results = []
+        digests = set()
+        for workers in worker_counts:
+            best = None
+            for i in range(args.repeat):
+                out_dir = tmp_dir / f"out-{workers}-{i}"
+                elapsed = run_export(db, out_dir, workers)
+                digests.add(tree_digest(out_dir))
+                best = elapsed if best is None else min(best, elapsed)
+            results.append({"workers": workers, "best_seconds": round(best, 3)})
+        baseline = results[0]["best_seconds"] if results else None
+        for r in results:
+            r["speedup"] = round(baseline / r["best_seconds"], 2) if baseline else None
+        report = {
+            "notes": args.notes if not args.db_path else None,
+            "db": str(db) if args.db_path else "synthetic",
+            "identical_output": len(digests) == 1,
+            "results": results,
+        }
+    print(json.dumps(report, indent=2))
+    return 0 if report["identical_output"] else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Bear export on synthetic databases.")
+    sub = parser.add_subparsers(dest="mode", required=True)
+
+    p_phases = sub.add_parser("phases", help="Per-phase timings at several library sizes (JSONL history).")
+    p_phases.add_argument("--sizes", default="1000,10000,100000", help="Comma-separated library sizes.")
+    p_phases.add_argument("--repeat", type=int, default=1, help="Runs per size (fastest total is kept).")
+    p_phases.add_argument("--workers", type=int, default=exporter.DEFAULT_WORKERS, help="Export worker threads.")
+    p_phases.add_argument("--links-per-note", type=int, default=2, help="Synthetic [[links]] per note.")
+    p_phases.add_argument("--attachment-ratio", type=float, default=0.1, help="Synthetic share of notes with files.")
+    p_phases.add_argument("--note-size", type=int, default=1500, help="Synthetic average note size (chars).")
+    p_phases.add_argument("--unlinked-mentions", action="store_true", help="Include unlinked-mention scanning.")
+    p_phases.add_argument("--results", default=str(DEFAULT_RESULTS), help="JSONL file the run is appended to.")
+
+    p_workers = sub.add_parser("workers", help="Compare CLI export time across --workers values.")
+    p_workers.add_argument("--notes", type=int, default=10000, help="Synthetic library size.")
+    p_workers.add_argument("--workers", default="1,4,8", help="Comma-separated worker counts to compare.")
+    p_workers.add_argument("--repeat", type=int, default=3, help="Runs per worker count (best is reported).")
+    p_workers.add_argument("--db-path", help="Reuse an existing (synthetic or real) database instead of generating one.")
+
+    args = parser.parse_args()
+    return run_phases(args) if args.mode == "phases" else run_workers(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+日历链路端到端基准（Linux 可跑，不需要 icalBuddy）：用 calendar_synth 生成原始数据，
+按阶段计时 parse → week JSON → archive → weekly payload，结果追加到 JSONL 便于回归对比。
+
+阶段：
+  parse     fetch_calendar.parse_lines 解析每周原始行
+  week_json fetch_calendar.week_payload + write_week 写 week-*.json
+  archive   build_calendar_archive.build_years：周文件只读一次，覆盖到的年份一起 k 路归并写出
+  weekly    build_weekly.normalize_calendar 逐周生成周报日历数据（模板/mock 数据不参与计时）
+
+每个规模都会核对解析出的事件数与生成数一致；与同规模上一条记录比较给出 delta_pct。
+
+用法示例：
+  python scripts/bench_calendar.py --sizes 1,52,520
+  python scripts/bench_calendar.py --sizes 520 --events-per-week 120 --repeat 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import build_calendar_archive as archive
+import build_weekly as weekly
+import calendar_synth
+import fetch_calendar
+
+BASE = Path(__file__).resolve().parent.parent
+DEFAULT_RESULTS = BASE / "artifacts" / "bench" / "calendar_pipeline.jsonl"
+PHASES = ["parse", "week_json", "archive", "weekly"]
+
+
+def git_revision() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "-C", str(BASE), "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip() or None
+
+
+@contextmanager
+def timed(timings: Dict[str, float], name: str) -> Iterator[None]:
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = round(time.perf_counter() - t0, 4)
+
+
+def time_phases(raw_dir: Path, work_dir: Path, max_mb: float) -> Dict[str, float]:
+    """用各脚本自身的函数逐阶段跑一遍；返回各阶段耗时及事件数。"""
+    weeks_dir = work_dir / "calendar"
+    out_dir = work_dir / "archive"
+    fetch_calendar.LOG_FILE = work_dir / "fetch_calendar.log"
+    raw_files = sorted(raw_dir.glob("week-*.txt"))
+    timings: Dict[str, float] = {}
+
+    parsed: List[tuple[date, List[Dict]]] = []
+    with timed(timings, "parse"):
+        for path in raw_files:
+            year, week = path.stem[len("week-") :].split("-W")
+            week_start = date.fromisocalendar(int(year), int(week), 1)
+            lines = path.read_text(encoding="utf-8").splitlines()
+            parsed.append((week_start, fetch_calendar.parse_lines(lines, None)))
+
+    with timed(timings, "week_json"):
+        week_paths = [fetch_calendar.write_week(weeks_dir, fetch_calendar.week_payload(ws, evts, None, None)) for ws, evts in parsed]
+
+    years = sorted({d.year for ws, _ in parsed for d in (ws, ws + timedelta(days=6))})
+    with timed(timings, "archive"):
+        results = archive.build_years(
+            years, weeks_dir, str(out_dir / "all-{year}.json"), out_dir / "dedup-review.md", max_mb, []
+        )
+    archived = sum(total for _, total, _ in results.values())
+
+    with timed(timings, "weekly"):
+        for path in week_paths:
+            weekly.normalize_calendar(weekly.load_json(path))
+
+    timings["total"] = round(sum(timings[p] for p in PHASES), 4)
+    timings["events"] = sum(len(evts) for _, evts in parsed)
+    timings["archived"] = archived
+    return timings
+
+
+def load_previous(results_path: Path) -> Dict[int, Dict[str, float]]:
+    """每个规模（周数）最近一次记录的阶段耗时。"""
+    previous: Dict[int, Dict[str, float]] = {}
+    if not results_path.exists():
+        return previous
+    for line in results_path.read_text(encoding="utf-8").splitlines():
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        for entry in record.get("sizes", []):
+            previous[entry["weeks"]] = entry["phases"]
+    return previous
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="日历链路端到端基准（合成 icalBuddy 数据）")
+    parser.add_argument("--sizes", default="1,52,520", help="逗号分隔的周数规模，默认 1,52,520（1 周 / 1 年 / 10 年）")
+    parser.add_argument("--events-per-week", type=int, default=60, help="每周平均事件数，默认 60")
+    parser.add_argument("--fallback-ratio", type=float, default=0.2, help="回退格式行的比例，默认 0.2")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    parser.add_argument("--repeat", type=int, default=1, help="每个规模运行次数（保留总耗时最短的一次）")
+    parser.add_argument("--max-mb", type=float, default=archive.DEFAULT_MAX_MB, help="archive 分片体积（MB）")
+    parser.add_argument("--results", default=str(DEFAULT_RESULTS), help="结果追加写入的 JSONL 文件")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    results_path = Path(args.results)
+    previous = load_previous(results_path)
+    entries: List[Dict[str, object]] = []
+    mismatched = False
+    with tempfile.TemporaryDirectory(prefix="calendar-bench-") as tmp:
+        tmp_dir = Path(tmp)
+        for n in sizes:
+            data_dir = tmp_dir / f"synth-{n}"
+            t0 = time.perf_counter()
+            stats = calendar_synth.generate(
+                data_dir, n, events_per_week=args.events_per_week, fallback_ratio=args.fallback_ratio, seed=args.seed
+            )
+            gen_seconds = time.perf_counter() - t0
+            best: Optional[Dict[str, float]] = None
+            for i in range(args.repeat):
+                timings = time_phases(data_dir / "raw", tmp_dir / f"run-{n}-{i}", args.max_mb)
+                if best is None or timings["total"] < best["total"]:
+                    best = timings
+            if best["events"] != stats["events"]:
+                mismatched = True
+                print(f"[bench] {n} 周：解析 {best['events']} 条，生成 {stats['events']} 条，不一致", file=sys.stderr)
+            entry: Dict[str, object] = {
+                "weeks": n,
+                "generated": stats,
+                "phases": best,
+                "generate_seconds": round(gen_seconds, 3),
+            }
+            if n in previous:
+                entry["delta_pct"] = {
+                    p: round((best[p] - previous[n][p]) / previous[n][p] * 100, 1)
+                    for p in PHASES + ["total"]
+                    if previous[n].get(p)
+                }
+            entries.append(entry)
+            print(f"[bench] {n} 周 / {best['events']} 条：" + ", ".join(f"{p}={best[p]:.3f}s" for p in PHASES + ["total"]), file=sys.stderr)
+
+    record = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "events_per_week": args.events_per_week,
+        "fallback_ratio": args.fallback_ratio,
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "sizes": entries,
+    }
+    results_path.parent.mkdir(parents=True, exist_ok=True)
+    with results_path.open("a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    print(json.dumps(record, ensure_ascii=False, indent=2))
+    print(f"结果已追加到 {results_path}", file=sys.stderr)
+    return 1 if mismatched else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
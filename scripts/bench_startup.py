@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+orchard 启动耗时基准：对每个子命令运行 `python -X importtime scripts/orchard.py <子命令> --help`，
+统计解释器自身启动之外的导入耗时（-X importtime 顶层条目的累计耗时，减去 `python -c pass` 已导入的模块）
+以及整个进程的墙钟时间，每项取多次运行的最小值。
+
+- 任一子命令的导入耗时超过 --budget-ms 时退出码为 1，可放进 CI / pre-commit；
+- 某个子命令运行失败（如缺可选依赖）时记下错误、在输出里标出，其余子命令照常测量，最后退出码为 1；
+- 结果追加到 artifacts/bench/startup.jsonl，与同一子命令上一条记录比较给出 delta_pct；
+- 加 --top N 打印每个子命令累计耗时最高的 N 个顶层导入，用来找下一个该改成延迟导入的模块。
+
+用法示例：
+  python scripts/bench_startup.py
+  python scripts/bench_startup.py --commands aw,mood --repeat 10 --budget-ms 80 --top 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from bench_calendar import git_revision
+from orchard import COMMANDS
+
+BASE = Path(__file__).resolve().parent.parent
+ORCHARD = Path(__file__).resolve().parent / "orchard.py"
+DEFAULT_RESULTS = BASE / "artifacts" / "bench" / "startup.jsonl"
+DEFAULT_BUDGET_MS = 120.0
+USAGE = "(usage)"
+
+
+def parse_importtime(stderr: str) -> Dict[str, int]:
+    """-X importtime 输出 → {顶层模块: 累计微秒}（缩进的是被它间接导入的模块，已计入累计值）。"""
+    top: Dict[str, int] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line.split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2][1:]
+        if name.startswith(" "):
+            continue
+        top[name] = int(parts[1])
+    return top
+
+
+def run_once(argv: List[str], env: Dict[str, str]) -> Tuple[float, Dict[str, int], Optional[str]]:
+    """(墙钟秒数, 顶层导入耗时, 错误)；进程退出码非 0 时错误为退出码加 stderr 最后一行，否则为 None。"""
+    t0 = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *argv], capture_output=True, text=True, env=env, cwd=str(BASE)
+    )
+    wall = time.perf_counter() - t0
+    if proc.returncode != 0:
+        lines = [line for line in proc.stderr.strip().splitlines() if not line.startswith("import time:")]
+        return wall, {}, f"退出码 {proc.returncode}：{lines[-1] if lines else ''}"
+    return wall, parse_importtime(proc.stderr), None
+
+
+def measure(argv: List[str], baseline: set, repeat: int, env: Dict[str, str]) -> Dict[str, object]:
+    """多次运行取最小值；运行失败时不再重复，返回 {"error": ...}。"""
+    best: Optional[Dict[str, object]] = None
+    for _ in range(repeat):
+        wall, top, error = run_once(argv, env)
+        if error:
+            return {"error": error}
+        own = {name: us for name, us in top.items() if name not in baseline}
+        import_ms = sum(own.values()) / 1000
+        if best is None or import_ms < best["import_ms"]:
+            best = {"import_ms": round(import_ms, 2), "wall_ms": round(wall * 1000, 1), "top": own}
+        else:
+            best["wall_ms"] = min(best["wall_ms"], round(wall * 1000, 1))
+    return best
+
+
+def load_previous(results_path: Path) -> Dict[str, float]:
+    previous: Dict[str, float] = {}
+    if not results_path.exists():
+        return previous
+    for line in results_path.read_text(encoding="utf-8").splitlines():
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        for entry in record.get("commands", []):
+            if entry.get("import_ms") is not None:
+                previous[entry["command"]] = entry["import_ms"]
+    return previous
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="orchard 子命令启动耗时基准（-X importtime）")
+    parser.add_argument("--commands", help="逗号分隔的子命令，默认全部（外加不带子命令的 orchard --help）")
+    parser.add_argument("--repeat", type=int, default=5, help="每个子命令运行次数，取最小值，默认 5")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help=f"单个子命令导入耗时上限（毫秒），默认 {DEFAULT_BUDGET_MS:g}")
+    parser.add_argument("--top", type=int, default=0, help="打印每个子命令最慢的 N 个顶层导入")
+    parser.add_argument("--results", default=str(DEFAULT_RESULTS), help="结果追加写入的 JSONL 文件")
+    args = parser.parse_args()
+
+    names = [c.strip() for c in args.commands.split(",")] if args.commands else [USAGE, *COMMANDS]
+    unknown = [n for n in names if n != USAGE and n not in COMMANDS]
+    if unknown:
+        print(f"未知子命令：{', '.join(unknown)}", file=sys.stderr)
+        return 2
+    # 子命令 --help 会走 run_main，关掉报告免得基准本身写文件
+    env = dict(os.environ, ORCHARD_REPORT="0")
+    baseline_wall = min(run_once(["-c", "pass"], env)[0] for _ in range(args.repeat))
+    baseline = set(run_once(["-c", "pass"], env)[1])
+
+    results_path = Path(args.results)
+    previous = load_previous(results_path)
+    entries: List[Dict[str, object]] = []
+    over: List[str] = []
+    failed: List[str] = []
+    for name in names:
+        argv = [str(ORCHARD), "--help"] if name == USAGE else [str(ORCHARD), name, "--help"]
+        best = measure(argv, baseline, args.repeat, env)
+        if "error" in best:
+            failed.append(name)
+            entries.append({"command": name, "import_ms": None, "wall_ms": None, "error": best["error"]})
+            print(f"[startup] {name:<15} 失败：{best['error']}", file=sys.stderr)
+            continue
+        top = sorted(best.pop("top").items(), key=lambda kv: -kv[1])
+        entry: Dict[str, object] = {"command": name, **best, "top_imports": [{"module": m, "ms": round(us / 1000, 2)} for m, us in top[:10]]}
+        if previous.get(name):
+            entry["delta_pct"] = round((best["import_ms"] - previous[name]) / previous[name] * 100, 1)
+        if best["import_ms"] > args.budget_ms:
+            over.append(name)
+        entries.append(entry)
+        flag = "  超出预算" if name in over else ""
+        print(f"[startup] {name:<15} 导入 {best['import_ms']:7.1f}ms  进程 {best['wall_ms']:7.1f}ms{flag}", file=sys.stderr)
+        for item in entry["top_imports"][: args.top]:
+            print(f"             {item['module']:<28} {item['ms']:7.2f}ms", file=sys.stderr)
+
+    record = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "budget_ms": args.budget_ms,
+        "interpreter_wall_ms": round(baseline_wall * 1000, 1),
+        "commands": entries,
+    }
+    results_path.parent.mkdir(parents=True, exist_ok=True)
+    with results_path.open("a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    print(f"结果已追加到 {results_path}（解释器空启动 {record['interpreter_wall_ms']}ms）", file=sys.stderr)
+    if failed:
+        print(f"[startup] 运行失败：{', '.join(failed)}", file=sys.stderr)
+    if over:
+        print(f"[startup] 超出 {args.budget_ms:g}ms 预算：{', '.join(over)}", file=sys.stderr)
+    return 1 if over or failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
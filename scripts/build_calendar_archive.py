@@ -2,19 +2,33 @@
 # -*- coding: utf-8 -*-
 """
 聚合全年日历周文件，生成全年扁平事件列表（支持按体积分片）：
-- 输入：data/calendar/week-*.json（默认）或指定目录
+- 输入：data/calendar/week-*.json 及 sources/<来源>/week-*.json（默认）或指定目录；同一周的多个来源按 calendar_sources 合并
 - 输出：artifacts/calendar/all-<year>.json 或分片 all-<year>-<idx>.json（事件扁平数组）
-- 去重：按 title+start+end，发现重复会记录到 dedup-review.md 供人工确认
+- 去重：带 uid 的事件（import_ics.py 导入）按 uid+recurrence_id，其余按 title+start+end，发现重复会记录到 dedup-review.md 供人工确认
+- 多年回填：--years 2016-2026 每个周文件只读一次，事件按年份分流（各年独立去重），
+  各周内排好序的事件流用堆做 k 路归并，边归并边写出，不再整年 sort，也不在内存里拼整年 JSON 文本；
+  等待归并的事件以已编码的 JSON 片段保存（比 dict 小数倍），每条只序列化一次；
+  周文件按时间顺序扫描，扫过下一年第 2 周即写出该年并释放，峰值内存约为一年的事件
+
+用法示例：
+  python scripts/build_calendar_archive.py --year 2026
+  python scripts/build_calendar_archive.py --years 2016-2026
 """
 
 from __future__ import annotations
 
 import argparse
+import heapq
 import json
 import re
-from datetime import datetime, date
+from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Tuple, Any
+from operator import itemgetter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+
+from calendar_event import Event
+from calendar_sources import merge_sources, week_files
+from instrument import count, run_main, span
 
 BASE = Path(__file__).resolve().parent.parent
 DEFAULT_WEEKS_DIR = BASE / "data" / "calendar"
@@ -25,8 +39,9 @@ DEFAULT_MAX_MB = 5.0
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="聚合全年日历周文件为按月分组的总表")
     parser.add_argument("--year", type=int, help="目标年份，默认取当前年", default=datetime.now().year)
+    parser.add_argument("--years", help="一次生成多个年份，如 2016-2026 或 2019,2021-2023（覆盖 --year）")
     parser.add_argument("--weeks-dir", type=Path, default=DEFAULT_WEEKS_DIR, help="周文件目录，默认 data/calendar")
-    parser.add_argument("--output", type=Path, help="输出文件路径，默认 artifacts/calendar/all-<year>.json")
+    parser.add_argument("--output", type=Path, help="输出文件路径，默认 artifacts/calendar/all-<year>.json；配合 --years 时须含 {year} 占位")
     parser.add_argument("--dedup-report", type=Path, help="重复事件报告，默认 artifacts/calendar/dedup-review.md")
     parser.add_argument("--max-mb", type=float, default=DEFAULT_MAX_MB, help="单文件最大体积（MB），超过后按 1-9 分片，默认 5MB")
     parser.add_argument(
@@ -37,47 +52,35 @@ def parse_args() -> argparse.Namespace:
 
 
 def load_week(path: Path) -> Tuple[str, List[Dict[str, Any]]]:
-    data = json.loads(path.read_text(encoding="utf-8"))
+    with span("read"):
+        raw = path.read_bytes()
+    count("bytes_read", len(raw))
+    with span("json_parse"):
+        data = json.loads(raw)
     week_label = str(data.get("week") or path.stem)
     events = data.get("events") or []
     return week_label, events
 
 
-def parse_start(event: Dict[str, Any]) -> datetime | None:
-    start_raw = event.get("start")
-    if not start_raw:
-        return None
-    try:
-        return datetime.fromisoformat(str(start_raw))
-    except Exception:
-        return None
-
-
-def parse_end(event: Dict[str, Any]) -> datetime | None:
-    end_raw = event.get("end")
-    if not end_raw:
-        return None
-    try:
-        return datetime.fromisoformat(str(end_raw))
-    except Exception:
-        return None
-
-
-def dedup_key(event: Dict[str, Any]) -> Tuple[str, str, str]:
+def dedup_key(event: Event) -> Tuple[Any, Any, Any]:
     """
     去重键包含标题+开始/结束完整时间（含时区），避免只按日期聚合导致误判。
+    ICS 导入的事件带 uid：改用 uid + recurrence_id，标题或时间被改过的同一事件也能识别。
+    时间用预解析的 (epoch, 时区)，与按 isoformat 文本比较等价；无法解析时退回原文本。
     """
-    start_dt = parse_start(event)
-    end_dt = parse_end(event)
+    extra = event.extra or {}
+    uid = extra.get("uid")
+    if uid:
+        return ("uid:" + str(uid), str(extra.get("recurrence_id") or ""), "")
     return (
-        str(event.get("title") or ""),
-        start_dt.isoformat() if start_dt else str(event.get("start") or ""),
-        end_dt.isoformat() if end_dt else str(event.get("end") or ""),
+        str(event.title or ""),
+        (event.start_ts, event.start_tz) if event.start_ts is not None else str(event.start or ""),
+        (event.end_ts, event.end_tz) if event.end_ts is not None else str(event.end or ""),
     )
 
 
-def should_exclude(evt: Dict[str, Any], exclude_cals: list[str]) -> bool:
-    cal = str(evt.get("calendar") or "")
+def should_exclude(evt: Event, exclude_cals: list[str]) -> bool:
+    cal = str(evt.calendar or "")
     return any(token and token in cal for token in exclude_cals)
 
 
@@ -107,92 +110,229 @@ def weeks_are_adjacent(w1: str, w2: str) -> bool:
     return False
 
 
-def build_archive(year: int, weeks_dir: Path, exclude_cals: list[str]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
-    events: List[Dict[str, Any]] = []
-    seen: Dict[Tuple[str, str, str], Tuple[str, str, date]] = {}
-    duplicates: List[Dict[str, Any]] = []
+def parse_years(spec: str) -> List[int]:
+    """'2016-2026' / '2019,2021-2023' → 升序去重的年份列表。"""
+    years: set[int] = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        lo, _, hi = part.partition("-")
+        first, last = int(lo), int(hi or lo)
+        if first > last:
+            raise ValueError(f"年份区间颠倒：{part}")
+        years.update(range(first, last + 1))
+    return sorted(years)
 
-    week_files = sorted(weeks_dir.glob("week-*.json"))
-    week_pattern = re.compile(r"week-(\d{4})-W\d{2}\.json")
 
-    for wf in week_files:
-        match = week_pattern.match(wf.name)
-        if not match:
-            continue
-        week_year = int(match.group(1))
-        if week_year not in {year, year - 1, year + 1}:
-            # 允许跨年周，后续按事件日期筛选
-            pass
-
-        week_label, week_events = load_week(wf)
-        for evt in week_events:
-            start_dt = parse_start(evt)
-            if not start_dt or start_dt.year != year:
+def start_key(event: Event) -> str:
+    return event.start or ""
+
+
+Encoded = Tuple[str, bytes, int]
+
+
+def encode_record(event: Event) -> Encoded:
+    """
+    (排序键, 输出数组里的元素文本, 分片计量长度)。元素文本即 indent=2 列表中该元素的写法：
+    元素自身 indent=2 的文本整体再缩进两格（JSON 字符串里的换行已转义，不会误伤）。
+    计量长度是紧凑 json.dumps 长度 + 2（逐条累加即整片紧凑序列化的长度），用于按体积分片。
+    """
+    record = event.to_dict()
+    text = json.dumps(record, ensure_ascii=False, indent=2).replace("\n", "\n  ")
+    return start_key(event), text.encode("utf-8"), len(json.dumps(record, ensure_ascii=False)) + 2
+
+
+def scan_years(
+    years: Iterable[int],
+    weeks_dir: Path,
+    exclude_cals: list[str],
+    duplicates: Dict[int, List[Dict[str, Any]]],
+    encode: Callable[[Event], Tuple[Any, ...]] | None = None,
+    stream: bool = True,
+) -> Iterator[Tuple[int, List[List[Tuple[Any, ...]]]]]:
+    """
+    每个周文件只读一次，事件按开始时间所在年份分流；去重状态按年份各自独立，与逐年单独运行的结果一致。
+    周文件按周标签升序扫描：扫过 (Y+1)-W02 后 Y 年不会再有新事件（跨年周只到下一年第 1 周，再留一周余量），
+    立即产出 (Y, [每个周文件保留的事件（已按开始时间排序）...]) 并不再持有，其余年份在扫描结束时产出，
+    同时在内存里的事件流只有约一年。重复事件追加到 duplicates[年份]。
+    已产出年份的去重键再保留到下一年产出，其间出现的该年重复事件照常记入报告；
+    此后才出现、无法再写入的该年事件计入 events.late 并提示。stream=False 时扫完全部周文件才产出，不会有这种情况。
+    事件以 encode(record) 的结果保存，首元素须为开始时间排序键，默认 (开始时间, record)。
+    """
+    encode = encode or (lambda record: (start_key(record), record))
+    pending = sorted(set(years))
+    prefixes = {f"{y:04d}" for y in pending}
+    runs: Dict[int, List[List[Tuple[Any, ...]]]] = {y: [] for y in pending}
+    seen: Dict[int, Dict[Tuple[Any, Any, Any], Tuple[str, str, str]]] = {y: {} for y in pending}
+    late = 0
+
+    for label, paths in week_files(weeks_dir).items():
+        while stream and pending and label > f"{pending[0] + 1:04d}-W02":
+            year = pending.pop(0)
+            for old in [y for y in seen if y < year]:
+                del seen[old]
+            yield year, runs.pop(year)
+        # 跨年周的事件可能落在相邻年份，因此不按文件名年份过滤，逐条按事件日期分流；
+        # 同一周有多个来源（icalbuddy / ics / caldav）时先合并，跨来源的同一事件只保留一份
+        groups = []
+        labels: Dict[Path, Tuple[str, str]] = {}
+        for wf in paths:
+            week_label, week_events = load_week(wf)
+            labels[wf] = (week_label, str(wf))
+            count("week_files")
+            count("events.read", len(week_events))
+            groups.append((wf, week_events))
+        kept: Dict[int, List[Tuple[Any, ...]]] = {}
+        for wf, item in merge_sources(groups):
+            # ISO 时间总以四位年份开头：先按文本前缀筛掉其他年份，只为目标年份的事件建 Event、解析时间
+            if str(item.get("start") or "")[:4] not in prefixes:
                 continue
+            evt = Event.from_dict(item)
+            if evt.start_ts is None:
+                continue
+            start_date = evt.wall()[0]
+            year = int(start_date[:4])
             if exclude_cals and should_exclude(evt, exclude_cals):
                 continue
+            year_seen = seen.get(year)
+            if year_seen is None:
+                late += 1
+                continue
+            week_label, wf_str = labels[wf]
             key = dedup_key(evt)
-            if key in seen:
-                first_file, first_week, first_date = seen[key]
-                same_day = first_date == start_dt.date()
+            if key in year_seen:
+                first_file, first_week, first_date = year_seen[key]
+                same_day = first_date == start_date
                 if same_day and weeks_are_adjacent(first_week, week_label):
                     # 周界重叠导致的重复，不记录在报告中
                     continue
-                duplicates.append(
+                duplicates[year].append(
                     {
-                        "title": evt.get("title"),
-                        "start": evt.get("start"),
-                        "end": evt.get("end"),
-                        "current_file": str(wf),
+                        "title": evt.title,
+                        "start": evt.start,
+                        "end": evt.end,
+                        "current_file": wf_str,
                         "first_seen_file": first_file,
                     }
                 )
                 continue
+            if year not in runs:
+                late += 1
+                continue
+
+            year_seen[key] = (wf_str, week_label, start_date)
+            evt.set_extra("source_week", week_label)
+            evt.set_extra("source_file", wf_str)
+            kept.setdefault(year, []).append(encode(evt))
+        # 周文件本身基本按时间有序，timsort 对近乎有序的小段接近线性
+        for year, records in kept.items():
+            records.sort(key=itemgetter(0))
+            runs[year].append(records)
+    if late:
+        count("events.late", late)
+        print(f"警告：{late} 条事件出现在其年份已写出之后的周文件里，未写入归档；可对该年单独运行 --year")
+    for year in pending:
+        yield year, runs.pop(year)
+
+
+def collect_runs(
+    years: Iterable[int], weeks_dir: Path, exclude_cals: list[str], encode: Callable[[Event], Tuple[Any, ...]] | None = None
+) -> Tuple[Dict[int, List[List[Tuple[Any, ...]]]], Dict[int, List[Dict[str, Any]]]]:
+    """scan_years 的一次性版本（扫完全部周文件）：返回 {年份: 各周的有序事件流} 与 {年份: 重复事件}。"""
+    duplicates: Dict[int, List[Dict[str, Any]]] = {y: [] for y in years}
+    runs = dict(scan_years(years, weeks_dir, exclude_cals, duplicates, encode, stream=False))
+    return runs, duplicates
+
+
+def merge_runs(runs: List[List[Tuple[Any, ...]]]) -> Iterator[Tuple[Any, ...]]:
+    """
+    k 路归并各周的有序事件流（按首元素）。heapq.merge 是稳定的（开始时间相同按周文件顺序），结果与整体 stable sort 相同；
+    每条记录产出时即从所在流中弹出，写出后不再被引用，峰值内存随归并进度下降。
+    """
+
+    def drain(run: List[Tuple[Any, ...]]) -> Iterator[Tuple[Any, ...]]:
+        run.reverse()
+        while run:
+            yield run.pop()
+
+    return heapq.merge(*(drain(run) for run in runs), key=itemgetter(0))
 
-            seen[key] = (str(wf), week_label, start_dt.date())
-            record = dict(evt)
-            record["source_week"] = week_label
-            record["source_file"] = str(wf)
-            events.append(record)
 
+def build_archive(year: int, weeks_dir: Path, exclude_cals: list[str]) -> Tuple[List[Event], List[Dict[str, Any]]]:
+    runs, duplicates = collect_runs([year], weeks_dir, exclude_cals)
     # 按开始时间排序，便于切片和查询
-    events.sort(key=lambda e: e.get("start") or "")
-    return events, duplicates
-
-
-def split_events(events: List[Dict[str, Any]], max_mb: float) -> List[List[Dict[str, Any]]]:
-    """按文件体积粗略分片，最多 9 片。"""
-    if not events:
-        return [events]
-    chunks: List[List[Dict[str, Any]]] = []
-    current: List[Dict[str, Any]] = []
-    for evt in events:
-        current.append(evt)
-        size_mb = len(json.dumps(current, ensure_ascii=False)) / (1024 * 1024)
-        if size_mb >= max_mb and len(chunks) < 8:
-            chunks.append(current)
-            current = []
-    if current:
-        chunks.append(current)
-    return chunks
-
-
-def write_outputs(year: int, events: List[Dict[str, Any]], duplicates: List[Dict[str, Any]], output: Path, dedup_report: Path, max_mb: float, exclude_cals: list[str]) -> None:
-    output.parent.mkdir(parents=True, exist_ok=True)
-    chunks = split_events(events, max_mb)
-    if len(chunks) == 1:
-        output.write_text(json.dumps(chunks[0], ensure_ascii=False, indent=2), encoding="utf-8")
-        out_paths = [output]
-    else:
-        out_paths = []
-        for idx, chunk in enumerate(chunks, start=1):
-            out_path = output.with_name(f"{output.stem}-{idx}{output.suffix}")
-            out_path.write_text(json.dumps(chunk, ensure_ascii=False, indent=2), encoding="utf-8")
-            out_paths.append(out_path)
+    with span("merge"):
+        events = [record for _, record in merge_runs(runs[year])]
+    count("events.kept", len(events))
+    count("events.duplicates", len(duplicates[year]))
+    return events, duplicates[year]
 
-    dedup_report.parent.mkdir(parents=True, exist_ok=True)
+
+def write_stream(output: Path, encoded: Iterable[Encoded], max_mb: float) -> Tuple[List[Path], int]:
+    """
+    边迭代边写（encode_record 的结果）：单文件超过 max_mb 后切到下一片，最多 9 片，文件内容与
+    json.dumps(分片, indent=2) 逐字节一致，但不在内存里拼整片文本。分片数要写完才知道，
+    先写临时文件，结束后再改成最终文件名。返回 (输出文件列表, 事件数)。
+    """
+    output.parent.mkdir(parents=True, exist_ok=True)
+    parts: List[Path] = []
+    fh = None
+    size = 0
+    total = 0
+    written = 0
+    try:
+        with span("write"):
+            for _, element, weight in encoded:
+                if fh is None:
+                    part = output.with_name(f".{output.stem}-{len(parts) + 1}{output.suffix}.tmp")
+                    parts.append(part)
+                    fh = part.open("wb")
+                    fh.write(b"[\n  ")
+                    written += 4
+                    size = 0
+                else:
+                    fh.write(b",\n  ")
+                    written += 4
+                fh.write(element)
+                written += len(element)
+                size += weight
+                total += 1
+                if size / (1024 * 1024) >= max_mb and len(parts) <= 8:
+                    fh.write(b"\n]")
+                    written += 2
+                    fh.close()
+                    fh = None
+            if fh is not None:
+                fh.write(b"\n]")
+                written += 2
+                fh.close()
+                fh = None
+            if not parts:
+                output.write_text("[]", encoding="utf-8")
+                written += 2
+                out_paths = [output]
+            elif len(parts) == 1:
+                parts[0].replace(output)
+                out_paths = [output]
+            else:
+                out_paths = []
+                for idx, part in enumerate(parts, start=1):
+                    out_path = output.with_name(f"{output.stem}-{idx}{output.suffix}")
+                    part.replace(out_path)
+                    out_paths.append(out_path)
+    except BaseException:
+        if fh is not None:
+            fh.close()
+        for part in parts:
+            part.unlink(missing_ok=True)
+        raise
+    count("bytes_written", written)
+    return out_paths, total
+
+
+def dedup_report_lines(year: int, out_paths: List[Path], duplicates: List[Dict[str, Any]], exclude_cals: list[str]) -> List[str]:
     lines = [
-        "# Calendar Dedup Review",
         f"- year: {year}",
         f"- generated: {datetime.now().isoformat(timespec='seconds')}",
         f"- outputs: {', '.join(str(p) for p in out_paths)}",
@@ -200,7 +340,7 @@ def write_outputs(year: int, events: List[Dict[str, Any]], duplicates: List[Dict
         "",
     ]
     if duplicates:
-        lines.append("## Duplicates detected (title+start+end)")
+        lines.append("## Duplicates detected (uid+recurrence_id or title+start+end)")
         for dup in duplicates:
             lines.append(
                 f"- {dup.get('title')} | {dup.get('start')} → {dup.get('end')} | first: {dup.get('first_seen_file')} | dup: {dup.get('current_file')}"
@@ -208,22 +348,68 @@ def write_outputs(year: int, events: List[Dict[str, Any]], duplicates: List[Dict
         lines.append("")
         lines.append("请人工确认是否为同一事件，必要时调整源周文件或保留重复。")
     else:
-        lines.append("## No duplicates detected (key: title+start+end)")
+        lines.append("## No duplicates detected (key: uid+recurrence_id or title+start+end)")
         lines.append("无需人工处理。")
+    return lines
+
+
+def write_outputs(year: int, events: List[Event], duplicates: List[Dict[str, Any]], output: Path, dedup_report: Path, max_mb: float, exclude_cals: list[str]) -> None:
+    out_paths, _ = write_stream(output, map(encode_record, events), max_mb)
+    dedup_report.parent.mkdir(parents=True, exist_ok=True)
+    lines = ["# Calendar Dedup Review", *dedup_report_lines(year, out_paths, duplicates, exclude_cals)]
     dedup_report.write_text("\n".join(lines), encoding="utf-8")
 
 
+def build_years(years: List[int], weeks_dir: Path, output_tpl: str, dedup_report: Path, max_mb: float, exclude_cals: list[str]) -> Dict[int, Tuple[List[Path], int, int]]:
+    """多年一次生成：读一遍周文件，某年的周文件一扫完就归并写出并释放该年的事件流。返回 {年份: (输出文件, 事件数, 重复数)}。"""
+    duplicates: Dict[int, List[Dict[str, Any]]] = {y: [] for y in years}
+    written: Dict[int, Tuple[List[Path], int]] = {}
+    for year, runs in scan_years(years, weeks_dir, exclude_cals, duplicates, encode=encode_record):
+        with span("merge_write"):
+            written[year] = write_stream(Path(output_tpl.format(year=year)), merge_runs(runs), max_mb)
+        count("events.kept", written[year][1])
+    # 重复事件可能在该年写出之后才出现（见 scan_years），报告等全部扫完再写
+    results: Dict[int, Tuple[List[Path], int, int]] = {}
+    report = ["# Calendar Dedup Review"]
+    for year in years:
+        out_paths, total = written[year]
+        count("events.duplicates", len(duplicates[year]))
+        results[year] = (out_paths, total, len(duplicates[year]))
+        report += ["", *dedup_report_lines(year, out_paths, duplicates[year], exclude_cals)]
+    dedup_report.parent.mkdir(parents=True, exist_ok=True)
+    dedup_report.write_text("\n".join(report), encoding="utf-8")
+    return results
+
+
 def main() -> int:
     args = parse_args()
-    output = args.output or DEFAULT_OUT_DIR / f"all-{args.year}.json"
     dedup_report = args.dedup_report or DEFAULT_OUT_DIR / "dedup-review.md"
     exclude_cals = [c.strip() for c in (args.exclude_calendars or "").split(",") if c.strip()]
-    events, duplicates = build_archive(args.year, args.weeks_dir, exclude_cals)
-    write_outputs(args.year, events, duplicates, output, dedup_report, args.max_mb, exclude_cals)
+    if args.years:
+        try:
+            years = parse_years(args.years)
+        except ValueError as exc:
+            print(f"无法解析 --years：{exc}")
+            return 2
+        output_tpl = str(args.output) if args.output else str(DEFAULT_OUT_DIR / "all-{year}.json")
+        if "{year}" not in output_tpl:
+            print("--years 模式下 --output 须包含 {year} 占位，例如 out/all-{year}.json")
+            return 2
+        results = build_years(years, args.weeks_dir, output_tpl, dedup_report, args.max_mb, exclude_cals)
+        for year, (out_paths, total, dups) in results.items():
+            shard = "" if len(out_paths) == 1 else f"，分片：{len(out_paths)}"
+            print(f"{year}：{out_paths[0] if len(out_paths) == 1 else out_paths[0].parent}（事件数：{total}{shard}，重复：{dups}）")
+        print(f"重复事件记录：{dedup_report}")
+        return 0
+    output = args.output or DEFAULT_OUT_DIR / f"all-{args.year}.json"
+    with span("build_archive"):
+        events, duplicates = build_archive(args.year, args.weeks_dir, exclude_cals)
+    with span("write_outputs"):
+        write_outputs(args.year, events, duplicates, output, dedup_report, args.max_mb, exclude_cals)
     print(f"写入完成：{output}（事件数：{len(events)}，分片：{1 if output.exists() else '多文件'})")
     print(f"重复事件记录：{dedup_report}（{'有' if duplicates else '无'}重复）")
     return 0
 
 
 if __name__ == "__main__":
-    raise SystemExit(main())
+    raise SystemExit(run_main("build_calendar_archive", main))
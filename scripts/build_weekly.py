@@ -2,65 +2,82 @@
 # -*- coding: utf-8 -*-
 """
 生成 weekly HTML：
-- 读取本地日历 JSON（data/calendar/week-*.json），若不存在则用 mock。
-- 读取 mock 的 ActivityWatch/Mood/Incidents。
+- 读取本地日历 JSON（data/calendar/week-*.json 及 sources/<来源>/ 下的同一周，按 calendar_sources 合并），若不存在则用 mock。
+- 情绪：若存在 data/mood/log.jsonl，经 mood_index 侧车索引读取对应周的真实记录，否则用 mock。
+- 任务：若 fetch_reminders 已生成 data/reminders/week-<ISO周>.json，合并该周的提醒事项与完成统计（没有则为 null）。
+- 情绪 × 日程：若 mood_correlation 已生成 artifacts/mood/correlation.json，原样并入 payload.mood_correlation（没有则为 null）。
+- 读取 mock 的 ActivityWatch/Incidents。
 - 将数据注入 html/v1/weekly_mock.html，输出 html/output/weekly.html。
 """
 
 from __future__ import annotations
 
 import argparse
-import glob
 import json
-from datetime import datetime
+from datetime import date
 from pathlib import Path
 from typing import Any, Dict, List
 
+from calendar_event import CORE, from_dicts
+from calendar_sources import merge_sources, week_files
+from instrument import count, run_main, span
+from mood_index import iso_week_label, open_index
+
 BASE = Path(__file__).resolve().parent.parent
 CAL_DIR = BASE / "data" / "calendar"
 MOCK_DIR = BASE / "specs" / "time-energy-visualization" / "mock-data"
 TEMPLATE = BASE / "html" / "v1" / "weekly_mock.html"
 OUT_HTML = BASE / "html" / "output" / "weekly.html"
+MOOD_LOG = BASE / "data" / "mood" / "log.jsonl"
+REMINDERS_DIR = BASE / "data" / "reminders"
+MOOD_CORRELATION = BASE / "artifacts" / "mood" / "correlation.json"
 
 
 def load_json(path: Path) -> Any:
-    return json.loads(path.read_text(encoding="utf-8"))
+    with span("load_json"):
+        raw = path.read_bytes()
+        count("bytes_read", len(raw))
+        return json.loads(raw)
 
 
-def find_calendar(path_arg: str | None) -> Path | None:
+def find_calendar(path_arg: str | None) -> List[Path]:
+    """--calendar 指定的文件；否则取最近更新的那一周，连同该周其他来源的周文件一起返回（icalbuddy 在前）。"""
     if path_arg:
         p = Path(path_arg)
-        return p if p.exists() else None
-    candidates = sorted(glob.glob(str(CAL_DIR / "week-*.json")), key=lambda p: Path(p).stat().st_mtime, reverse=True)
-    return Path(candidates[0]) if candidates else None
+        return [p] if p.exists() else []
+    by_week = week_files(CAL_DIR)
+    if not by_week:
+        return []
+    latest = max(by_week.items(), key=lambda item: max(p.stat().st_mtime for p in item[1]))
+    return latest[1]
 
 
 def normalize_calendar(cal_data: Dict[str, Any]) -> Dict[str, Any]:
-    events = cal_data.get("events") or []
+    events = from_dicts(cal_data.get("events") or [])
     norm: List[Dict[str, Any]] = []
     category_totals: Dict[str, int] = {}
     notes_count = 0
     for evt in events:
-        try:
-            start_dt = datetime.fromisoformat(evt["start"])
-            end_dt = datetime.fromisoformat(evt["end"])
-        except Exception:
+        if not evt.parsed:
             continue
-        duration_minutes = max(0, int((end_dt - start_dt).total_seconds() // 60))
-        calendar_name = evt.get("calendar") or "未分类"
-        if evt.get("notes"):
+        duration_minutes = evt.minutes
+        calendar_name = evt.calendar or "未分类"
+        if evt.notes:
             notes_count += 1
         category_totals[calendar_name] = category_totals.get(calendar_name, 0) + duration_minutes
+        day, start = evt.wall("start")
+        # notes 为 null 时原样保留，只有源数据缺这个键时才补 ""（layout 为空表示核心键齐全）
+        notes = evt.notes if evt.notes is not None or "notes" in (evt.layout or CORE) else ""
         norm.append(
             {
-                "date": start_dt.date().isoformat(),
-                "start": start_dt.strftime("%H:%M"),
-                "end": end_dt.strftime("%H:%M"),
-                "title": evt.get("title", ""),
+                "date": day,
+                "start": start,
+                "end": evt.wall("end")[1],
+                "title": evt.title or "",
                 "category": calendar_name,
                 "calendar": calendar_name,
                 "duration_minutes": duration_minutes,
-                "notes": evt.get("notes", ""),
+                "notes": notes,
             }
         )
     # 按日期倒序、时间升序排序
@@ -74,17 +91,58 @@ def normalize_calendar(cal_data: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
-def build_payload(calendar_path: Path | None) -> Dict[str, Any]:
-    # 活动/情绪/突发任务使用 mock
+def load_mood(mood_log: Path, week_label: str) -> Dict[str, Any] | None:
+    """按周读取真实情绪记录；索引只增量扫描新追加的行，日志为空时返回 None。"""
+    if not mood_log.exists():
+        return None
+    payload = open_index(mood_log).week_payload(week_label)
+    return payload if payload["count"] else None
+
+
+def load_reminders(reminders_dir: Path, week_label: str) -> Dict[str, Any] | None:
+    """读取 fetch_reminders 输出的周任务文件（该周到期或完成的提醒 + 完成统计）。"""
+    path = reminders_dir / f"week-{week_label}.json"
+    if not path.exists():
+        return None
+    data = load_json(path)
+    return {"stats": data.get("stats") or {}, "tasks": data.get("tasks") or []}
+
+
+def load_mood_correlation(path: Path) -> Dict[str, Any] | None:
+    """读取 mood_correlation 输出的相关性结果（整体/滚动相关、按类别的精力差值）。"""
+    return load_json(path) if path.exists() else None
+
+
+def build_payload(
+    calendar_paths: List[Path],
+    mood_log: Path = MOOD_LOG,
+    reminders_dir: Path = REMINDERS_DIR,
+    mood_correlation: Path = MOOD_CORRELATION,
+) -> Dict[str, Any]:
+    # 活动/突发任务使用 mock；情绪优先读取真实日志
     aw = load_json(MOCK_DIR / "activitywatch.aggregate.json")
-    mood = load_json(MOCK_DIR / "mood.week.json")
     incidents = load_json(MOCK_DIR / "incidents.week.json")
 
-    if calendar_path and calendar_path.exists():
-        cal_raw = load_json(calendar_path)
+    if calendar_paths:
+        raws = [load_json(p) for p in calendar_paths]
+        cal_raw = dict(raws[0])
+        if len(raws) > 1:
+            merged = merge_sources((p, raw.get("events") or []) for p, raw in zip(calendar_paths, raws))
+            cal_raw["events"] = [evt for _, evt in merged]
     else:
         cal_raw = load_json(MOCK_DIR / "calendar.mock.json")
-    cal_norm = normalize_calendar(cal_raw)
+    with span("normalize_calendar"):
+        cal_norm = normalize_calendar(cal_raw)
+    count("events", len(cal_norm["week"]))
+
+    week_label = str(cal_raw.get("week") or iso_week_label(date.today()))
+    with span("load_mood"):
+        mood_real = load_mood(mood_log, week_label)
+    mood = mood_real or load_json(MOCK_DIR / "mood.week.json")
+    with span("load_reminders"):
+        reminders = load_reminders(reminders_dir, week_label)
+    count("tasks", len(reminders["tasks"]) if reminders else 0)
+    correlation = load_mood_correlation(mood_correlation)
 
     # 用日历类别时长覆盖左侧类别卡片（上一周期为空，使用占位）
     aw_from_cal = []
@@ -113,34 +171,45 @@ def build_payload(calendar_path: Path | None) -> Dict[str, Any]:
         "mood": mood,
         "incidents": incidents,
         "calendar": cal_norm,
+        "reminders": reminders,
+        "mood_correlation": correlation,
         "meta": {
-            "calendar_source": str(calendar_path) if calendar_path else "mock",
+            "calendar_source": ", ".join(str(p) for p in calendar_paths) if calendar_paths else "mock",
+            "mood_source": str(mood_log) if mood_real else "mock",
+            "reminders_source": str(reminders_dir / f"week-{week_label}.json") if reminders else None,
+            "mood_correlation_source": str(mood_correlation) if correlation else None,
             "notes_count": cal_norm.get("notes_count", 0),
         },
     }
 
 
 def inject_html(payload: Dict[str, Any]) -> None:
-    raw_html = TEMPLATE.read_text(encoding="utf-8")
-    html = raw_html.replace("__MOCK_DATA__", json.dumps(payload, ensure_ascii=False, indent=2))
-    OUT_HTML.parent.mkdir(parents=True, exist_ok=True)
-    OUT_HTML.write_text(html, encoding="utf-8")
+    with span("render"):
+        raw_html = TEMPLATE.read_text(encoding="utf-8")
+        html = raw_html.replace("__MOCK_DATA__", json.dumps(payload, ensure_ascii=False, indent=2))
+    with span("write"):
+        OUT_HTML.parent.mkdir(parents=True, exist_ok=True)
+        OUT_HTML.write_text(html, encoding="utf-8")
+    count("bytes_written", len(html.encode("utf-8")))
 
 
 def parse_args() -> argparse.Namespace:
     p = argparse.ArgumentParser(description="生成 weekly 仪表盘 HTML")
-    p.add_argument("--calendar", help="指定日历 JSON 路径，默认选择 data/calendar 中最新的 week-*.json")
+    p.add_argument("--calendar", help="指定日历 JSON 路径，默认选择最近更新的一周（合并各来源）")
+    p.add_argument("--mood-log", type=Path, default=MOOD_LOG, help="情绪日志 JSONL，默认 data/mood/log.jsonl")
+    p.add_argument("--reminders-dir", type=Path, default=REMINDERS_DIR, help="提醒事项周文件目录，默认 data/reminders")
+    p.add_argument("--mood-correlation", type=Path, default=MOOD_CORRELATION, help="情绪 × 日程相关性 JSON，默认 artifacts/mood/correlation.json")
     return p.parse_args()
 
 
 def main() -> int:
     args = parse_args()
-    cal_path = find_calendar(args.calendar)
-    payload = build_payload(cal_path)
+    cal_paths = find_calendar(args.calendar)
+    payload = build_payload(cal_paths, args.mood_log, args.reminders_dir, args.mood_correlation)
     inject_html(payload)
     print(f"生成完成：{OUT_HTML}（日历源：{payload['meta']['calendar_source']}）")
     return 0
 
 
 if __name__ == "__main__":
-    raise SystemExit(main())
+    raise SystemExit(run_main("build_weekly", main))
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地 CalDAV 替身服务器，只实现 caldav_sync.py 用到的那部分协议，便于在 Linux 上联调增量同步：
+- --root 目录下每个 .ics 文件即集合 /calendars/<name>/ 里的一个对象，ETag 取内容哈希；
+- 每次请求前扫描目录，新增/修改/删除会递增版本号并记入变更日志，sync-token 形如 http://caldav.local/sync/<启动时间>-<版本>
+  （重启后旧 token 一律失效）；
+- 支持 PROPFIND（displayname）、REPORT sync-collection / calendar-multiget，以及单个对象的 GET / PUT / DELETE；
+- 未知或超出 --log-limit 的旧 token 返回 403 + DAV:valid-sync-token，可验证客户端的全量回退。
+直接在 --root 里增删改文件，或用 curl -T / -X DELETE 修改对象，再运行 caldav_sync.py 观察增量。
+
+用法示例：
+  python scripts/caldav_standin.py --root /tmp/cal-objects --port 8765
+  python scripts/caldav_sync.py --url http://127.0.0.1:8765/calendars/work/
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import hashlib
+import threading
+import time
+import xml.etree.ElementTree as ET
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote, unquote, urlparse
+
+TOKEN_PREFIX = "http://caldav.local/sync/"
+
+
+def xml_escape(text: str) -> str:
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def etag_of(raw: bytes) -> str:
+    return '"' + hashlib.sha1(raw).hexdigest()[:16] + '"'
+
+
+class Collection:
+    """目录 → 对象集合；按扫描结果维护版本号与变更日志。"""
+
+    def __init__(self, root: Path, prefix: str, display_name: str, log_limit: int) -> None:
+        self.root = root
+        self.prefix = prefix
+        self.display_name = display_name
+        self.log_limit = log_limit
+        self.lock = threading.Lock()
+        self.epoch = int(time.time())
+        self.rev = 0
+        self.min_rev = 0
+        self.files: Dict[str, Tuple[int, int, str]] = {}
+        self.log: List[Tuple[int, str, Optional[str]]] = []
+
+    def rescan(self) -> None:
+        with self.lock:
+            current = {}
+            for path in self.root.glob("*.ics"):
+                st = path.stat()
+                known = self.files.get(path.name)
+                if known and known[:2] == (st.st_mtime_ns, st.st_size):
+                    current[path.name] = known
+                else:
+                    current[path.name] = (st.st_mtime_ns, st.st_size, etag_of(path.read_bytes()))
+            changes = [(n, v[2]) for n, v in current.items() if self.files.get(n, (0, 0, None))[2] != v[2]]
+            changes += [(n, None) for n in self.files if n not in current]
+            self.files = current
+            if changes:
+                self.rev += 1
+                self.log.extend((self.rev, name, etag) for name, etag in changes)
+                if self.rev - self.min_rev > self.log_limit:
+                    self.min_rev = self.rev - self.log_limit
+                    self.log = [entry for entry in self.log if entry[0] > self.min_rev]
+
+    def href(self, name: str) -> str:
+        return self.prefix + quote(name)
+
+    def name_of(self, href: str) -> Optional[str]:
+        path = urlparse(href).path
+        if not path.startswith(self.prefix):
+            return None
+        name = unquote(path[len(self.prefix) :])
+        return name if name and "/" not in name else None
+
+    def changes_since(self, token: str) -> Optional[Dict[str, Optional[str]]]:
+        """token 对应版本之后的净变更 {文件名: etag 或 None（已删除）}；token 无效返回 None。"""
+        with self.lock:
+            if not token:
+                return {name: v[2] for name, v in self.files.items()}
+            epoch, _, rev = token[len(TOKEN_PREFIX) :].partition("-")
+            if not token.startswith(TOKEN_PREFIX) or epoch != str(self.epoch) or not rev.isdigit():
+                return None
+            since = int(rev)
+            if since < self.min_rev or since > self.rev:
+                return None
+            changes: Dict[str, Optional[str]] = {}
+            for logged, name, etag in self.log:
+                if logged > since:
+                    changes[name] = etag
+            return changes
+
+    def token(self) -> str:
+        return f"{TOKEN_PREFIX}{self.epoch}-{self.rev}"
+
+
+class Handler(BaseHTTPRequestHandler):
+    collection: Collection
+    auth: Optional[str] = None
+
+    def log_message(self, fmt: str, *args) -> None:  # noqa: D401 - 与 http.server 签名一致
+        print(f"[standin] {self.command} {self.path} {fmt % args}", flush=True)
+
+    def authorized(self) -> bool:
+        if not self.auth or self.headers.get("Authorization") == self.auth:
+            return True
+        self.send_response(401)
+        self.send_header("WWW-Authenticate", 'Basic realm="caldav-standin"')
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+        return False
+
+    def body(self) -> bytes:
+        if "chunked" in (self.headers.get("Transfer-Encoding") or "").lower():
+            # curl -T - 等从 stdin 上传时不带 Content-Length
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().split(b";")[0].strip() or b"0", 16)
+                if not size:
+                    self.rfile.readline()
+                    return b"".join(chunks)
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+    def reply(self, status: int, payload: str = "", content_type: str = "application/xml; charset=utf-8", etag: Optional[str] = None) -> None:
+        data = payload.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def multistatus(self, responses: List[str], token: Optional[str] = None) -> None:
+        tail = f"<d:sync-token>{token}</d:sync-token>" if token else ""
+        self.reply(
+            207,
+            '<?xml version="1.0" encoding="utf-8"?>\n<d:multistatus xmlns:d="DAV:" xmlns:c="urn:ietf:params:xml:ns:caldav">'
+            + "".join(responses)
+            + tail
+            + "</d:multistatus>",
+        )
+
+    def do_PROPFIND(self) -> None:
+        if not self.authorized():
+            return
+        self.body()
+        coll = self.collection
+        self.multistatus(
+            [
+                f"<d:response><d:href>{coll.prefix}</d:href><d:propstat><d:prop>"
+                f"<d:displayname>{xml_escape(coll.display_name)}</d:displayname>"
+                "</d:prop><d:status>HTTP/1.1 200 OK</d:status></d:propstat></d:response>"
+            ]
+        )
+
+    def do_REPORT(self) -> None:
+        if not self.authorized():
+            return
+        coll = self.collection
+        try:
+            root = ET.fromstring(self.body())
+        except ET.ParseError:
+            self.reply(400, "bad xml", "text/plain")
+            return
+        if root.tag == "{DAV:}sync-collection":
+            coll.rescan()
+            token = (root.findtext("{DAV:}sync-token") or "").strip()
+            changes = coll.changes_since(token)
+            if changes is None:
+                self.reply(403, '<?xml version="1.0"?><d:error xmlns:d="DAV:"><d:valid-sync-token/></d:error>')
+                return
+            responses = []
+            for name, etag in sorted(changes.items()):
+                if etag is None:
+                    responses.append(
+                        f"<d:response><d:href>{coll.href(name)}</d:href><d:status>HTTP/1.1 404 Not Found</d:status></d:response>"
+                    )
+                else:
+                    responses.append(
+                        f"<d:response><d:href>{coll.href(name)}</d:href><d:propstat><d:prop><d:getetag>{etag}</d:getetag>"
+                        "</d:prop><d:status>HTTP/1.1 200 OK</d:status></d:propstat></d:response>"
+                    )
+            self.multistatus(responses, coll.token())
+        elif root.tag == "{urn:ietf:params:xml:ns:caldav}calendar-multiget":
+            responses = []
+            for el in root.findall("{DAV:}href"):
+                href = (el.text or "").strip()
+                name = coll.name_of(href)
+                path = coll.root / name if name else None
+                if not path or not path.is_file():
+                    responses.append(f"<d:response><d:href>{xml_escape(href)}</d:href><d:status>HTTP/1.1 404 Not Found</d:status></d:response>")
+                    continue
+                # 不重新扫描整个目录：直接按当前内容计算 ETag
+                raw = path.read_bytes()
+                responses.append(
+                    f"<d:response><d:href>{xml_escape(href)}</d:href><d:propstat><d:prop>"
+                    f"<d:getetag>{etag_of(raw)}</d:getetag><c:calendar-data>{xml_escape(raw.decode('utf-8'))}</c:calendar-data>"
+                    "</d:prop><d:status>HTTP/1.1 200 OK</d:status></d:propstat></d:response>"
+                )
+            self.multistatus(responses)
+        else:
+            self.reply(501, f"unsupported report {root.tag}", "text/plain")
+
+    def _object(self) -> Optional[Path]:
+        name = self.collection.name_of(self.path)
+        if not name:
+            self.reply(404, "not found", "text/plain")
+            return None
+        return self.collection.root / name
+
+    def do_GET(self) -> None:
+        if not self.authorized():
+            return
+        path = self._object()
+        if path is None:
+            return
+        if not path.is_file():
+            self.reply(404, "not found", "text/plain")
+            return
+        raw = path.read_bytes()
+        self.reply(200, raw.decode("utf-8"), "text/calendar; charset=utf-8", etag_of(raw))
+
+    # PUT / DELETE 只改文件，变更在下一次 sync-collection 扫描时记入日志
+    def do_PUT(self) -> None:
+        if not self.authorized():
+            return
+        path = self._object()
+        if path is None:
+            return
+        existed = path.exists()
+        raw = self.body()
+        path.write_bytes(raw)
+        self.reply(204 if existed else 201, etag=etag_of(raw))
+
+    def do_DELETE(self) -> None:
+        if not self.authorized():
+            return
+        path = self._object()
+        if path is None:
+            return
+        if not path.exists():
+            self.reply(404, "not found", "text/plain")
+            return
+        path.unlink()
+        self.reply(204)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="本地 CalDAV 替身服务器（联调 caldav_sync.py 用）")
+    parser.add_argument("--root", type=Path, required=True, help="对象目录（每个 .ics 文件一个对象）")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址，默认 127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765, help="端口，默认 8765")
+    parser.add_argument("--name", default="work", help="集合名（URL 为 /calendars/<name>/），默认 work")
+    parser.add_argument("--display-name", default="💼 工作", help="集合显示名（即同步后的日历名）")
+    parser.add_argument("--user", help="要求 Basic 认证的用户名（默认不认证）")
+    parser.add_argument("--password", default="", help="Basic 认证密码")
+    parser.add_argument("--log-limit", type=int, default=1000, help="保留的版本数，更早的 token 视为失效，默认 1000")
+    args = parser.parse_args()
+
+    args.root.mkdir(parents=True, exist_ok=True)
+    collection = Collection(args.root, f"/calendars/{args.name}/", args.display_name, args.log_limit)
+    collection.rescan()
+    Handler.collection = collection
+    if args.user:
+        Handler.auth = "Basic " + base64.b64encode(f"{args.user}:{args.password}".encode("utf-8")).decode("ascii")
+    server = ThreadingHTTPServer((args.host, args.port), Handler)
+    print(f"CalDAV 替身服务器：http://{args.host}:{args.port}{collection.prefix}（{len(collection.files)} 个对象）", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CalDAV 增量同步：用 sync-collection（RFC 6578）的 sync-token 与 ETag 只拉取变更/删除的事件，
+再只重写受影响的 data/calendar/sources/caldav/week-<ISO周>.json（source 为 "caldav"，结构同 fetch_calendar.py）；
+  单独成目录，不覆盖 icalBuddy / ICS 的周文件，读取方按 calendar_sources 合并。
+- 首次运行（或服务端判定 token 失效）做一次全量同步；之后每次只有变更的对象走网络（calendar-multiget 批量取回）。
+- 本地状态：data/calendar/caldav/state.json（sync-token、每个对象的 href/etag/涉及的周）与 objects/*.ics（对象原文）。
+- 渲染复用 import_ics.py：只重新解析“涉及受影响周”的对象，且每个对象只解析、展开一次后按周分桶，成本与变更量成正比，而非日历总量。
+- 连接参数：--url / --user / --password，或环境变量 CALDAV_URL / CALDAV_USER / CALDAV_PASSWORD。
+
+本地联调：python scripts/caldav_standin.py --root /tmp/cal-objects 启动替身服务器后，
+  python scripts/caldav_sync.py --url http://127.0.0.1:8765/calendars/work/ --year 2025
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import hashlib
+import json
+import os
+import xml.etree.ElementTree as ET
+from datetime import date
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urljoin
+
+from calendar_sources import source_dir
+from fetch_calendar import OUT_DIR, iso_week_str, week_payload, write_week
+from import_ics import Window, import_files, year_weeks
+from instrument import count, run_main, span
+
+BASE = Path(__file__).resolve().parent.parent
+CALDAV_DIR = OUT_DIR / "caldav"
+WEEKS_OUT_DIR = source_dir(OUT_DIR, "caldav")
+MULTIGET_BATCH = 100
+NS = {"d": "DAV:", "c": "urn:ietf:params:xml:ns:caldav"}
+
+SYNC_BODY = """<?xml version="1.0" encoding="utf-8"?>
+<d:sync-collection xmlns:d="DAV:">
+  <d:sync-token>{token}</d:sync-token>
+  <d:sync-level>1</d:sync-level>
+  <d:prop><d:getetag/></d:prop>
+</d:sync-collection>"""
+
+MULTIGET_BODY = """<?xml version="1.0" encoding="utf-8"?>
+<c:calendar-multiget xmlns:d="DAV:" xmlns:c="urn:ietf:params:xml:ns:caldav">
+  <d:prop><d:getetag/><c:calendar-data/></d:prop>
+{hrefs}
+</c:calendar-multiget>"""
+
+PROPFIND_BODY = """<?xml version="1.0" encoding="utf-8"?>
+<d:propfind xmlns:d="DAV:"><d:prop><d:displayname/></d:prop></d:propfind>"""
+
+
+class SyncTokenInvalid(Exception):
+    """服务端拒绝了保存的 sync-token（DAV:valid-sync-token 前置条件失败），需要全量重同步。"""
+
+
+class CalDAVClient:
+    def __init__(self, url: str, user: Optional[str], password: Optional[str], timeout: float = 30.0) -> None:
+        self.url = url if url.endswith("/") else url + "/"
+        self.timeout = timeout
+        self.headers = {"Content-Type": "application/xml; charset=utf-8"}
+        if user:
+            token = base64.b64encode(f"{user}:{password or ''}".encode("utf-8")).decode("ascii")
+            self.headers["Authorization"] = f"Basic {token}"
+
+    def request(self, method: str, body: str, depth: str) -> ET.Element:
+        # urllib.request 连带导入 http.client/email，约 40ms，只在真正发请求时导入
+        from urllib.error import HTTPError
+        from urllib.request import Request, urlopen
+
+        req = Request(self.url, data=body.encode("utf-8"), method=method, headers={**self.headers, "Depth": depth})
+        with span(f"http.{method.lower()}"):
+            try:
+                with urlopen(req, timeout=self.timeout) as resp:
+                    payload = resp.read()
+            except HTTPError as exc:
+                detail = exc.read().decode("utf-8", "replace")
+                if exc.code in (403, 409) and "valid-sync-token" in detail:
+                    raise SyncTokenInvalid(detail) from exc
+                raise
+        count("bytes_fetched", len(payload))
+        return ET.fromstring(payload)
+
+    def display_name(self) -> Optional[str]:
+        root = self.request("PROPFIND", PROPFIND_BODY, "0")
+        name = root.findtext(".//d:displayname", namespaces=NS)
+        return name.strip() if name and name.strip() else None
+
+    def sync(self, token: str) -> Tuple[str, Dict[str, str], Set[str]]:
+        """返回 (新 token, {href: etag} 变更/新增, {href} 删除)。"""
+        root = self.request("REPORT", SYNC_BODY.format(token=xml_escape(token)), "1")
+        changed: Dict[str, str] = {}
+        deleted: Set[str] = set()
+        for resp in root.findall("d:response", NS):
+            href = (resp.findtext("d:href", namespaces=NS) or "").strip()
+            if not href or self.is_collection(href):
+                continue
+            status = resp.findtext("d:status", namespaces=NS) or ""
+            if " 404 " in status:
+                deleted.add(href)
+                continue
+            etag = resp.findtext("d:propstat/d:prop/d:getetag", namespaces=NS)
+            if etag:
+                changed[href] = etag.strip()
+        new_token = (root.findtext("d:sync-token", namespaces=NS) or "").strip()
+        return new_token, changed, deleted
+
+    def multiget(self, hrefs: List[str]) -> Iterable[Tuple[str, str, str]]:
+        """批量取回对象原文：产出 (href, etag, calendar-data)。"""
+        for i in range(0, len(hrefs), MULTIGET_BATCH):
+            batch = hrefs[i : i + MULTIGET_BATCH]
+            body = MULTIGET_BODY.format(hrefs="\n".join(f"  <d:href>{xml_escape(h)}</d:href>" for h in batch))
+            root = self.request("REPORT", body, "1")
+            for resp in root.findall("d:response", NS):
+                href = (resp.findtext("d:href", namespaces=NS) or "").strip()
+                data = resp.findtext("d:propstat/d:prop/c:calendar-data", namespaces=NS)
+                etag = resp.findtext("d:propstat/d:prop/d:getetag", namespaces=NS) or ""
+                if href and data is not None:
+                    yield href, etag.strip(), data
+
+    def is_collection(self, href: str) -> bool:
+        return urljoin(self.url, href).rstrip("/") == self.url.rstrip("/")
+
+
+def xml_escape(text: str) -> str:
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def object_file(href: str) -> str:
+    return hashlib.sha1(href.encode("utf-8")).hexdigest()[:20] + ".ics"
+
+
+class SyncState:
+    """state.json：collection URL、sync-token、显示名、年份窗口，以及每个对象的 etag / 文件 / 涉及的周。"""
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self.path = root / "state.json"
+        self.objects_dir = root / "objects"
+        data = json.loads(self.path.read_text(encoding="utf-8")) if self.path.exists() else {}
+        self.url: str = data.get("url", "")
+        self.token: str = data.get("sync_token", "")
+        self.display_name: Optional[str] = data.get("display_name")
+        self.year: Optional[int] = data.get("year")
+        self.objects: Dict[str, Dict[str, object]] = data.get("objects", {})
+
+    def reset(self, url: str) -> None:
+        for entry in self.objects.values():
+            (self.objects_dir / str(entry["file"])).unlink(missing_ok=True)
+        self.url, self.token, self.display_name, self.objects = url, "", None, {}
+
+    def store(self, href: str, etag: str, data: str) -> None:
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        name = object_file(href)
+        (self.objects_dir / name).write_text(data, encoding="utf-8")
+        previous = self.objects.get(href, {})
+        self.objects[href] = {"etag": etag, "file": name, "weeks": previous.get("weeks", [])}
+
+    def drop(self, href: str) -> List[str]:
+        entry = self.objects.pop(href, None)
+        if not entry:
+            return []
+        (self.objects_dir / str(entry["file"])).unlink(missing_ok=True)
+        return list(entry.get("weeks", []))
+
+    def save(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        data = {
+            "url": self.url,
+            "sync_token": self.token,
+            "display_name": self.display_name,
+            "year": self.year,
+            "objects": self.objects,
+        }
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+        tmp.replace(self.path)
+
+
+def object_weeks(path: Path, weeks: List[date], cal_name: str) -> List[str]:
+    """对象在年份窗口内落到的周（重复事件按窗口展开）。"""
+    window = Window(weeks)
+    import_files([path], window, cal_name)
+    return [iso_week_str(w) for w, bucket in window.buckets.items() if bucket]
+
+
+def render_weeks(state: SyncState, affected: Set[str], weeks: List[date], out_dir: Path, cal_name: str) -> int:
+    """
+    重写受影响的周文件。涉及这些周的对象合在一起只解析一次：以受影响的周为窗口展开（重复事件的主记录也只展开一次），
+    实例按周入桶后逐周写出。返回写入的事件数。
+    """
+    targets = [w for w in weeks if iso_week_str(w) in affected]
+    if not targets:
+        return 0
+    paths: Set[Path] = set()
+    for entry in state.objects.values():
+        if affected.intersection(entry.get("weeks", [])):
+            paths.add(state.objects_dir / str(entry["file"]))
+    window = Window(targets)
+    import_files(sorted(paths), window, cal_name)
+    total = 0
+    for week_start in targets:
+        events = sorted((evt for _, evt in window.buckets[week_start].values()), key=lambda e: (e["start"], e["title"]))
+        write_week(out_dir, week_payload(week_start, events, None, None, source="caldav"))
+        count("weeks.written")
+        total += len(events)
+    return total
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="CalDAV 增量同步（sync-token + ETag），按周写入 data/calendar/sources/caldav/week-*.json")
+    parser.add_argument("--url", default=os.environ.get("CALDAV_URL"), help="日历集合 URL（默认取 CALDAV_URL）")
+    parser.add_argument("--user", default=os.environ.get("CALDAV_USER"), help="用户名（默认取 CALDAV_USER）")
+    parser.add_argument("--password", default=os.environ.get("CALDAV_PASSWORD"), help="密码（默认取 CALDAV_PASSWORD）")
+    parser.add_argument("--year", type=int, default=date.today().year, help="输出周文件的年份，默认当前年")
+    parser.add_argument("--calendar-name", help="写入事件的日历名（默认取集合的 displayname）")
+    parser.add_argument("--out-dir", type=Path, default=WEEKS_OUT_DIR, help="周文件输出目录，默认 data/calendar/sources/caldav")
+    parser.add_argument("--state-dir", type=Path, default=CALDAV_DIR, help="同步状态目录，默认 data/calendar/caldav")
+    parser.add_argument("--full", action="store_true", help="丢弃 sync-token，强制全量同步")
+    args = parser.parse_args()
+
+    if not args.url:
+        print("未指定 CalDAV 集合：使用 --url 或设置 CALDAV_URL")
+        return 1
+    client = CalDAVClient(args.url, args.user, args.password)
+    state = SyncState(args.state_dir)
+    if state.url != client.url or args.full:
+        state.reset(client.url)
+    weeks = year_weeks(args.year)
+    window_changed = state.year != args.year
+    state.year = args.year
+
+    try:
+        if not args.calendar_name and state.display_name is None:
+            state.display_name = client.display_name() or ""
+        cal_name = args.calendar_name or state.display_name or "CalDAV"
+        full = not state.token
+        try:
+            token, changed, deleted = client.sync(state.token)
+        except SyncTokenInvalid:
+            print("[caldav] sync-token 已失效，改为全量同步")
+            full = True
+            token, changed, deleted = client.sync("")
+        if full:
+            # 全量结果里没有出现的对象即已删除
+            deleted |= set(state.objects) - set(changed)
+        to_fetch = sorted(h for h, etag in changed.items() if state.objects.get(h, {}).get("etag") != etag)
+        count("objects.changed", len(to_fetch))
+        count("objects.deleted", len(deleted))
+
+        affected: Set[str] = set()
+        for href in deleted:
+            affected.update(state.drop(href))
+        with span("multiget"):
+            fetched = list(client.multiget(to_fetch)) if to_fetch else []
+    except (OSError, ET.ParseError) as exc:  # HTTPError/URLError 都是 OSError 子类
+        print(f"[caldav] 同步失败：{exc}")
+        return 1
+
+    with span("index"):
+        for href, etag, data in fetched:
+            old_weeks = set(state.objects.get(href, {}).get("weeks", []))
+            state.store(href, etag or changed.get(href, ""), data)
+            new_weeks = object_weeks(state.objects_dir / object_file(href), weeks, cal_name)
+            state.objects[href]["weeks"] = new_weeks
+            affected |= old_weeks | set(new_weeks)
+        if window_changed:
+            # 年份变了：对象不必重新下载，但涉及的周需按新窗口重算，并写出全年所有周
+            for entry in state.objects.values():
+                entry["weeks"] = object_weeks(state.objects_dir / str(entry["file"]), weeks, cal_name)
+            affected |= {iso_week_str(w) for w in weeks}
+        if full:
+            affected |= {iso_week_str(w) for w in weeks}
+
+    with span("render"):
+        total = render_weeks(state, affected, weeks, args.out_dir, cal_name)
+    state.token = token
+    state.save()
+    written = len(affected & {iso_week_str(w) for w in weeks})
+    print(
+        f"CalDAV 同步完成（{'全量' if full else '增量'}）：变更 {len(to_fetch)}，删除 {len(deleted)}，"
+        f"对象共 {len(state.objects)}；重写 {written} 个周文件（{total} 条事件）"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(run_main("caldav_sync", main))
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+日历脚本共用的紧凑事件模型（fetch_calendar / build_calendar_archive / read_calendar_week / build_weekly）。
+
+- Event 用 __slots__ 存字段，不为每条事件建 dict；开始/结束在首次用到时解析一次为 epoch 秒 + 时区并缓存，
+  下游去重、算时长不再各自 fromisoformat；取日期/时刻对常规 ISO 文本直接切片，不解析。
+- 无时区的时间（本地墙钟）按 UTC 墙钟折算 epoch，两者相减与 datetime 相减一致（不受夏令时影响）；
+  带偏移的时区对象按偏移共享，日历名 sys.intern，同名日历只存一份字符串。
+- 原始 ISO 文本原样保留，to_dict() 按当前 JSON 结构（title, calendar, start, end, allday, location, notes, 其余键）
+  延迟生成 dict，写回的 JSON 与原来逐字节一致；源数据键序非常规时记录键序（同一键序共享一个 tuple）。
+"""
+
+from __future__ import annotations
+
+import sys
+from datetime import datetime, timedelta, timezone, tzinfo
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+CORE = ("title", "calendar", "start", "end", "allday", "location", "notes")
+NAIVE_EPOCH = datetime(1970, 1, 1)
+EPOCH_ORDINAL = NAIVE_EPOCH.toordinal()
+_OFFSETS: Dict[tzinfo, Tuple[int, tzinfo]] = {}
+_LAYOUTS: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+_UNPARSED: Any = object()
+
+
+def shared_tz(offset: timedelta) -> tzinfo:
+    return timezone.utc if not offset else timezone(offset)
+
+
+def to_epoch(dt: datetime) -> Tuple[float, Optional[tzinfo]]:
+    """
+    datetime → (epoch 秒, 共享时区或 None)；无时区按 UTC 墙钟折算。
+    直接由年月日时分秒算整数秒（比 dt.timestamp() 快数倍，整秒时没有浮点误差），
+    固定偏移的 timezone 对象缓存其偏移秒数与共享实例。
+    """
+    ts = (dt.toordinal() - EPOCH_ORDINAL) * 86400 + dt.hour * 3600 + dt.minute * 60 + dt.second
+    if dt.microsecond:
+        ts += dt.microsecond / 1e6
+    tz = dt.tzinfo
+    if tz is None:
+        return ts, None
+    cached = _OFFSETS.get(tz)
+    if cached is None:
+        offset = dt.utcoffset()
+        if offset is None:
+            return ts, None
+        cached = (int(offset.total_seconds()), shared_tz(offset))
+        if type(tz) is not timezone:
+            # zoneinfo 等随日期变化的时区不缓存
+            return ts - cached[0], cached[1]
+        _OFFSETS[tz] = cached
+    return ts - cached[0], cached[1]
+
+
+def parse_iso(value: Any) -> Tuple[Optional[float], Optional[tzinfo]]:
+    if not value:
+        return None, None
+    try:
+        return to_epoch(datetime.fromisoformat(value if type(value) is str else str(value)))
+    except ValueError:
+        return None, None
+
+
+def from_epoch(ts: Optional[float], tz: Optional[tzinfo]) -> Optional[datetime]:
+    if ts is None:
+        return None
+    if tz is None:
+        return NAIVE_EPOCH + timedelta(seconds=ts)
+    return datetime.fromtimestamp(ts, tz)
+
+
+class Event:
+    """
+    一条日历事件。start/end 为原始 ISO 文本；start_ts/end_ts 为 epoch 秒（无法解析时为 None），
+    首次访问时一并解析开始与结束并缓存在槽位里，只按文本筛选或原样写回的事件不付解析开销。
+    """
+
+    __slots__ = (
+        "title", "calendar", "start", "end", "allday", "location", "notes",
+        "_start_ts", "_end_ts", "_start_tz", "_end_tz", "extra", "layout",
+    )
+
+    def __init__(
+        self,
+        title: Any = "",
+        calendar: Any = "",
+        start: Any = "",
+        end: Any = "",
+        allday: Any = False,
+        location: Any = "",
+        notes: Any = "",
+        extra: Optional[Dict[str, Any]] = None,
+        layout: Optional[Tuple[str, ...]] = None,
+    ) -> None:
+        self.title = title
+        self.calendar = sys.intern(calendar) if type(calendar) is str else calendar
+        self.start = start
+        self.end = end
+        self.allday = allday
+        self.location = location
+        self.notes = notes
+        self._start_ts = self._end_ts = _UNPARSED
+        self._start_tz = self._end_tz = None
+        self.extra = extra or None
+        self.layout = layout
+
+    @classmethod
+    def from_datetimes(
+        cls, title: str, calendar: str, start_dt: datetime, end_dt: datetime, allday: bool, location: str, notes: str
+    ) -> "Event":
+        """解析器直接产出的事件：文本由 datetime 生成，epoch 在首次访问时再算。"""
+        return cls(title, calendar, start_dt.isoformat(), end_dt.isoformat(), allday, location, notes)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Event":
+        keys = tuple(data)
+        layout = None
+        if keys[: len(CORE)] != CORE:
+            layout = _LAYOUTS.setdefault(keys, keys)
+        extra = {k: v for k, v in data.items() if k not in CORE} if len(keys) > len(CORE) or layout else None
+        get = data.get
+        return cls(get("title"), get("calendar"), get("start"), get("end"), get("allday"), get("location"), get("notes"), extra, layout)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """按原 JSON 结构生成 dict：核心字段在前（或按源数据键序），之后追加的键排在末尾。"""
+        extra = self.extra
+        if self.layout is None:
+            out = {
+                "title": self.title,
+                "calendar": self.calendar,
+                "start": self.start,
+                "end": self.end,
+                "allday": self.allday,
+                "location": self.location,
+                "notes": self.notes,
+            }
+            if extra:
+                out.update(extra)
+            return out
+        out = {k: (getattr(self, k) if k in CORE else extra[k]) for k in self.layout}
+        for key, value in (extra or {}).items():
+            if key not in out:
+                out[key] = value
+        return out
+
+    def set_extra(self, key: str, value: Any) -> None:
+        if self.extra is None:
+            self.extra = {}
+        self.extra[key] = value
+
+    def _parse(self) -> None:
+        self._start_ts, self._start_tz = parse_iso(self.start)
+        self._end_ts, self._end_tz = parse_iso(self.end)
+
+    @property
+    def start_ts(self) -> Optional[float]:
+        if self._start_ts is _UNPARSED:
+            self._parse()
+        return self._start_ts
+
+    @property
+    def end_ts(self) -> Optional[float]:
+        if self._end_ts is _UNPARSED:
+            self._parse()
+        return self._end_ts
+
+    @property
+    def start_tz(self) -> Optional[tzinfo]:
+        if self._start_ts is _UNPARSED:
+            self._parse()
+        return self._start_tz
+
+    @property
+    def end_tz(self) -> Optional[tzinfo]:
+        if self._end_ts is _UNPARSED:
+            self._parse()
+        return self._end_tz
+
+    @property
+    def start_dt(self) -> Optional[datetime]:
+        return from_epoch(self.start_ts, self.start_tz)
+
+    @property
+    def end_dt(self) -> Optional[datetime]:
+        return from_epoch(self.end_ts, self.end_tz)
+
+    @property
+    def parsed(self) -> bool:
+        return self.start_ts is not None and self.end_ts is not None
+
+    @property
+    def minutes(self) -> int:
+        """时长（分钟，向下取整，不小于 0）；先按微秒取整，与 datetime 相减的结果一致。"""
+        return max(0, int(round(self.end_ts - self.start_ts, 6) // 60))
+
+    def wall(self, which: str = "start") -> Tuple[str, str]:
+        """事件自身时区下的 (YYYY-MM-DD, HH:MM)；扩展格式的 ISO 文本直接切片，其余回退到 datetime。"""
+        text = self.start if which == "start" else self.end
+        if type(text) is str and len(text) >= 16 and text[10] == "T" and text[7] == "-" and text[13] == ":":
+            return text[:10], text[11:16]
+        dt = self.start_dt if which == "start" else self.end_dt
+        return dt.date().isoformat(), dt.strftime("%H:%M")
+
+    def __repr__(self) -> str:
+        return f"Event({self.title!r}, {self.calendar!r}, {self.start!r} → {self.end!r})"
+
+
+def from_dicts(items: Iterable[Any]) -> List[Event]:
+    """JSON 里的事件数组 → Event 列表（非 dict 的条目跳过）。"""
+    return [Event.from_dict(item) for item in items if isinstance(item, dict)]
+
+
+def as_dicts(events: Iterable[Any]) -> List[Dict[str, Any]]:
+    """写 JSON 前统一成 dict；import_ics / caldav_sync 等仍直接传 dict，原样通过。"""
+    return [evt.to_dict() if isinstance(evt, Event) else evt for evt in events]
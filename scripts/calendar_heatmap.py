@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多年「星期 × 时段」占用热力图：把日历事件栅格化成按分钟的占用时间轴（每个日历一条），
+再折算成星期 × 小时（及 --resolution 分钟粒度）的热力图，输出给仪表盘的紧凑数组。
+
+- 栅格化用 NumPy 差分数组：开始分钟 +1、结束分钟 -1（np.bincount 一次累加全部事件），np.cumsum 得到每分钟的并发数；
+  不逐事件循环。跨天/跨周事件自然落到各自的分钟上。
+- --mode busy（默认）：同一日历内重叠的事件只算一次占用；sum：重叠按并发数累加。
+- 归约：占用时间轴 reshape 成 (天, 时段, 分钟) 求和，再按星期用 one-hot 矩阵乘法汇总；「全部」为所有日历的并集。
+- 时间：事件的无时区时间即本地时间；带偏移的先换成本机本地时间。全天事件默认不计（--include-allday 计入）。
+- 输入：artifacts/calendar/all-<年>*.json（build_calendar_archive 的输出，含分片）；某年没有归档时直接读 data/calendar/week-*.json。
+- 输出 artifacts/calendar/heatmap.json：每个日历、每年一组扁平整数数组（单位：分钟，行主序 7 × 24 / 7 × 每日时段数），
+  附每个星期在区间内出现的天数，前端除一下即得平均值；--npz 另存完整的 天 × 时段 占用矩阵（uint16，压缩）。
+
+用法示例：
+  python scripts/calendar_heatmap.py --years 2024,2025
+  python scripts/calendar_heatmap.py --resolution 15 --mode sum --npz artifacts/calendar/occupancy.npz
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple
+
+import build_calendar_archive as archive
+from calendar_event import as_dicts
+from instrument import count, run_main, span
+
+if TYPE_CHECKING:
+    # numpy 只在真正计算时导入：`orchard heatmap --help` 和没装 numpy 时的报错都不必先加载它
+    import numpy as np
+
+BASE = Path(__file__).resolve().parent.parent
+DEFAULT_OUT = archive.DEFAULT_OUT_DIR / "heatmap.json"
+ALL = "全部"
+MINUTES_PER_DAY = 1440
+RESOLUTIONS = (1, 5, 15, 30, 60)
+# 1970-01-01 是星期四（周一为 0）
+EPOCH_WEEKDAY = 3
+NAIVE_LEN = len("YYYY-MM-DDTHH:MM")
+OFFSET_RE = re.compile(r"(Z|[+-]\d{2}:?\d{2})$")
+
+
+def archive_years(archive_dir: Path) -> List[int]:
+    years = set()
+    for path in archive_dir.glob("all-*.json"):
+        match = re.match(r"all-(\d{4})(?:-\d+)?\.json$", path.name)
+        if match:
+            years.add(int(match.group(1)))
+    return sorted(years)
+
+
+def load_year(year: int, archive_dir: Path, weeks_dir: Path) -> List[Dict[str, Any]]:
+    paths = sorted(archive_dir.glob(f"all-{year}.json")) + sorted(archive_dir.glob(f"all-{year}-*.json"))
+    if not paths:
+        events, _ = archive.build_archive(year, weeks_dir, [])
+        return as_dicts(events)
+    events: List[Dict[str, Any]] = []
+    for path in paths:
+        with span("load"):
+            data = json.loads(path.read_text(encoding="utf-8"))
+        events.extend(data.get("events", []) if isinstance(data, dict) else data)
+    return events
+
+
+def local_minute(value: Any) -> str | None:
+    """ISO 时间 → 本地 'YYYY-MM-DDTHH:MM'（交给 NumPy 批量解析）；带偏移的才走 datetime 换算。"""
+    text = str(value or "")
+    if len(text) < len("YYYY-MM-DD"):
+        return None
+    if OFFSET_RE.search(text) and len(text) > NAIVE_LEN:
+        try:
+            dt = datetime.fromisoformat(text.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+        return dt.astimezone().strftime("%Y-%m-%dT%H:%M")
+    return text[:NAIVE_LEN] if "T" in text or " " in text else text + "T00:00"
+
+
+def event_arrays(events: List[Dict[str, Any]], include_allday: bool) -> Tuple[np.ndarray, np.ndarray, np.ndarray, List[str]]:
+    """事件 → (开始分钟, 结束分钟, 日历编号, 日历名)，分钟为 datetime64[m]。"""
+    import numpy as np
+
+    starts: List[str] = []
+    ends: List[str] = []
+    names: List[str] = []
+    for evt in events:
+        if evt.get("allday") and not include_allday:
+            continue
+        start, end = local_minute(evt.get("start")), local_minute(evt.get("end"))
+        if not start or not end:
+            continue
+        starts.append(start.replace(" ", "T"))
+        ends.append(end.replace(" ", "T"))
+        names.append(str(evt.get("calendar") or "未分类"))
+    start_m = np.array(starts, dtype="datetime64[m]")
+    end_m = np.array(ends, dtype="datetime64[m]")
+    calendars, codes = np.unique(np.array(names, dtype=object), return_inverse=True)
+    return start_m, end_m, codes, [str(c) for c in calendars]
+
+
+def occupancy(start_idx: np.ndarray, end_idx: np.ndarray, total: int, mode: str) -> np.ndarray:
+    """区间 [start, end) → 每分钟的占用（差分数组 + 前缀和）。索引已裁剪到 [0, total]。"""
+    import numpy as np
+
+    diff = np.bincount(start_idx, minlength=total + 1)[: total + 1] - np.bincount(end_idx, minlength=total + 1)[: total + 1]
+    occ = np.cumsum(diff[:total])
+    return np.minimum(occ, 1) if mode == "busy" else occ
+
+
+def day_bins(occ: np.ndarray, days: int, resolution: int) -> np.ndarray:
+    """每分钟占用 → (天, 每日时段数) 的占用分钟数。"""
+    import numpy as np
+
+    return occ.reshape(days, MINUTES_PER_DAY // resolution, resolution).sum(axis=2, dtype=np.int32)
+
+
+def by_weekday(per_day: np.ndarray, weekdays: np.ndarray) -> np.ndarray:
+    """(天, 时段) → (7, 时段)：one-hot(星期) 的转置乘以逐日矩阵。"""
+    import numpy as np
+
+    onehot = np.eye(7, dtype=np.int64)[weekdays]
+    return onehot.T @ per_day.astype(np.int64)
+
+
+def build_heatmaps(
+    events: List[Dict[str, Any]], years: List[int], resolution: int, mode: str, include_allday: bool
+) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+    import numpy as np
+
+    origin = np.datetime64(f"{years[0]}-01-01T00:00", "m")
+    stop = np.datetime64(f"{years[-1] + 1}-01-01T00:00", "m")
+    total = int((stop - origin).astype(np.int64))
+    days = total // MINUTES_PER_DAY
+
+    with span("parse"):
+        start_m, end_m, codes, calendars = event_arrays(events, include_allday)
+    count("events", len(start_m))
+    start_idx = np.clip((start_m - origin).astype(np.int64), 0, total)
+    end_idx = np.clip((end_m - origin).astype(np.int64), 0, total)
+    # 结束早于开始的坏数据按零时长处理
+    end_idx = np.maximum(end_idx, start_idx)
+
+    day_numbers = (origin.astype("datetime64[D]") - np.datetime64("1970-01-01", "D")).astype(np.int64) + np.arange(days)
+    weekdays = (day_numbers + EPOCH_WEEKDAY) % 7
+    day_years = np.arange(days).astype("timedelta64[D]") + origin.astype("datetime64[D]")
+    year_of_day = day_years.astype("datetime64[Y]").astype(np.int64) + 1970
+    year_slices = {y: np.flatnonzero(year_of_day == y) for y in years}
+
+    hour_res = 60
+    result: Dict[str, Any] = {}
+    matrices: Dict[str, np.ndarray] = {}
+    union = np.zeros(total, dtype=np.int32)
+    groups = [(name, codes == i) for i, name in enumerate(calendars)]
+    for name, mask in groups + [(ALL, None)]:
+        with span("rasterize"):
+            if mask is None:
+                occ = np.minimum(union, 1) if mode == "busy" else union
+            else:
+                occ = occupancy(start_idx[mask], end_idx[mask], total, mode).astype(np.int32)
+                union += occ
+        with span("reduce"):
+            per_day = day_bins(occ, days, resolution)
+            per_day_hours = per_day if resolution == hour_res else day_bins(occ, days, hour_res)
+            entry: Dict[str, Any] = {"events": int(mask.sum()) if mask is not None else int(len(start_m)), "total": {}, "by_year": {}}
+            entry["total"] = pack(by_weekday(per_day_hours, weekdays), by_weekday(per_day, weekdays) if resolution != hour_res else None)
+            for y, idx in year_slices.items():
+                entry["by_year"][str(y)] = pack(
+                    by_weekday(per_day_hours[idx], weekdays[idx]),
+                    by_weekday(per_day[idx], weekdays[idx]) if resolution != hour_res else None,
+                )
+        result[name] = entry
+        matrices[name] = per_day
+    meta = {
+        "days_per_weekday": {
+            "total": np.bincount(weekdays, minlength=7).tolist(),
+            "by_year": {str(y): np.bincount(weekdays[idx], minlength=7).tolist() for y, idx in year_slices.items()},
+        },
+        "calendars": [ALL] + calendars,
+    }
+    return {**meta, "heatmaps": result}, matrices
+
+
+def pack(hours: np.ndarray, slots: np.ndarray | None) -> Dict[str, Any]:
+    """扁平整数数组（行主序，周一在前）；slots 只在 --resolution 小于 60 时给出。"""
+    import numpy as np
+
+    packed: Dict[str, Any] = {"hours": hours.astype(np.int64).ravel().tolist()}
+    if slots is not None:
+        packed["slots"] = slots.astype(np.int64).ravel().tolist()
+    return packed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="日历事件 → 星期 × 时段占用热力图（NumPy 差分数组栅格化）")
+    parser.add_argument("--years", help="逗号分隔的年份，默认 artifacts/calendar 中已有归档的全部年份")
+    parser.add_argument("--resolution", type=int, choices=RESOLUTIONS, default=15, help="热力图时段粒度（分钟），默认 15；小时粒度总会输出")
+    parser.add_argument("--mode", choices=["busy", "sum"], default="busy", help="busy：重叠只算一次；sum：按并发数累加")
+    parser.add_argument("--include-allday", action="store_true", help="计入全天事件（默认忽略）")
+    parser.add_argument("--archive-dir", type=Path, default=archive.DEFAULT_OUT_DIR, help="年度归档目录，默认 artifacts/calendar")
+    parser.add_argument("--weeks-dir", type=Path, default=archive.DEFAULT_WEEKS_DIR, help="无归档时读取的周文件目录，默认 data/calendar")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUT, help="输出 JSON，默认 artifacts/calendar/heatmap.json")
+    parser.add_argument("--npz", type=Path, help="另存每个日历的 天 × 时段 占用矩阵（np.savez_compressed）")
+    args = parser.parse_args()
+    try:
+        import numpy as np
+    except ImportError:
+        print("[heatmap] 需要 numpy：pip install numpy")
+        return 1
+
+    years = sorted({int(y) for y in args.years.split(",") if y.strip()}) if args.years else archive_years(args.archive_dir)
+    if not years:
+        print(f"[heatmap] {args.archive_dir} 下没有归档，请用 --years 指定年份")
+        return 1
+    years = list(range(years[0], years[-1] + 1))
+    events: List[Dict[str, Any]] = []
+    for year in years:
+        events.extend(load_year(year, args.archive_dir, args.weeks_dir))
+    if not events:
+        print(f"[heatmap] {years[0]}–{years[-1]} 没有事件")
+        return 1
+
+    payload, matrices = build_heatmaps(events, years, args.resolution, args.mode, args.include_allday)
+    output = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "years": years,
+        "mode": args.mode,
+        "unit": "minutes",
+        "resolution_minutes": args.resolution,
+        "shape": {"hours": [7, 24], "slots": [7, MINUTES_PER_DAY // args.resolution]},
+        **payload,
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with span("write"):
+        text = json.dumps(output, ensure_ascii=False, separators=(",", ":"))
+        args.output.write_text(text, encoding="utf-8")
+    count("bytes_written", len(text.encode("utf-8")))
+    if args.npz:
+        args.npz.parent.mkdir(parents=True, exist_ok=True)
+        with span("write_npz"):
+            np.savez_compressed(
+                args.npz,
+                calendars=np.array(list(matrices), dtype=str),
+                first_day=np.array(f"{years[0]}-01-01"),
+                **{f"cal{i}": m.astype(np.uint16) for i, m in enumerate(matrices.values())},
+            )
+    print(f"[heatmap] {len(events)} 条事件，{len(payload['calendars'])} 个日历，{years[0]}–{years[-1]} → {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(run_main("calendar_heatmap", main))
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+日历周文件按来源分目录存放，读取方按周合并，多个来源同时使用时互不覆盖：
+- icalbuddy：data/calendar/week-<ISO周>.json（fetch_calendar.py，位置不变）
+- ics：data/calendar/sources/ics/week-<ISO周>.json（import_ics.py）
+- caldav：data/calendar/sources/caldav/week-<ISO周>.json（caldav_sync.py）
+build_calendar_archive / build_weekly / read_calendar_week 读某一周时合并各来源的事件：
+同一事件被多个来源导出（uid + recurrence_id 相同，或标题 + 开始/结束时刻相同）时按上面的来源顺序保留第一个；
+同一来源内部的重复不在这里处理（归档去重会记录到 dedup-review.md）。只有一个来源时原样返回，不做任何解析。
+"""
+
+from __future__ import annotations
+
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple
+
+from calendar_event import parse_iso
+
+SOURCES = ("icalbuddy", "ics", "caldav")
+WEEK_FILE_RE = re.compile(r"week-(\d{4}-W\d{2})\.json$")
+
+
+def source_dir(cal_dir: Path, source: str) -> Path:
+    """某个来源的周文件目录；icalbuddy 仍直接写在 data/calendar 下。"""
+    return cal_dir if source == "icalbuddy" else cal_dir / "sources" / source
+
+
+def week_files(cal_dir: Path) -> Dict[str, List[Path]]:
+    """{周标签: 各来源的周文件（按来源顺序）}，按周标签升序。"""
+    found: Dict[str, List[Path]] = {}
+    for source in SOURCES:
+        folder = source_dir(cal_dir, source)
+        if not folder.is_dir():
+            continue
+        for path in folder.glob("week-*.json"):
+            match = WEEK_FILE_RE.match(path.name)
+            if match:
+                found.setdefault(match.group(1), []).append(path)
+    return {label: found[label] for label in sorted(found)}
+
+
+def _span_key(event: Dict[str, Any]) -> Tuple[str, Any, Any]:
+    start_ts, _ = parse_iso(event.get("start"))
+    end_ts, _ = parse_iso(event.get("end"))
+    return (
+        str(event.get("title") or ""),
+        start_ts if start_ts is not None else str(event.get("start") or ""),
+        end_ts if end_ts is not None else str(event.get("end") or ""),
+    )
+
+
+def merge_sources(groups: Iterable[Tuple[Path, List[Any]]]) -> List[Tuple[Path, Dict[str, Any]]]:
+    """
+    [(周文件, 事件数组), ...]（按来源顺序）→ [(所在周文件, 事件), ...]。
+    后面来源里与前面来源重复的事件丢弃；非 dict 的条目跳过。
+    """
+    groups = list(groups)
+    if len(groups) == 1:
+        path, events = groups[0]
+        return [(path, evt) for evt in events if isinstance(evt, dict)]
+    merged: List[Tuple[Path, Dict[str, Any]]] = []
+    owners: Dict[Any, int] = {}
+    for idx, (path, events) in enumerate(groups):
+        for evt in events:
+            if not isinstance(evt, dict):
+                continue
+            keys = [("span", _span_key(evt))]
+            if evt.get("uid"):
+                keys.append(("uid", str(evt["uid"]), str(evt.get("recurrence_id") or "")))
+            if any(owners.get(key, idx) != idx for key in keys):
+                continue
+            for key in keys:
+                owners.setdefault(key, idx)
+            merged.append((path, evt))
+    return merged
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+生成仿 icalBuddy 输出的合成日历原始数据（不依赖 macOS），用于压测 fetch_calendar.parse_lines 及下游。
+- 两种行格式混合：带属性的 `标题|@|日历|@|全天|@|时间|@|地点|@|备注`，以及回退格式
+  `标题 | 30分钟 (日历)@时间@地点@notes: 备注`。
+- 覆盖：跨天事件、全天事件、today/yesterday 相对日期、emoji 日历名、中英文标题与备注。
+- 输出：<out>/raw/week-<ISO周>.txt（与 fetch_calendar 的原始输出同名同格式），同一 --seed 结果可复现。
+- --format ics：改为写单个多年 <out>/calendar.ics（单次事件 + 若干 RRULE 重复事件），供 import_ics.py 压测。
+
+用法示例：
+  python scripts/calendar_synth.py --weeks 1 --out /tmp/cal-1w
+  python scripts/calendar_synth.py --weeks 520 --events-per-week 80 --out /tmp/cal-10y
+  python scripts/calendar_synth.py --weeks 520 --format ics --out /tmp/cal-ics
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, List
+
+CALENDARS = ["🍁 个人日常", "💼 工作", "📚 学习", "🏃 运动", "🎧 Podcast", "中国大陆节假日", "生日"]
+TITLES = [
+    "周会", "1:1 with Alex", "代码评审", "Deep work", "读书：系统设计", "跑步 5km", "Standup", "需求评审",
+    "写周报", "Lunch", "牙医", "Sprint planning", "瑜伽", "播客录制", "家庭晚餐", "Focus block",
+]
+LOCATIONS = ["", "", "会议室 A", "Zoom", "家", "Office 3F", "健身房"]
+NOTES = ["", "", "", "准备 agenda", "bring laptop", "记得带耳机 🎧", "跟进上周 action items", "https://example.com/doc"]
+
+
+def iso_week_str(d: date) -> str:
+    y, w, _ = d.isocalendar()
+    return f"{y}-W{w:02d}"
+
+
+def day_token(d: date, today: date) -> str:
+    """icalBuddy 对今天/昨天输出相对日期。"""
+    if d == today:
+        return "today"
+    if d == today - timedelta(days=1):
+        return "yesterday"
+    return d.isoformat()
+
+
+def datetime_field(start: datetime, end: datetime, allday: bool, today: date, rng: random.Random) -> str:
+    d1 = day_token(start.date(), today)
+    if allday:
+        return d1
+    at = " at" if rng.random() < 0.8 else ""
+    t1 = start.strftime("%H:%M")
+    t2 = end.strftime("%H:%M")
+    if end.date() != start.date():
+        d2 = day_token(end.date(), today)
+        return f"{d1} at {t1} - {d2} at {t2}"
+    return f"{d1}{at} {t1} - {t2}"
+
+
+def make_event(week_start: date, rng: random.Random) -> Dict[str, object]:
+    day = week_start + timedelta(days=rng.randrange(7))
+    kind = rng.random()
+    if kind < 0.1:
+        start = datetime.combine(day, datetime.min.time())
+        return {"start": start, "end": start, "allday": True}
+    hour = rng.randint(6, 21)
+    start = datetime.combine(day, datetime.min.time()) + timedelta(hours=hour, minutes=rng.choice([0, 15, 30, 45]))
+    if kind < 0.15:
+        # 跨天（如夜间航班、通宵活动）
+        end = start + timedelta(hours=rng.randint(4, 30))
+    else:
+        end = start + timedelta(minutes=rng.choice([15, 30, 45, 60, 90, 120]))
+        if end.date() != start.date():
+            end = datetime.combine(start.date(), datetime.min.time()) + timedelta(hours=23, minutes=59)
+    return {"start": start, "end": end, "allday": False}
+
+
+def week_lines(week_start: date, events: int, rng: random.Random, today: date, fallback_ratio: float) -> List[str]:
+    lines = []
+    for _ in range(events):
+        evt = make_event(week_start, rng)
+        title = rng.choice(TITLES)
+        cal = rng.choice(CALENDARS)
+        location = rng.choice(LOCATIONS)
+        notes = rng.choice(NOTES)
+        dt_field = datetime_field(evt["start"], evt["end"], bool(evt["allday"]), today, rng)
+        if rng.random() < fallback_ratio:
+            minutes = int((evt["end"] - evt["start"]).total_seconds() // 60)
+            parts = [f"{title} | {minutes}分钟 ({cal})", dt_field]
+            if location or notes:
+                parts.append(location)
+            if notes:
+                parts.append(f"notes: {notes}")
+            lines.append("@".join(parts))
+        else:
+            allday = "yes" if evt["allday"] else "no"
+            lines.append("|@|".join([title, cal, allday, dt_field, location, notes]))
+    return lines
+
+
+def generate(
+    out_dir: Path,
+    weeks: int,
+    start: date | None = None,
+    events_per_week: int = 60,
+    fallback_ratio: float = 0.2,
+    seed: int = 42,
+    today: date | None = None,
+) -> Dict[str, object]:
+    """写出 weeks 个原始周文件；start 默认取使最后一周为本周的周一。返回统计信息。"""
+    rng = random.Random(seed)
+    today = today or date.today()
+    if start is None:
+        this_monday = today - timedelta(days=today.weekday())
+        start = this_monday - timedelta(weeks=weeks - 1)
+    start = start - timedelta(days=start.weekday())
+    raw_dir = out_dir / "raw"
+    raw_dir.mkdir(parents=True, exist_ok=True)
+    total = 0
+    total_bytes = 0
+    for i in range(weeks):
+        week_start = start + timedelta(weeks=i)
+        n = max(0, int(rng.gauss(events_per_week, events_per_week * 0.2)))
+        text = "\n".join(week_lines(week_start, n, rng, today, fallback_ratio))
+        path = raw_dir / f"week-{iso_week_str(week_start)}.txt"
+        path.write_text(text, encoding="utf-8")
+        total += n
+        total_bytes += len(text.encode("utf-8"))
+    return {
+        "weeks": weeks,
+        "start": start.isoformat(),
+        "end": (start + timedelta(weeks=weeks)).isoformat(),
+        "events": total,
+        "raw_bytes": total_bytes,
+    }
+
+
+RECURRING = [
+    ("Standup", "FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR", 15),
+    ("周会", "FREQ=WEEKLY;BYDAY=MO", 60),
+    ("1:1 with Alex", "FREQ=WEEKLY;INTERVAL=2;BYDAY=TH", 30),
+    ("Monthly review", "FREQ=MONTHLY;BYDAY=-1FR", 60),
+    ("跑步 5km", "FREQ=DAILY;INTERVAL=2", 40),
+    ("写周报", "FREQ=WEEKLY;BYDAY=FR", 30),
+]
+
+
+def ics_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+
+def ics_stamp(dt: datetime) -> str:
+    return dt.strftime("%Y%m%dT%H%M%S")
+
+
+def generate_ics(
+    out_dir: Path,
+    weeks: int,
+    start: date | None = None,
+    events_per_week: int = 60,
+    seed: int = 42,
+    today: date | None = None,
+) -> Dict[str, object]:
+    """写出单个 ICS（TZID=Asia/Shanghai）；返回单次事件数与重复事件数。"""
+    rng = random.Random(seed)
+    today = today or date.today()
+    if start is None:
+        this_monday = today - timedelta(days=today.weekday())
+        start = this_monday - timedelta(weeks=weeks - 1)
+    start = start - timedelta(days=start.weekday())
+    out_dir.mkdir(parents=True, exist_ok=True)
+    path = out_dir / "calendar.ics"
+    tz = ";TZID=Asia/Shanghai"
+    singles = 0
+    with path.open("w", encoding="utf-8", newline="") as fh:
+        fh.write("BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//orchard//calendar_synth//ZH\r\nX-WR-CALNAME:💼 工作\r\n")
+        for i, (title, rule, minutes) in enumerate(RECURRING):
+            first = datetime.combine(start, datetime.min.time()) + timedelta(hours=9 + i)
+            fh.write(
+                f"BEGIN:VEVENT\r\nUID:synth-recurring-{i}\r\nSUMMARY:{ics_escape(title)}\r\n"
+                f"DTSTART{tz}:{ics_stamp(first)}\r\nDTEND{tz}:{ics_stamp(first + timedelta(minutes=minutes))}\r\n"
+                f"RRULE:{rule}\r\nEND:VEVENT\r\n"
+            )
+        for i in range(weeks):
+            week_start = start + timedelta(weeks=i)
+            n = max(0, int(rng.gauss(events_per_week, events_per_week * 0.2)))
+            for j in range(n):
+                evt = make_event(week_start, rng)
+                lines = [
+                    "BEGIN:VEVENT",
+                    f"UID:synth-{i}-{j}",
+                    f"SUMMARY:{ics_escape(rng.choice(TITLES))}",
+                ]
+                if evt["allday"]:
+                    day = evt["start"].date()
+                    lines += [f"DTSTART;VALUE=DATE:{day:%Y%m%d}", f"DTEND;VALUE=DATE:{day + timedelta(days=1):%Y%m%d}"]
+                else:
+                    lines += [f"DTSTART{tz}:{ics_stamp(evt['start'])}", f"DTEND{tz}:{ics_stamp(evt['end'])}"]
+                location, notes = rng.choice(LOCATIONS), rng.choice(NOTES)
+                if location:
+                    lines.append(f"LOCATION:{ics_escape(location)}")
+                if notes:
+                    lines.append(f"DESCRIPTION:{ics_escape(notes)}")
+                lines.append("END:VEVENT")
+                fh.write("\r\n".join(lines) + "\r\n")
+                singles += 1
+        fh.write("END:VCALENDAR\r\n")
+    return {
+        "weeks": weeks,
+        "start": start.isoformat(),
+        "end": (start + timedelta(weeks=weeks)).isoformat(),
+        "events": singles,
+        "recurring": len(RECURRING),
+        "ics_bytes": path.stat().st_size,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="生成仿 icalBuddy 的合成日历原始数据")
+    parser.add_argument("--out", required=True, help="输出目录（写入 <out>/raw/week-*.txt）")
+    parser.add_argument("--weeks", type=int, default=1, help="周数（1 周 ~ 520 周即 10 年），默认 1")
+    parser.add_argument("--start", help="起始周一 YYYY-MM-DD（默认使最后一周为本周）")
+    parser.add_argument("--events-per-week", type=int, default=60, help="每周平均事件数，默认 60")
+    parser.add_argument("--fallback-ratio", type=float, default=0.2, help="回退格式（@ 分隔）行的比例，默认 0.2")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    parser.add_argument("--format", choices=["raw", "ics"], default="raw", help="raw：icalBuddy 原始周文件；ics：单个 ICS 文件")
+    args = parser.parse_args()
+
+    if args.format == "ics":
+        start = date.fromisoformat(args.start) if args.start else None
+        print(json.dumps(generate_ics(Path(args.out), args.weeks, start, args.events_per_week, args.seed), ensure_ascii=False))
+        return 0
+    stats = generate(
+        Path(args.out),
+        args.weeks,
+        date.fromisoformat(args.start) if args.start else None,
+        args.events_per_week,
+        args.fallback_ratio,
+        args.seed,
+    )
+    print(json.dumps(stats, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -6,6 +6,31 @@ Usage examples:
   python scripts/export_bear_notes.py --tag system --output-dir output-system
   python scripts/export_bear_notes.py --ids 123,ABCDEF-UUID --output-dir output-test
   python scripts/export_bear_notes.py --since-days 1 --output-dir output-latest
+  python scripts/export_bear_notes.py --incremental --output-dir data/notes_export/all
+
+Incremental mode keeps <output-dir>/manifest.json (note_id, title, tags, updated_at, hash, path, and
+status: live / archived / trashed / deleted):
+unchanged notes are skipped, notes deleted/trashed in Bear since the last run are marked or removed,
+and every file is written atomically.
+
+Forward links match titles case/whitespace-insensitively and understand [[Title/Heading]] and
+[[Title|alias]]; --unlinked-mentions adds plain-text title mentions (see bear_links.py).
+
+--copy-attachments mirrors attachment files into <output-dir>/attachments (hardlink, reflink or
+copy_file_range before a streamed copy; unchanged size+mtime is skipped) and adds each file's
+local_path to the front matter, so the export is self-contained (see bear_attachments.py).
+
+--search-index keeps an SQLite FTS5 index of the exported notes up to date (default
+<output-dir>/search.sqlite); query it with bear_search.py.
+
+Notes are rendered serially by default: rendering is pure Python and holds the GIL, so threads
+only help when file writes dominate (slow or network disks). --workers N opts into a thread pool
+fed by a single streaming SQLite reader; files and the printed order are the same for any count. Progress goes to stderr
+at most once per --progress-interval seconds; --verbose lists every written path.
+
+Bear's database is only ever read: by default through a read-only URI inside one read
+transaction, so the whole export sees one consistent snapshot even while Bear is writing
+(--snapshot backup copies the DB to a temp file first; see BearSnapshot).
 
 Defaults assume Bear is installed at:
   DB:  ~/Library/Group Containers/9K33E3U3T4.net.shinyfrog.bear/Application Data/database.sqlite
@@ -14,13 +39,23 @@ Defaults assume Bear is installed at:
 
 import argparse
 import datetime
+import hashlib
 import json
 import os
 import pathlib
-import re
+import shutil
 import sqlite3
 import sys
-from typing import Dict, List, Optional
+import tempfile
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+from bear_attachments import METHODS as ATTACHMENT_METHODS, AttachmentMirror, attachment_items
+from bear_links import DEFAULT_MIN_MENTION_LENGTH, LinkResolver, bear_link, link_target_keys, normalize_title
+from bear_search import INDEX_NAME as SEARCH_INDEX_NAME, SearchIndex, document_from_meta
+from instrument import count, run_main, span
 
 
 DEFAULT_DB = os.path.expanduser(
@@ -30,6 +65,14 @@ DEFAULT_FILES_BASE = os.path.expanduser(
     "~/Library/Group Containers/9K33E3U3T4.net.shinyfrog.bear/Application Data/Local Files/Note Files"
 )
 EPOCH = datetime.datetime(2001, 1, 1)
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+DEFAULT_WORKERS = 1
+SNAPSHOT_MODES = ("readonly", "immutable", "backup")
+SNAPSHOT_MMAP_SIZE = 256 * 1024 * 1024
+SNAPSHOT_CACHE_KIB = 64 * 1024
+T = TypeVar("T")
+R = TypeVar("R")
 
 
 def apple_to_iso(ts: Optional[float]) -> Optional[str]:
@@ -38,127 +81,167 @@ def apple_to_iso(ts: Optional[float]) -> Optional[str]:
     return (EPOCH + datetime.timedelta(seconds=ts)).isoformat(timespec="seconds")
 
 
-def fetch_note_lookup(conn: sqlite3.Connection) -> Dict[int, Dict[str, Optional[str]]]:
-    lookup: Dict[int, Dict[str, Optional[str]]] = {}
+SELECTED_TABLE = "export_selected"
+LINK_TITLES_TABLE = "export_link_titles"
+IDS_TABLE = "export_ids"
+FETCH_BATCH = 500
+LINK_CACHE_NAME = ".links-cache.json"
+
+
+def _scope_join(column: str, scoped: bool) -> str:
+    return f"JOIN temp.{SELECTED_TABLE} sel ON sel.pk = {column}" if scoped else ""
+
+
+def fetch_title_index(
+    conn: sqlite3.Connection, keys: Optional[Iterable[str]] = None
+) -> Dict[str, List[Dict[str, Optional[str]]]]:
+    """
+    Title -> notes with that title. When `keys` (normalised link targets actually used) is given,
+    only titles normalising to one of them are returned.
+    """
     title_index: Dict[str, List[Dict[str, Optional[str]]]] = {}
-    for r in conn.execute(
-        "SELECT Z_PK, ZTITLE, ZUNIQUEIDENTIFIER FROM ZSFNOTE WHERE ZPERMANENTLYDELETED=0"
-    ):
-        pk, title, ident = r
-        lookup[pk] = {"title": title, "identifier": ident}
+    if keys is None:
+        sql = "SELECT ZTITLE, ZUNIQUEIDENTIFIER FROM ZSFNOTE WHERE ZPERMANENTLYDELETED=0 AND ZTITLE IS NOT NULL ORDER BY Z_PK"
+    else:
+        conn.create_function("bear_norm_title", 1, normalize_title, deterministic=True)
+        conn.execute(f"CREATE TEMP TABLE IF NOT EXISTS {LINK_TITLES_TABLE} (title_key TEXT PRIMARY KEY)")
+        conn.execute(f"DELETE FROM temp.{LINK_TITLES_TABLE}")
+        conn.executemany(f"INSERT OR IGNORE INTO temp.{LINK_TITLES_TABLE} (title_key) VALUES (?)", ((k,) for k in keys))
+        sql = f"""
+            SELECT n.ZTITLE, n.ZUNIQUEIDENTIFIER FROM ZSFNOTE n
+            JOIN temp.{LINK_TITLES_TABLE} lt ON lt.title_key = bear_norm_title(n.ZTITLE)
+            WHERE n.ZPERMANENTLYDELETED=0 AND n.ZTITLE IS NOT NULL
+            ORDER BY n.Z_PK
+        """
+    for title, ident in conn.execute(sql):
         if title:
             title_index.setdefault(title, []).append({"title": title, "identifier": ident})
-    return lookup, title_index
-
-
-def fetch_tags(conn: sqlite3.Connection) -> Dict[int, str]:
-    return {r["Z_PK"]: r["ZTITLE"] for r in conn.execute("SELECT Z_PK, ZTITLE FROM ZSFNOTETAG")}
+    return title_index
 
 
-def fetch_note_tags(conn: sqlite3.Connection, tags: Dict[int, str]) -> Dict[int, List[str]]:
+def fetch_note_tags(conn: sqlite3.Connection, scoped: bool = False) -> Dict[int, List[str]]:
     note_tags: Dict[int, List[str]] = {}
-    for r in conn.execute("SELECT Z_5NOTES as note_pk, Z_13TAGS as tag_pk FROM Z_5TAGS"):
-        if r["tag_pk"] in tags:
-            note_tags.setdefault(r["note_pk"], []).append(tags[r["tag_pk"]])
+    sql = f"""
+        SELECT nt.Z_5NOTES AS note_pk, t.ZTITLE AS tag FROM Z_5TAGS nt
+        JOIN ZSFNOTETAG t ON t.Z_PK = nt.Z_13TAGS
+        {_scope_join("nt.Z_5NOTES", scoped)}
+        ORDER BY nt.rowid
+    """
+    for r in conn.execute(sql):
+        note_tags.setdefault(r["note_pk"], []).append(r["tag"])
     return note_tags
 
 
-def fetch_backlinks(conn: sqlite3.Connection, note_lookup: Dict[int, Dict[str, Optional[str]]]):
+def fetch_backlinks(conn: sqlite3.Connection, scoped: bool = False):
     backlinks: Dict[int, List[Dict[str, Optional[str]]]] = {}
-    for r in conn.execute("SELECT ZLINKINGTO, ZLINKEDBY FROM ZSFNOTEBACKLINK"):
-        target, linker = r
-        if target in note_lookup and linker in note_lookup:
-            info = note_lookup[linker]
-            backlinks.setdefault(target, []).append(
-                {
-                    "title": info["title"],
-                    "identifier": info["identifier"],
-                    "bear_link": f"bear://x-callback-url/open-note?id={info['identifier']}"
-                    if info["identifier"]
-                    else None,
-                }
-            )
+    sql = f"""
+        SELECT b.ZLINKINGTO, src.ZTITLE, src.ZUNIQUEIDENTIFIER FROM ZSFNOTEBACKLINK b
+        {_scope_join("b.ZLINKINGTO", scoped)}
+        JOIN ZSFNOTE dst ON dst.Z_PK = b.ZLINKINGTO AND dst.ZPERMANENTLYDELETED=0
+        JOIN ZSFNOTE src ON src.Z_PK = b.ZLINKEDBY AND src.ZPERMANENTLYDELETED=0
+        ORDER BY b.rowid
+    """
+    for target, title, ident in conn.execute(sql):
+        backlinks.setdefault(target, []).append(
+            {"title": title, "identifier": ident, "bear_link": bear_link(ident)}
+        )
     return backlinks
 
 
-def fetch_attachments(conn: sqlite3.Connection, files_base: str) -> Dict[int, List[Dict[str, str]]]:
+def fetch_attachments(
+    conn: sqlite3.Connection, files_base: str, scoped: bool = False, local: bool = False
+) -> Dict[int, List[Dict[str, str]]]:
+    """Attachment paths per note; `local` adds the path the file gets inside the export (see bear_attachments.py)."""
     attachments: Dict[int, List[Dict[str, str]]] = {}
-    for r in conn.execute("SELECT ZNOTE, ZUNIQUEIDENTIFIER, ZFILENAME FROM ZSFNOTEFILE"):
+    sql = f"""
+        SELECT f.ZNOTE, f.ZUNIQUEIDENTIFIER, f.ZFILENAME FROM ZSFNOTEFILE f
+        {_scope_join("f.ZNOTE", scoped)}
+        ORDER BY f.rowid
+    """
+    for r in conn.execute(sql):
         note_pk, uid, fname = r
         if note_pk is None or uid is None or fname is None:
             continue
         path = os.path.join(files_base, uid, fname)
-        attachments.setdefault(note_pk, []).append(
-            {"path": path, "file_link": f"file://{path}"}
-        )
+        entry = {"path": path, "file_link": f"file://{path}"}
+        if local:
+            entry["local_path"] = AttachmentMirror.relative_path(uid, fname)
+        attachments.setdefault(note_pk, []).append(entry)
     return attachments
 
 
-def resolve_forward_links(text: str, title_index: Dict[str, List[Dict[str, Optional[str]]]]):
-    forward = []
-    for t in re.findall(r"\[\[(.+?)\]\]", text or ""):
-        matches = title_index.get(t, [])
-        forward.append(
-            {
-                "title": t,
-                "identifier": matches[0]["identifier"] if matches else None,
-                "bear_link": f"bear://x-callback-url/open-note?id={matches[0]['identifier']}"
-                if matches and matches[0]["identifier"]
-                else None,
-            }
-        )
-    return forward
+NOTE_COLUMNS = """
+    n.Z_PK, n.ZTITLE, n.ZTEXT, n.ZUNIQUEIDENTIFIER, n.ZCREATIONDATE, n.ZMODIFICATIONDATE,
+    n.ZARCHIVED, n.ZPINNED, n.ZTRASHED, n.ZPERMANENTLYDELETED, n.ZTODOCOMPLETED,
+    n.ZHASSOURCECODE, n.ZHASIMAGES, n.ZHASFILES, n.ZLASTEDITINGDEVICE, n.ZSUBTITLE
+"""
 
 
-def query_notes(
-    conn: sqlite3.Connection,
-    note_pks: List[int],
-) -> List[sqlite3.Row]:
-    placeholders = ",".join("?" for _ in note_pks)
+def query_notes(conn: sqlite3.Connection, scoped: bool, columns: str = NOTE_COLUMNS) -> Iterator[sqlite3.Row]:
+    """Stream selected notes from a cursor (never fetchall), in Z_PK order."""
     sql = f"""
-        SELECT Z_PK, ZTITLE, ZTEXT, ZUNIQUEIDENTIFIER, ZCREATIONDATE, ZMODIFICATIONDATE,
-               ZARCHIVED, ZPINNED, ZTRASHED, ZPERMANENTLYDELETED, ZTODOCOMPLETED,
-               ZHASSOURCECODE, ZHASIMAGES, ZHASFILES, ZLASTEDITINGDEVICE, ZSUBTITLE
-        FROM ZSFNOTE
-        WHERE Z_PK IN ({placeholders}) AND ZPERMANENTLYDELETED = 0
+        SELECT {columns}
+        FROM ZSFNOTE n
+        {_scope_join("n.Z_PK", scoped)}
+        WHERE n.ZPERMANENTLYDELETED = 0
+        ORDER BY n.Z_PK
     """
-    return conn.execute(sql, note_pks).fetchall()
+    cur = conn.execute(sql)
+    while True:
+        rows = cur.fetchmany(FETCH_BATCH)
+        if not rows:
+            break
+        yield from rows
 
 
 def select_note_pks(
     conn: sqlite3.Connection,
-    tags_map: Dict[int, List[str]],
-    tag_titles: Dict[int, str],
     tag_name: Optional[str],
     ids: Optional[List[str]],
     since_days: Optional[int],
-) -> List[int]:
-    pks: List[int] = []
+) -> int:
+    """
+    Fill the selection temp table for the given filter and return how many notes it holds.
+    Identifiers go through their own temp table, so no statement ever has more than a few parameters.
+    """
+    conn.execute(f"CREATE TEMP TABLE IF NOT EXISTS {SELECTED_TABLE} (pk INTEGER PRIMARY KEY)")
+    conn.execute(f"DELETE FROM temp.{SELECTED_TABLE}")
+    insert = f"INSERT OR IGNORE INTO temp.{SELECTED_TABLE} (pk) "
     if ids:
-        placeholders = ",".join("?" for _ in ids)
-        sql = f"SELECT Z_PK FROM ZSFNOTE WHERE ZPERMANENTLYDELETED=0 AND ZUNIQUEIDENTIFIER IN ({placeholders})"
-        pks = [r[0] for r in conn.execute(sql, ids)]
+        conn.execute(f"CREATE TEMP TABLE IF NOT EXISTS {IDS_TABLE} (ident TEXT PRIMARY KEY)")
+        conn.execute(f"DELETE FROM temp.{IDS_TABLE}")
+        conn.executemany(f"INSERT OR IGNORE INTO temp.{IDS_TABLE} (ident) VALUES (?)", ((i,) for i in ids))
+        conn.execute(
+            insert
+            + f"""SELECT n.Z_PK FROM ZSFNOTE n JOIN temp.{IDS_TABLE} i ON i.ident = n.ZUNIQUEIDENTIFIER
+            WHERE n.ZPERMANENTLYDELETED=0"""
+        )
     elif tag_name:
-        target = {tag_name, f"#{tag_name}", f"/{tag_name}"}
-        for note_pk, tag_list in tags_map.items():
-            if any(t in target for t in tag_list):
-                pks.append(note_pk)
+        conn.execute(
+            insert
+            + """SELECT n.Z_PK FROM ZSFNOTE n
+            JOIN Z_5TAGS nt ON nt.Z_5NOTES = n.Z_PK
+            JOIN ZSFNOTETAG t ON t.Z_PK = nt.Z_13TAGS
+            WHERE n.ZPERMANENTLYDELETED=0 AND t.ZTITLE IN (?, ?, ?)""",
+            (tag_name, f"#{tag_name}", f"/{tag_name}"),
+        )
     elif since_days is not None:
         since = datetime.datetime.now() - datetime.timedelta(days=since_days)
         since_apple = (since - EPOCH).total_seconds()
-        sql = """
-            SELECT Z_PK FROM ZSFNOTE
-            WHERE ZPERMANENTLYDELETED=0 AND ZMODIFICATIONDATE >= ?
-        """
-        pks = [r[0] for r in conn.execute(sql, (since_apple,))]
+        conn.execute(
+            insert + "SELECT Z_PK FROM ZSFNOTE WHERE ZPERMANENTLYDELETED=0 AND ZMODIFICATIONDATE >= ?",
+            (since_apple,),
+        )
     else:
-        pks = [r[0] for r in conn.execute("SELECT Z_PK FROM ZSFNOTE WHERE ZPERMANENTLYDELETED=0")]
-    return pks
+        return conn.execute("SELECT COUNT(*) FROM ZSFNOTE WHERE ZPERMANENTLYDELETED=0").fetchone()[0]
+    return conn.execute(f"SELECT COUNT(*) FROM temp.{SELECTED_TABLE}").fetchone()[0]
 
 
-def write_note(out_dir: pathlib.Path, note: sqlite3.Row, meta: Dict[str, object]):
-    filename = f"note-{note['ZUNIQUEIDENTIFIER'] or note['Z_PK']}.md"
-    out_path = out_dir / filename
+def note_filename(note: sqlite3.Row) -> str:
+    return f"note-{note['ZUNIQUEIDENTIFIER'] or note['Z_PK']}.md"
+
+
+def render_note(note: sqlite3.Row, meta: Dict[str, object]) -> str:
     lines = ["---"]
     for k, v in meta.items():
         if isinstance(v, list):
@@ -170,11 +253,300 @@ def write_note(out_dir: pathlib.Path, note: sqlite3.Row, meta: Dict[str, object]
         else:
             lines.append(f"{k}: {v}")
     lines.append("---")
-    content = "\n".join(lines) + "\n\n" + (note["ZTEXT"] or "")
-    out_path.write_text(content, encoding="utf-8")
+    return "\n".join(lines) + "\n\n" + (note["ZTEXT"] or "")
+
+
+def atomic_write_text(path: pathlib.Path, content: str) -> None:
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_text(content, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def write_note(out_dir: pathlib.Path, note: sqlite3.Row, meta: Dict[str, object]):
+    out_path = out_dir / note_filename(note)
+    atomic_write_text(out_path, render_note(note, meta))
     return out_path
 
 
+def load_manifest(out_dir: pathlib.Path) -> Dict[str, Dict[str, object]]:
+    path = out_dir / MANIFEST_NAME
+    if not path.exists():
+        return {}
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except ValueError:
+        sys.stderr.write(f"Ignoring unreadable manifest: {path}\n")
+        return {}
+    if data.get("version") != MANIFEST_VERSION:
+        return {}
+    return {entry["note_id"]: entry for entry in data.get("notes", [])}
+
+
+def save_manifest(out_dir: pathlib.Path, entries: Dict[str, Dict[str, object]]) -> None:
+    payload = {
+        "version": MANIFEST_VERSION,
+        "generated_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "notes": [entries[k] for k in sorted(entries)],
+    }
+    atomic_write_text(out_dir / MANIFEST_NAME, json.dumps(payload, ensure_ascii=False, indent=2))
+
+
+class BearSnapshot:
+    """
+    Read-only, point-in-time view of Bear's database for the whole export.
+
+    readonly   mode=ro URI and a single read transaction; in WAL mode Bear keeps writing while
+               every query here sees the same snapshot.
+    immutable  additionally immutable=1: no locks and no WAL reads, so only safe while Bear is closed.
+    backup     copy the database with SQLite's online backup API into a temp file, then read the copy.
+    """
+
+    def __init__(self, db_path: pathlib.Path, mode: str = "readonly") -> None:
+        if mode not in SNAPSHOT_MODES:
+            raise ValueError(f"unknown snapshot mode {mode!r}")
+        self.mode = mode
+        self.db_path = db_path
+        self.backup_bytes = 0
+        self._tmp_dir: Optional[str] = None
+        t0 = time.perf_counter()
+        uri = f"{db_path.resolve().as_uri()}?mode=ro"
+        if mode == "immutable":
+            uri += "&immutable=1"
+        elif mode == "backup":
+            self._tmp_dir = tempfile.mkdtemp(prefix="bear-snapshot-")
+            copy_path = pathlib.Path(self._tmp_dir) / "database.sqlite"
+            src = sqlite3.connect(uri, uri=True)
+            dst = sqlite3.connect(str(copy_path))
+            try:
+                # One step (pages=-1) holds a single read lock, so the copy is consistent.
+                src.backup(dst)
+            finally:
+                dst.close()
+                src.close()
+            self.backup_bytes = copy_path.stat().st_size
+            uri = f"{copy_path.as_uri()}?mode=ro"
+        # Autocommit mode: the explicit BEGIN below is the only transaction.
+        self.conn = sqlite3.connect(uri, uri=True, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute(f"PRAGMA mmap_size = {SNAPSHOT_MMAP_SIZE}")
+        self.conn.execute(f"PRAGMA cache_size = -{SNAPSHOT_CACHE_KIB}")
+        self.conn.execute("PRAGMA temp_store = MEMORY")
+        self.conn.execute("BEGIN")
+        # BEGIN is deferred; the first read pins the snapshot.
+        self.conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+        self.snapshot_seconds = time.perf_counter() - t0
+
+    def describe(self) -> str:
+        if self.mode == "backup":
+            return f"backup copy ({self.backup_bytes / 1e6:.1f} MB) taken in {self.snapshot_seconds:.2f}s"
+        return f"{self.mode} read transaction opened in {self.snapshot_seconds * 1000:.1f} ms"
+
+    def close(self) -> None:
+        if self.conn.in_transaction:
+            self.conn.execute("ROLLBACK")
+        self.conn.close()
+        if self._tmp_dir:
+            shutil.rmtree(self._tmp_dir, ignore_errors=True)
+
+    def __enter__(self) -> "BearSnapshot":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def note_status(trashed: object, archived: object, deleted: object = 0) -> str:
+    """'deleted' | 'trashed' | 'archived' | 'live', in that order of precedence."""
+    if deleted:
+        return "deleted"
+    if trashed:
+        return "trashed"
+    return "archived" if archived else "live"
+
+
+def fetch_note_states(conn: sqlite3.Connection) -> Dict[str, str]:
+    """Identifier -> 'live' | 'archived' | 'trashed' | 'deleted' for every note Bear still has a row for."""
+    states: Dict[str, str] = {}
+    for ident, trashed, archived, deleted in conn.execute(
+        "SELECT ZUNIQUEIDENTIFIER, ZTRASHED, ZARCHIVED, ZPERMANENTLYDELETED FROM ZSFNOTE WHERE ZUNIQUEIDENTIFIER IS NOT NULL"
+    ):
+        states[ident] = note_status(trashed, archived, deleted)
+    return states
+
+
+class IncrementalExport:
+    """
+    Write only notes whose content hash differs from the manifest, then reconcile notes that
+    disappeared from Bear. Notes are fed one at a time so the export never holds all contents.
+    """
+
+    def __init__(self, out_dir: pathlib.Path, on_delete: str) -> None:
+        self.out_dir = out_dir
+        self.on_delete = on_delete
+        self.manifest = load_manifest(out_dir)
+        self.exported_ids: set = set()
+        self.stats = {"written": 0, "unchanged": 0, "removed": 0, "marked": 0}
+        # add() runs on export workers; manifest/stats updates are serialised, file writes are not.
+        self._lock = threading.Lock()
+
+    def add(
+        self,
+        note_id: str,
+        title: Optional[str],
+        tags: List[str],
+        updated_at: Optional[float],
+        filename: str,
+        content: str,
+        status: str = "live",
+    ):
+        """Write the note if it changed; returns the written path or None when skipped. `status` is note_status()."""
+        digest = content_hash(content)
+        with self._lock:
+            self.exported_ids.add(note_id)
+            prev = self.manifest.get(note_id)
+        out_path = self.out_dir / filename
+        if prev and prev.get("hash") == digest and prev.get("updated_at") == updated_at and out_path.exists():
+            with self._lock:
+                self._set_status(prev, status)
+                self.stats["unchanged"] += 1
+            return None
+        atomic_write_text(out_path, content)
+        with self._lock:
+            entry = {
+                "note_id": note_id,
+                "title": title,
+                "tags": tags,
+                "updated_at": updated_at,
+                "hash": digest,
+                "path": filename,
+                "status": prev.get("status", status) if prev else status,
+            }
+            if prev and prev.get("status_changed_at"):
+                # A rewrite alone does not move the time the status last changed.
+                entry["status_changed_at"] = prev["status_changed_at"]
+            self._set_status(entry, status)
+            self.manifest[note_id] = entry
+            self.stats["written"] += 1
+        return out_path
+
+    @staticmethod
+    def _set_status(entry: Dict[str, object], status: str) -> bool:
+        if entry.get("status") == status:
+            return False
+        entry["status"] = status
+        entry["status_changed_at"] = datetime.datetime.now().isoformat(timespec="seconds")
+        return True
+
+    def finish(self, states: Dict[str, str]) -> Dict[str, int]:
+        for note_id, entry in list(self.manifest.items()):
+            if note_id in self.exported_ids:
+                # Exported this run (trashed ones re-rendered with `trashed: true`); add() recorded the status.
+                continue
+            state = states.get(note_id, "deleted")
+            if state in ("live", "archived"):
+                # Outside this run's selection: keep the file, but follow archiving/restoring in Bear.
+                self._set_status(entry, state)
+                continue
+            if self.on_delete == "remove":
+                (self.out_dir / str(entry["path"])).unlink(missing_ok=True)
+                del self.manifest[note_id]
+                self.stats["removed"] += 1
+            elif self._set_status(entry, state):
+                self.stats["marked"] += 1
+        save_manifest(self.out_dir, self.manifest)
+        return self.stats
+
+
+class Progress:
+    """Throttled progress line on stderr: at most one update per `interval` seconds."""
+
+    def __init__(self, total: int, interval: float, stream=sys.stderr) -> None:
+        self.total = total
+        self.interval = interval
+        self.stream = stream
+        self.done = 0
+        self.started = time.monotonic()
+        self._last = self.started
+
+    def tick(self, n: int = 1) -> None:
+        self.done += n
+        now = time.monotonic()
+        if self.interval >= 0 and now - self._last >= self.interval:
+            self._last = now
+            self._emit(now)
+
+    def finish(self) -> None:
+        if self.interval >= 0:
+            self._emit(time.monotonic())
+
+    def _emit(self, now: float) -> None:
+        elapsed = now - self.started
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        self.stream.write(f"[export] {self.done}/{self.total} notes, {elapsed:.1f}s ({rate:.0f}/s)\n")
+        self.stream.flush()
+
+
+def run_pipeline(items: Iterable[T], work: Callable[[T], R], workers: int) -> Iterator[R]:
+    """
+    Feed items from one producer (the SQLite cursor) to a thread pool and yield results in input
+    order. At most `workers * 4` items are in flight, so memory stays bounded on huge libraries.
+    """
+    if workers <= 1:
+        for item in items:
+            yield work(item)
+        return
+    from concurrent.futures import ThreadPoolExecutor  # only the parallel path needs it (~10ms import)
+
+    window = workers * 4
+    pending: deque = deque()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bear-export") as pool:
+        for item in items:
+            pending.append(pool.submit(work, item))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def build_meta(
+    note: sqlite3.Row,
+    resolver: LinkResolver,
+    note_tags_map: Dict[int, List[str]],
+    backlinks_map: Dict[int, List[Dict[str, Optional[str]]]],
+    attachments_map: Dict[int, List[Dict[str, str]]],
+    links: Optional[Tuple[list, list]] = None,
+) -> Dict[str, object]:
+    """Front matter for one note; `links` is a (forward, mentions) pair already resolved for it, if any."""
+    pk = note["Z_PK"]
+    forward_links, mentions = links if links is not None else resolver.resolve(note["ZTEXT"] or "", note["ZTITLE"])
+    meta = {
+        "title": note["ZTITLE"],
+        "subtitle": note["ZSUBTITLE"],
+        "identifier": note["ZUNIQUEIDENTIFIER"],
+        "creation_date": apple_to_iso(note["ZCREATIONDATE"]),
+        "modification_date": apple_to_iso(note["ZMODIFICATIONDATE"]),
+        "archived": bool(note["ZARCHIVED"]),
+        "pinned": bool(note["ZPINNED"]),
+        "trashed": bool(note["ZTRASHED"]),
+        "todo_completed": bool(note["ZTODOCOMPLETED"]),
+        "has_source_code": bool(note["ZHASSOURCECODE"]),
+        "has_images": bool(note["ZHASIMAGES"]),
+        "has_files": bool(note["ZHASFILES"]),
+        "last_editing_device": note["ZLASTEDITINGDEVICE"],
+        "tags": note_tags_map.get(pk, []),
+        "backlinks": backlinks_map.get(pk, []),
+        "forward_links": forward_links,
+        "attachments": attachments_map.get(pk, []),
+    }
+    if resolver.mentions:
+        meta["unlinked_mentions"] = mentions
+    return meta
+
+
 def main():
     parser = argparse.ArgumentParser(description="Export Bear notes to Markdown with links.")
     parser.add_argument("--tag", help="Filter by tag name (without #).")
@@ -187,6 +559,62 @@ def main():
         default=DEFAULT_FILES_BASE,
         help="Path to Bear 'Note Files' directory.",
     )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Skip notes unchanged since the last run (tracked in <output-dir>/manifest.json).",
+    )
+    parser.add_argument(
+        "--on-delete",
+        choices=["mark", "remove"],
+        default="mark",
+        help="Incremental mode: mark notes deleted/trashed in Bear in the manifest, or remove their files.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help="Render/write worker threads (default: 1 = serial; more only helps when writes are slow).",
+    )
+    parser.add_argument(
+        "--progress-interval",
+        type=float,
+        default=1.0,
+        help="Seconds between progress lines on stderr (negative disables).",
+    )
+    parser.add_argument("--verbose", action="store_true", help="Print every written file path.")
+    parser.add_argument(
+        "--unlinked-mentions",
+        action="store_true",
+        help="Also list plain-text mentions of other notes' titles (cached in <output-dir>/.links-cache.json).",
+    )
+    parser.add_argument(
+        "--min-mention-length",
+        type=int,
+        default=DEFAULT_MIN_MENTION_LENGTH,
+        help=f"Ignore titles shorter than this for unlinked mentions (default: {DEFAULT_MIN_MENTION_LENGTH}).",
+    )
+    parser.add_argument(
+        "--copy-attachments",
+        nargs="?",
+        const="auto",
+        choices=ATTACHMENT_METHODS,
+        help="Mirror attachment files into <output-dir>/attachments (default method: auto = hardlink, "
+        "then reflink, then copy).",
+    )
+    parser.add_argument(
+        "--search-index",
+        nargs="?",
+        const="",
+        help=f"Update the full-text search index (default path: <output-dir>/{SEARCH_INDEX_NAME}).",
+    )
+    parser.add_argument(
+        "--snapshot",
+        choices=SNAPSHOT_MODES,
+        default="readonly",
+        help="How to read Bear's DB: readonly (read-only URI, one read transaction; default), "
+        "immutable (no locking; only while Bear is closed) or backup (copy to a temp file first).",
+    )
     args = parser.parse_args()
 
     output_dir = pathlib.Path(args.output_dir)
@@ -197,49 +625,120 @@ def main():
         sys.stderr.write(f"DB not found: {db_path}\n")
         sys.exit(1)
 
-    conn = sqlite3.connect(str(db_path))
-    conn.row_factory = sqlite3.Row
+    with span("snapshot"):
+        snapshot = BearSnapshot(db_path, args.snapshot)
+    with snapshot:
+        print(f"Snapshot: {snapshot.describe()}")
+        export(args, snapshot.conn, output_dir)
 
-    note_lookup, title_index = fetch_note_lookup(conn)
-    tag_titles = fetch_tags(conn)
-    note_tags_map = fetch_note_tags(conn, tag_titles)
-    backlinks_map = fetch_backlinks(conn, note_lookup)
-    attachments_map = fetch_attachments(conn, args.attachments_dir)
 
+def export(args: argparse.Namespace, conn: sqlite3.Connection, output_dir: pathlib.Path) -> None:
+    """Run the export against an open (snapshot) connection."""
     ids = [s.strip() for s in args.ids.split(",")] if args.ids else None
-    note_pks = select_note_pks(conn, note_tags_map, tag_titles, args.tag, ids, args.since_days)
-    if not note_pks:
+    with span("selection"):
+        selected_count = select_note_pks(conn, args.tag, ids, args.since_days)
+    count("notes.selected", selected_count)
+    if not selected_count and not args.incremental:
         print("No notes found for given filters.")
-        sys.exit(0)
-
-    notes = query_notes(conn, note_pks)
-    for note in notes:
-        pk = note["Z_PK"]
-        forward_links = resolve_forward_links(note["ZTEXT"] or "", title_index)
-        meta = {
-            "title": note["ZTITLE"],
-            "subtitle": note["ZSUBTITLE"],
-            "identifier": note["ZUNIQUEIDENTIFIER"],
-            "creation_date": apple_to_iso(note["ZCREATIONDATE"]),
-            "modification_date": apple_to_iso(note["ZMODIFICATIONDATE"]),
-            "archived": bool(note["ZARCHIVED"]),
-            "pinned": bool(note["ZPINNED"]),
-            "trashed": bool(note["ZTRASHED"]),
-            "todo_completed": bool(note["ZTODOCOMPLETED"]),
-            "has_source_code": bool(note["ZHASSOURCECODE"]),
-            "has_images": bool(note["ZHASIMAGES"]),
-            "has_files": bool(note["ZHASFILES"]),
-            "last_editing_device": note["ZLASTEDITINGDEVICE"],
-            "tags": note_tags_map.get(pk, []),
-            "backlinks": backlinks_map.get(pk, []),
-            "forward_links": forward_links,
-            "attachments": attachments_map.get(pk, []),
-        }
-        out_path = write_note(output_dir, note, meta)
-        print(out_path)
-
-    conn.close()
+        return
+
+    # Only a filter-free run needs every row; otherwise metadata loaders join the selected set.
+    full_library = not (ids or args.tag or args.since_days is not None)
+    scoped = not full_library
+
+    with span("lookups"):
+        if scoped and not args.unlinked_mentions:
+            # Extra streaming pass over the text only, so the title lookup covers just the link targets used.
+            title_index = fetch_title_index(conn, link_target_keys(r["ZTEXT"] for r in query_notes(conn, scoped, "n.ZTEXT")))
+        else:
+            title_index = fetch_title_index(conn)
+        resolver = LinkResolver(
+            title_index,
+            mentions=args.unlinked_mentions,
+            min_mention_length=args.min_mention_length,
+            cache_path=output_dir / LINK_CACHE_NAME if args.unlinked_mentions else None,
+        )
+        note_tags_map = fetch_note_tags(conn, scoped)
+        backlinks_map = fetch_backlinks(conn, scoped)
+        attachments_map = fetch_attachments(conn, args.attachments_dir, scoped, local=bool(args.copy_attachments))
+    if args.copy_attachments:
+        mirror = AttachmentMirror(output_dir, args.copy_attachments)
+        items = attachment_items(attachments_map)
+        try:
+            with span("attachments"):
+                for _ in run_pipeline(items, mirror.sync_one, args.workers):
+                    pass
+        except OSError as exc:
+            mirror.save_state()
+            sys.stderr.write(f"Attachment export failed ({args.copy_attachments}): {exc}\n")
+            sys.exit(1)
+        if full_library:
+            mirror.prune(rel for _, rel in items)
+        mirror.save_state()
+        print("Attachments: " + ", ".join(f"{v} {k}" for k, v in mirror.stats.items()))
+    incremental = IncrementalExport(output_dir, args.on_delete) if args.incremental else None
+    search = None
+    if args.search_index is not None:
+        search = SearchIndex(pathlib.Path(args.search_index) if args.search_index else output_dir / SEARCH_INDEX_NAME)
+
+    def export_one(note: sqlite3.Row):
+        """Render and write one note; returns (written path or None, search document or None)."""
+        with span("render"):
+            meta = build_meta(note, resolver, note_tags_map, backlinks_map, attachments_map)
+            filename = note_filename(note)
+            content = render_note(note, meta)
+        count("chars_rendered", len(content))
+        if incremental:
+            out_path = incremental.add(
+                note["ZUNIQUEIDENTIFIER"] or str(note["Z_PK"]),
+                note["ZTITLE"],
+                meta["tags"],
+                note["ZMODIFICATIONDATE"],
+                filename,
+                content,
+                note_status(note["ZTRASHED"], note["ZARCHIVED"]),
+            )
+        else:
+            out_path = output_dir / filename
+            with span("write"):
+                atomic_write_text(out_path, content)
+        doc = document_from_meta(meta, note["ZTEXT"] or "", filename, content_hash(content)) if search else None
+        return out_path, doc
+
+    progress = Progress(selected_count, args.progress_interval)
+    written = 0
+    with span("export"):
+        for out_path, doc in run_pipeline(query_notes(conn, scoped), export_one, args.workers):
+            progress.tick()
+            if doc:
+                # SQLite writes stay on this thread; workers only build the documents.
+                with span("search.upsert"):
+                    search.upsert(doc)
+            if out_path:
+                written += 1
+                if args.verbose:
+                    print(out_path)
+    progress.finish()
+    count("notes.written", written)
+    resolver.save_cache(prune=full_library)
+    if search:
+        if full_library:
+            search.prune()
+        else:
+            search.remove(n for n, state in fetch_note_states(conn).items() if state == "deleted")
+        search.commit()
+        search.close()
+        print(f"Search index: {search.stats['indexed']} indexed, {search.stats['unchanged']} unchanged, {search.stats['removed']} removed")
+
+    if not incremental:
+        print(f"Exported {written} note(s) to {output_dir}")
+    else:
+        stats = incremental.finish(fetch_note_states(conn))
+        print(
+            f"Incremental export: {stats['written']} written, {stats['unchanged']} unchanged, "
+            f"{stats['removed']} removed, {stats['marked']} marked"
+        )
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(run_main("export_bear_notes", main))
@@ -3,6 +3,7 @@
 Pull ActivityWatch aw-watcher-web events for a given date and write a simple aggregate.
 - Defaults to local API at http://localhost:5600/api/0
 - Looks for buckets containing "aw-watcher-web"
+- --format awc writes the compact columnar file instead (see aw_columnar.py)
 """
 
 from __future__ import annotations
@@ -14,9 +15,10 @@ import sys
 from datetime import date, datetime, timedelta, timezone
 from pathlib import Path
 from typing import Any, Dict, List
-from urllib.error import URLError, HTTPError
 from urllib.parse import urlencode
-from urllib.request import urlopen
+
+from aw_columnar import write_columnar
+from instrument import count, run_main, span
 
 
 def iso_utc(dt: datetime) -> str:
@@ -26,8 +28,15 @@ def iso_utc(dt: datetime) -> str:
 
 
 def fetch_json(url: str) -> Any:
-    with urlopen(url) as resp:
-        return json.loads(resp.read().decode("utf-8"))
+    # urllib.request pulls in http.client/email (~40ms); only pay for it when actually fetching
+    from urllib.request import urlopen
+
+    with span("http"):
+        with urlopen(url) as resp:
+            body = resp.read()
+    count("bytes_fetched", len(body))
+    with span("json_parse"):
+        return json.loads(body.decode("utf-8"))
 
 
 def list_buckets(base_url: str) -> List[str]:
@@ -68,7 +77,13 @@ def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Fetch ActivityWatch web watcher events for a date.")
     parser.add_argument("--date", dest="day", default=str(date.today()), help="Date YYYY-MM-DD (default: today)")
     parser.add_argument("--base-url", default=os.environ.get("AW_URL", "http://localhost:5600/api/0"), help="ActivityWatch API base")
-    parser.add_argument("--output", help="Output path (default: data/activitywatch/<date>.json)")
+    parser.add_argument("--output", help="Output path (default: data/activitywatch/<date>.json or .awc)")
+    parser.add_argument(
+        "--format",
+        choices=["json", "awc", "both"],
+        default="json",
+        help="On-disk format: pretty JSON, columnar .awc, or both (default: json)",
+    )
     parser.add_argument("--bucket-substring", default="aw-watcher-web", help="Bucket id substring to match")
     return parser.parse_args()
 
@@ -84,10 +99,12 @@ def main() -> int:
     start_dt = datetime.combine(target_day, datetime.min.time()).replace(tzinfo=timezone.utc)
     end_dt = start_dt + timedelta(days=1)
     output_path = Path(args.output) if args.output else Path("data/activitywatch") / f"{args.day}.json"
+    if args.format == "awc" and not args.output:
+        output_path = output_path.with_suffix(".awc")
 
     try:
         buckets = list_buckets(args.base_url)
-    except (URLError, HTTPError) as exc:
+    except OSError as exc:  # URLError/HTTPError are OSError subclasses
         print(f"Failed to list buckets from {args.base_url}: {exc}", file=sys.stderr)
         return 1
 
@@ -100,10 +117,13 @@ def main() -> int:
     for bucket_id in buckets:
         try:
             events = fetch_events(args.base_url, bucket_id, start_dt, end_dt)
-        except (URLError, HTTPError) as exc:
+        except OSError as exc:  # URLError/HTTPError are OSError subclasses
             print(f"Failed to fetch events for {bucket_id}: {exc}", file=sys.stderr)
             continue
-        results.append({"bucket": bucket_id, "aggregate": aggregate(events), "events": events})
+        count("events", len(events))
+        with span("aggregate"):
+            summary = aggregate(events)
+        results.append({"bucket": bucket_id, "aggregate": summary, "events": events})
 
     payload = {
         "source": "activitywatch",
@@ -113,10 +133,19 @@ def main() -> int:
         "generated_at": iso_utc(datetime.now(timezone.utc)),
     }
 
-    save_json(output_path, payload)
-    print(f"Wrote {output_path} with {len(results)} bucket(s)")
+    if args.format in ("json", "both"):
+        with span("write.json"):
+            save_json(output_path, payload)
+        count("bytes_written", output_path.stat().st_size)
+        print(f"Wrote {output_path} with {len(results)} bucket(s)")
+    if args.format in ("awc", "both"):
+        awc_path = output_path if args.format == "awc" else output_path.with_suffix(".awc")
+        with span("write.awc"):
+            write_columnar(awc_path, payload)
+        count("bytes_written", awc_path.stat().st_size)
+        print(f"Wrote {awc_path} with {len(results)} bucket(s)")
     return 0
 
 
 if __name__ == "__main__":
-    sys.exit(main())
+    sys.exit(run_main("fetch_aw", main))
@@ -6,6 +6,7 @@
 - 解析输出：data/calendar/week-<ISO周>.json
 - 日志：data/calendar/fetch_calendar.log（每次运行重置）
 支持 yesterday/today/绝对日期；支持 sample-day 小范围验证。
+解析结果为 calendar_event.Event（时间已是 epoch，日历名 intern），写周文件时才转成 dict。
 """
 
 from __future__ import annotations
@@ -13,11 +14,13 @@ from __future__ import annotations
 import argparse
 import json
 import re
-import subprocess
 from datetime import date, datetime, timedelta, timezone, time
 from pathlib import Path
 from typing import List, Dict, Any
 
+from calendar_event import Event, as_dicts
+from instrument import count, run_main, span
+
 BASE = Path(__file__).resolve().parent.parent
 OUT_DIR = BASE / "data" / "calendar"
 RAW_DIR = OUT_DIR / "raw"
@@ -25,8 +28,11 @@ LOG_FILE = OUT_DIR / "fetch_calendar.log"
 
 
 def log(msg: str) -> None:
-    LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
-    LOG_FILE.write_text((LOG_FILE.read_text() if LOG_FILE.exists() else "") + msg + "\n", encoding="utf-8")
+    with span("log"):
+        LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
+        # 追加写；原先每条都读回整个日志再重写，全年抓取时是平方级开销
+        with LOG_FILE.open("a", encoding="utf-8") as f:
+            f.write(msg + "\n")
 
 
 def iso_week_str(d: date) -> str:
@@ -59,7 +65,11 @@ def run_icalbuddy(start_day: date, end_day: date, include_cals: List[str] | None
     if exclude_cals:
         cmd[1:1] = ["-ec", ",".join(exclude_cals)]
     log(f"[cmd] {' '.join(cmd)}")
-    proc = subprocess.run(cmd, text=True, capture_output=True)
+    import subprocess  # 只有真正调用 icalBuddy 时才需要；import_ics 等只借用解析函数
+
+    with span("icalbuddy"):
+        proc = subprocess.run(cmd, text=True, capture_output=True)
+    count("icalbuddy.stdout_chars", len(proc.stdout or ""))
     if proc.stderr.strip():
         log(f"[stderr] {proc.stderr.strip()}")
     if proc.returncode != 0:
@@ -169,12 +179,12 @@ def split_location_notes(tail_parts: List[str]) -> tuple[str, str]:
     return location, notes
 
 
-def parse_lines(lines: List[str], sample_day: date | None) -> List[Dict[str, Any]]:
+def parse_lines(lines: List[str], sample_day: date | None) -> List[Event]:
     tz = datetime.now().astimezone().tzinfo or timezone.utc
     today = date.today()
     yesterday = today - timedelta(days=1)
 
-    events: List[Dict[str, Any]] = []
+    events: List[Event] = []
     total_lines = len(lines)
     skip_count = 0
     for raw in lines:
@@ -193,15 +203,7 @@ def parse_lines(lines: List[str], sample_day: date | None) -> List[Dict[str, Any
             else:
                 start_dt, end_dt, allday_flag = dt_span
                 allday_flag = allday_flag or str(allday_txt).lower() in ["yes", "true"]
-                parsed = {
-                    "title": title,
-                    "calendar": cal_name,
-                    "start": start_dt.isoformat(),
-                    "end": end_dt.isoformat(),
-                    "allday": allday_flag,
-                    "location": clean_value(location),
-                    "notes": clean_value(notes),
-                }
+                parsed = Event.from_datetimes(title, cal_name, start_dt, end_dt, allday_flag, clean_value(location), clean_value(notes))
         else:
             title_part, sep, rest = line.partition("@")
             if not sep:
@@ -217,29 +219,55 @@ def parse_lines(lines: List[str], sample_day: date | None) -> List[Dict[str, Any
                     start_dt, end_dt, allday_flag = dt_span
                     location, notes = split_location_notes(tail_parts)
                     title_clean, cal_name = split_title_and_calendar(title_part)
-                    parsed = {
-                        "title": title_clean,
-                        "calendar": cal_name,
-                        "start": start_dt.isoformat(),
-                        "end": end_dt.isoformat(),
-                        "allday": allday_flag,
-                        "location": location,
-                        "notes": notes,
-                    }
+                    parsed = Event.from_datetimes(title_clean, cal_name, start_dt, end_dt, allday_flag, location, notes)
 
         if not parsed:
             skip_count += 1
             continue
 
-        if sample_day and datetime.fromisoformat(parsed["start"]).date() != sample_day:
+        if sample_day and parsed.wall()[0] != sample_day.isoformat():
             continue
 
         events.append(parsed)
 
+    count("lines", total_lines)
+    count("lines.skipped", skip_count)
     log(f"[parsed events] {len(events)} / {total_lines} (skipped {skip_count})")
     return events
 
 
+def week_payload(
+    week_start: date,
+    events: List[Any],
+    allow_cals: List[str] | None,
+    exclude_cals: List[str] | None,
+    source: str = "icalbuddy",
+) -> Dict[str, Any]:
+    week_end = week_start + timedelta(days=7)
+    return {
+        "week": iso_week_str(week_start),
+        "start": datetime.combine(week_start, datetime.min.time(), tzinfo=timezone.utc).isoformat(),
+        "end": datetime.combine(week_end, datetime.min.time(), tzinfo=timezone.utc).isoformat(),
+        "events": as_dicts(events),
+        "count": len(events),
+        "source": source,
+        "calendars": allow_cals or "all",
+        "excluded_calendars": exclude_cals or [],
+    }
+
+
+def write_week(out_dir: Path, payload: Dict[str, Any]) -> Path:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    out_path = out_dir / f"week-{payload['week']}.json"
+    if out_path.exists():
+        out_path.unlink()
+    with span("write"):
+        text = json.dumps(payload, ensure_ascii=False, indent=2)
+        out_path.write_text(text, encoding="utf-8")
+    count("bytes_written", len(text.encode("utf-8")))
+    return out_path
+
+
 def main() -> int:
     parser = argparse.ArgumentParser(description="抓取一周内的日历事件并写入 data/calendar/")
     parser.add_argument("--start", help="周起始日期 YYYY-MM-DD（默认本周周一）")
@@ -269,34 +297,23 @@ def main() -> int:
         raw_path = RAW_DIR / f"week-{iso_week_str(week_start)}.txt"
         if raw_path.exists():
             raw_path.unlink()
-        raw_path.write_text("\n".join(lines), encoding="utf-8")
+        with span("write.raw"):
+            raw_path.write_text("\n".join(lines), encoding="utf-8")
         log(f"[raw saved] {raw_path}")
 
-        events = parse_lines(lines, sample_day)
+        with span("parse"):
+            events = parse_lines(lines, sample_day)
+        count("events", len(events))
 
         if allow_cals:
-            filtered = [e for e in events if any(cal in e["calendar"] for cal in allow_cals)]
+            filtered = [e for e in events if any(cal in e.calendar for cal in allow_cals)]
             if filtered:
                 events = filtered
             else:
                 log(f"[warn] 过滤后无事件，保留全部，filters={allow_cals}, total={len(events)}")
 
-        payload = {
-            "week": iso_week_str(week_start),
-            "start": datetime.combine(week_start, datetime.min.time(), tzinfo=timezone.utc).isoformat(),
-            "end": datetime.combine(week_end, datetime.min.time(), tzinfo=timezone.utc).isoformat(),
-            "events": events,
-            "count": len(events),
-            "source": "icalbuddy",
-            "calendars": allow_cals or "all",
-            "excluded_calendars": exclude_cals or [],
-        }
-
-        OUT_DIR.mkdir(parents=True, exist_ok=True)
-        out_path = OUT_DIR / f"week-{iso_week_str(week_start)}.json"
-        if out_path.exists():
-            out_path.unlink()
-        out_path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+        payload = week_payload(week_start, events, allow_cals, exclude_cals)
+        out_path = write_week(OUT_DIR, payload)
         print(f"写入完成：{out_path}（{len(events)} 条事件）")
         log(f"[done] {out_path} ({len(events)} events)")
         if args.debug:
@@ -318,4 +335,4 @@ def main() -> int:
 
 
 if __name__ == "__main__":
-    raise SystemExit(main())
+    raise SystemExit(run_main("fetch_calendar", main))
@@ -0,0 +1,457 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Apple Reminders 导入（增量）：读取 Reminders 的 SQLite 存储或 reminders-cli 的 JSON 导出，归一化为任务 JSON，
+供 build_weekly 按周合并。
+- 变更跟踪：本地任务库 <out-dir>/reminders.sqlite 记录每条提醒的修改戳（ZLASTMODIFIEDDATE / lastModified）。
+  每次只扫源里的 (id, 修改戳) 两列，戳不同的才取整行；源里消失或被标记删除的从任务库删掉。
+  本次没有读取的源（如去掉了某个 --db）视为已移除，其任务一并删掉，相应周文件重写。
+- 输出：<out-dir>/week-<ISO周>.json（该周到期或完成的任务 + 完成统计），只重写本次变更涉及的周（改动前后的周都算）。
+- 索引：任务库对到期时间、完成时间各建索引，按日/周/月/年统计完成情况只做区间查询，不必全表扫描
+  （--stats week|month|year 直接打印）。
+- 源：默认读取 ~/Library/Group Containers/group.com.apple.reminders/Container_v1/Stores/Data-*.sqlite（每个账户一个），
+  以只读 URI 在单个读事务内读取；--export 指定 JSON 导出（缺省时若存在 data/reminders/export.json 也会读取）。
+  Linux 上可用 reminders_synth.py 生成同结构的合成存储。
+
+用法示例：
+  python scripts/fetch_reminders.py
+  python scripts/fetch_reminders.py --db /tmp/rem/Data-TEST.sqlite --out-dir /tmp/rem/out
+  python scripts/fetch_reminders.py --export data/reminders/export.json --full
+  python scripts/fetch_reminders.py --stats month --date 2026-03-15
+"""
+
+from __future__ import annotations
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sqlite3
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from instrument import count, run_main, span
+from mood_index import iso_week_label
+
+BASE = Path(__file__).resolve().parent.parent
+DEFAULT_OUT_DIR = BASE / "data" / "reminders"
+DEFAULT_EXPORT = DEFAULT_OUT_DIR / "export.json"
+STORE_GLOB = os.path.expanduser("~/Library/Group Containers/group.com.apple.reminders/Container_v1/Stores/Data-*.sqlite")
+DB_NAME = "reminders.sqlite"
+APPLE_EPOCH = 978307200  # Core Data 时间戳（2001-01-01 起的秒数）→ Unix 秒
+FETCH_BATCH = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    stamp TEXT NOT NULL,
+    list TEXT,
+    title TEXT,
+    notes TEXT,
+    due TEXT,
+    due_ts REAL,
+    allday INTEGER,
+    completed INTEGER,
+    completed_at TEXT,
+    completed_ts REAL,
+    priority INTEGER,
+    flagged INTEGER,
+    created TEXT,
+    parent TEXT
+);
+CREATE INDEX IF NOT EXISTS tasks_source ON tasks (source);
+CREATE INDEX IF NOT EXISTS tasks_due ON tasks (due_ts);
+CREATE INDEX IF NOT EXISTS tasks_completed ON tasks (completed_ts);
+"""
+TASK_FIELDS = ("id", "source", "stamp", "list", "title", "notes", "due", "due_ts", "allday", "completed", "completed_at", "completed_ts", "priority", "flagged", "created", "parent")
+# 周文件里输出的字段（内部列 source/stamp/*_ts 不输出）
+JSON_FIELDS = ("id", "title", "list", "notes", "due", "allday", "completed", "completed_at", "priority", "flagged", "created", "parent")
+
+
+def local_time(unix_ts: Optional[float]) -> Tuple[Optional[str], Optional[float]]:
+    """Unix 秒 → (本地时间 ISO, Unix 秒)；与日历数据一样以本机时区的无时区时间表示。"""
+    if unix_ts is None:
+        return None, None
+    return datetime.fromtimestamp(unix_ts).isoformat(timespec="seconds"), float(unix_ts)
+
+
+def apple_time(ts: Optional[float]) -> Tuple[Optional[str], Optional[float]]:
+    return local_time(ts + APPLE_EPOCH if ts is not None else None)
+
+
+def iso_time(value: Optional[str]) -> Tuple[Optional[str], Optional[float]]:
+    """reminders-cli 的 ISO 时间（可带 Z / 偏移，无时区按本地）→ (本地 ISO, Unix 秒)。"""
+    if not value:
+        return None, None
+    try:
+        dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None, None
+    return local_time(dt.timestamp())
+
+
+def week_labels(task: Dict[str, Any]) -> Set[str]:
+    """任务出现在哪些周：到期所在周与完成所在周。"""
+    return {iso_week_label(datetime.fromtimestamp(ts).date()) for ts in (task.get("due_ts"), task.get("completed_ts")) if ts is not None}
+
+
+# -- 源：Reminders SQLite 存储 -----------------------------------------------
+
+
+class ReminderStore:
+    """一个 Data-*.sqlite 的只读快照（mode=ro + 单个读事务，Reminders 同时写入也读到一致视图）。"""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.source = str(path)
+        self.conn = sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("BEGIN")
+        # 不同 macOS 版本的列不完全一样，缺的列按 NULL 读
+        self.columns = {row["name"] for row in self.conn.execute("PRAGMA table_info(ZREMCDREMINDER)")}
+        if not self.columns:
+            raise sqlite3.DatabaseError(f"{path} 中没有 ZREMCDREMINDER 表")
+
+    def close(self) -> None:
+        if self.conn.in_transaction:
+            self.conn.execute("ROLLBACK")
+        self.conn.close()
+
+    def _col(self, name: str, alias: str = "r") -> str:
+        return f"{alias}.{name}" if name in self.columns else "NULL"
+
+    def _id_expr(self, alias: str = "r") -> str:
+        # 本地账户没有 CloudKit 标识，退回 <存储名>:<主键>
+        prefix = self.path.stem.replace("'", "")
+        return f"COALESCE({self._col('ZCKIDENTIFIER', alias)}, '{prefix}:' || {alias}.Z_PK)"
+
+    def _live(self, alias: str) -> str:
+        """排除已标记删除（等待同步清理）的行的条件，以 AND 开头；旧版本没有该列时为空。"""
+        if "ZMARKEDFORDELETION" not in self.columns:
+            return ""
+        return f" AND COALESCE({alias}.ZMARKEDFORDELETION, 0) = 0"
+
+    def stamps(self) -> Dict[str, Tuple[int, str]]:
+        """{id: (主键, 修改戳)}，只读两三列。"""
+        sql = f"SELECT r.Z_PK, {self._id_expr()} AS id, {self._col('ZLASTMODIFIEDDATE')} AS modified FROM ZREMCDREMINDER r WHERE 1{self._live('r')}"
+        return {row["id"]: (row["Z_PK"], repr(row["modified"])) for row in self.conn.execute(sql)}
+
+    def fetch(self, pks: List[int], stamps: Dict[int, str]) -> Iterator[Dict[str, Any]]:
+        c = self._col
+        select = (
+            f"SELECT r.Z_PK AS pk, {self._id_expr()} AS id, {c('ZTITLE')} AS title, {c('ZNOTES')} AS notes, "
+            f"l.ZNAME AS list, {c('ZCOMPLETED')} AS completed, {c('ZCOMPLETIONDATE')} AS completion, "
+            f"{c('ZDUEDATE')} AS due, {c('ZALLDAY')} AS allday, {c('ZPRIORITY')} AS priority, {c('ZFLAGGED')} AS flagged, "
+            f"{c('ZCREATIONDATE')} AS created, "
+            + (f"{self._id_expr('p')} AS parent " if "ZPARENTREMINDER" in self.columns else "NULL AS parent ")
+            + "FROM ZREMCDREMINDER r "
+            + (f"LEFT JOIN ZREMCDBASELIST l ON l.Z_PK = {c('ZLIST')} " if "ZLIST" in self.columns else "LEFT JOIN (SELECT NULL AS ZNAME) l ON 0 ")
+            + (f"LEFT JOIN ZREMCDREMINDER p ON p.Z_PK = r.ZPARENTREMINDER{self._live('p')} " if "ZPARENTREMINDER" in self.columns else "")
+        )
+        for i in range(0, len(pks), FETCH_BATCH):
+            batch = pks[i : i + FETCH_BATCH]
+            rows = self.conn.execute(select + f"WHERE r.Z_PK IN ({','.join('?' for _ in batch)})", batch)
+            for row in rows:
+                due, due_ts = apple_time(row["due"])
+                done_at, done_ts = apple_time(row["completion"]) if row["completed"] else (None, None)
+                yield {
+                    "id": row["id"],
+                    "source": self.source,
+                    "stamp": stamps[row["pk"]],
+                    "list": row["list"],
+                    "title": row["title"] or "",
+                    "notes": row["notes"] or "",
+                    "due": due,
+                    "due_ts": due_ts,
+                    "allday": bool(row["allday"]),
+                    "completed": bool(row["completed"]),
+                    "completed_at": done_at,
+                    "completed_ts": done_ts,
+                    "priority": int(row["priority"] or 0),
+                    "flagged": bool(row["flagged"]),
+                    "created": apple_time(row["created"])[0],
+                    "parent": row["parent"],
+                }
+
+
+# -- 源：reminders-cli JSON 导出 ----------------------------------------------
+
+
+def load_export(path: Path) -> Dict[str, Dict[str, Any]]:
+    """导出文件只能整份解析；归一化后的任务按 id 返回，修改戳取 lastModified，缺失时取条目内容哈希。"""
+    items = json.loads(path.read_text(encoding="utf-8"))
+    if isinstance(items, dict):
+        items = items.get("reminders") or []
+    tasks: Dict[str, Dict[str, Any]] = {}
+    for item in items:
+        raw = json.dumps(item, ensure_ascii=False, sort_keys=True)
+        task_id = str(item.get("externalId") or item.get("id") or hashlib.sha1(raw.encode("utf-8")).hexdigest())
+        due, due_ts = iso_time(item.get("dueDate"))
+        done_at, done_ts = iso_time(item.get("completionDate")) if item.get("isCompleted") else (None, None)
+        due_raw = str(item.get("dueDate") or "")
+        tasks[task_id] = {
+            "id": task_id,
+            "source": str(path),
+            "stamp": str(item.get("lastModified") or hashlib.sha1(raw.encode("utf-8")).hexdigest()),
+            "list": item.get("list"),
+            "title": item.get("title") or "",
+            "notes": item.get("notes") or "",
+            "due": due,
+            "due_ts": due_ts,
+            # reminders-cli 对全天提醒只给日期
+            "allday": bool(due_raw) and "T" not in due_raw,
+            "completed": bool(item.get("isCompleted")),
+            "completed_at": done_at,
+            "completed_ts": done_ts,
+            "priority": int(item.get("priority") or 0),
+            "flagged": bool(item.get("flagged")),
+            "created": iso_time(item.get("creationDate"))[0],
+            "parent": item.get("parentId"),
+        }
+    return tasks
+
+
+# -- 本地任务库 --------------------------------------------------------------
+
+
+class TaskDB:
+    """归一化任务 + 修改戳；到期 / 完成时间带索引，区间统计走索引。"""
+
+    def __init__(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(path))
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.commit()
+        self.conn.close()
+
+    def stamps(self, source: str) -> Dict[str, str]:
+        return {row["id"]: row["stamp"] for row in self.conn.execute("SELECT id, stamp FROM tasks WHERE source = ?", (source,))}
+
+    def weeks_of(self, ids: Iterable[str]) -> Set[str]:
+        ids = list(ids)
+        weeks: Set[str] = set()
+        for i in range(0, len(ids), FETCH_BATCH):
+            batch = ids[i : i + FETCH_BATCH]
+            for row in self.conn.execute(f"SELECT due_ts, completed_ts FROM tasks WHERE id IN ({','.join('?' for _ in batch)})", batch):
+                weeks |= week_labels(dict(row))
+        return weeks
+
+    def upsert(self, tasks: Iterable[Dict[str, Any]]) -> int:
+        rows = [tuple(task[f] for f in TASK_FIELDS) for task in tasks]
+        self.conn.executemany(f"INSERT OR REPLACE INTO tasks ({', '.join(TASK_FIELDS)}) VALUES ({', '.join('?' for _ in TASK_FIELDS)})", rows)
+        return len(rows)
+
+    def delete(self, ids: Iterable[str]) -> Set[str]:
+        """删除任务；原先挂在它们下面的子任务改为无父任务。返回受影响的周（含这些子任务所在周）。"""
+        rows = [(i,) for i in ids]
+        self.conn.executemany("DELETE FROM tasks WHERE id = ?", rows)
+        weeks: Set[str] = set()
+        for i in range(0, len(rows), FETCH_BATCH):
+            batch = [r[0] for r in rows[i : i + FETCH_BATCH]]
+            marks = ",".join("?" for _ in batch)
+            for row in self.conn.execute(f"SELECT due_ts, completed_ts FROM tasks WHERE parent IN ({marks})", batch):
+                weeks |= week_labels(dict(row))
+            self.conn.execute(f"UPDATE tasks SET parent = NULL WHERE parent IN ({marks})", batch)
+        return weeks
+
+    def prune_sources(self, keep: Iterable[str]) -> Tuple[Dict[str, int], Set[str]]:
+        """删除不在 keep 中的源的全部任务；返回 ({源: 删除数}, 受影响的周)。"""
+        keep = list(keep)
+        rows = self.conn.execute(f"SELECT id, source FROM tasks WHERE source NOT IN ({','.join('?' for _ in keep)})", keep).fetchall()
+        removed: Dict[str, int] = {}
+        for row in rows:
+            removed[row["source"]] = removed.get(row["source"], 0) + 1
+        ids = [row["id"] for row in rows]
+        weeks = self.weeks_of(ids)
+        weeks |= self.delete(ids)
+        return removed, weeks
+
+    def tasks_between(self, start_ts: float, end_ts: float) -> List[Dict[str, Any]]:
+        """到期或完成时间落在 [start, end) 的任务（两次索引区间查询取并集）。"""
+        rows = self.conn.execute(
+            "SELECT * FROM (SELECT * FROM tasks WHERE due_ts >= ?1 AND due_ts < ?2 "
+            "UNION SELECT * FROM tasks WHERE completed_ts >= ?1 AND completed_ts < ?2) "
+            "ORDER BY due_ts IS NULL, due_ts, completed_ts",
+            (start_ts, end_ts),
+        )
+        return [dict(row) for row in rows]
+
+    def stats(self, start_ts: float, end_ts: float) -> Dict[str, Any]:
+        """区间完成统计：到期数、完成数（其中按时 / 逾期）、仍未完成的到期数，以及按列表的完成数。"""
+        q = self.conn.execute
+        due = q("SELECT COUNT(*) FROM tasks WHERE due_ts >= ? AND due_ts < ?", (start_ts, end_ts)).fetchone()[0]
+        open_due = q("SELECT COUNT(*) FROM tasks WHERE due_ts >= ? AND due_ts < ? AND NOT completed", (start_ts, end_ts)).fetchone()[0]
+        # 全天提醒在到期当天结束前完成都算按时
+        on_time, late, total = q(
+            "SELECT SUM(due_ts IS NOT NULL AND completed_ts <= due_ts + CASE WHEN allday THEN 86400 ELSE 0 END), "
+            "SUM(due_ts IS NOT NULL AND completed_ts > due_ts + CASE WHEN allday THEN 86400 ELSE 0 END), COUNT(*) "
+            "FROM tasks WHERE completed_ts >= ? AND completed_ts < ?",
+            (start_ts, end_ts),
+        ).fetchone()
+        by_list = q(
+            "SELECT COALESCE(list, '未分类') AS name, COUNT(*) AS n FROM tasks WHERE completed_ts >= ? AND completed_ts < ? "
+            "GROUP BY name ORDER BY n DESC, name",
+            (start_ts, end_ts),
+        )
+        return {
+            "due": due,
+            "completed": total,
+            "completed_on_time": on_time or 0,
+            "completed_late": late or 0,
+            "open_due": open_due,
+            "completion_rate": round((due - open_due) / due, 3) if due else None,
+            "completed_by_list": {row["name"]: row["n"] for row in by_list},
+        }
+
+
+def period_bounds(period: str, d: date) -> Tuple[date, date, str]:
+    if period == "day":
+        return d, d + timedelta(days=1), d.isoformat()
+    if period == "week":
+        start = d - timedelta(days=d.weekday())
+        return start, start + timedelta(days=7), iso_week_label(start)
+    if period == "month":
+        start = d.replace(day=1)
+        end = (start + timedelta(days=32)).replace(day=1)
+        return start, end, f"{d.year}-{d.month:02d}"
+    return date(d.year, 1, 1), date(d.year + 1, 1, 1), str(d.year)
+
+
+def day_ts(d: date) -> float:
+    return datetime(d.year, d.month, d.day).timestamp()
+
+
+def write_week(db: TaskDB, out_dir: Path, label: str) -> Optional[Path]:
+    """重写一周的任务文件；该周已无任务时删除文件。"""
+    year, week = label.split("-W")
+    start = date.fromisocalendar(int(year), int(week), 1)
+    lo, hi = day_ts(start), day_ts(start + timedelta(days=7))
+    path = out_dir / f"week-{label}.json"
+    tasks = db.tasks_between(lo, hi)
+    if not tasks:
+        if path.exists():
+            path.unlink()
+        return None
+    payload = {
+        "week": label,
+        "range": {"start": start.isoformat(), "end": (start + timedelta(days=6)).isoformat()},
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "source": "reminders",
+        "stats": db.stats(lo, hi),
+        "tasks": [{k: (bool(t[k]) if k in ("allday", "completed", "flagged") else t[k]) for k in JSON_FIELDS} for t in tasks],
+    }
+    tmp = path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+    tmp.replace(path)
+    count("bytes_written", path.stat().st_size)
+    return path
+
+
+def sync_source(db: TaskDB, source: str, current: Dict[str, str], fetch) -> Tuple[Set[str], Dict[str, int]]:
+    """按修改戳比对一个源：取回变化的条目写入任务库，删掉源里已不存在的；返回受影响的周与统计。"""
+    known = db.stamps(source)
+    changed = [task_id for task_id, stamp in current.items() if known.get(task_id) != stamp]
+    removed = [task_id for task_id in known if task_id not in current]
+    weeks = db.weeks_of(changed + removed)
+    tasks = list(fetch(changed)) if changed else []
+    for task in tasks:
+        weeks |= week_labels(task)
+    db.upsert(tasks)
+    weeks |= db.delete(removed)
+    return weeks, {"items": len(current), "changed": len(tasks), "new": sum(t["id"] not in known for t in tasks), "removed": len(removed)}
+
+
+def default_stores() -> List[Path]:
+    return [Path(p) for p in sorted(glob.glob(STORE_GLOB))]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Apple Reminders 增量导入，输出按周的任务 JSON")
+    parser.add_argument("--db", action="append", type=Path, help="Reminders 存储 Data-*.sqlite，可重复；默认自动查找本机存储")
+    parser.add_argument("--export", type=Path, help=f"reminders-cli JSON 导出文件（默认存在 {DEFAULT_EXPORT.relative_to(BASE)} 时读取）")
+    parser.add_argument("--out-dir", type=Path, default=DEFAULT_OUT_DIR, help="输出目录（任务库与 week-*.json），默认 data/reminders")
+    parser.add_argument("--full", action="store_true", help="忽略已记录的修改戳，全部重新导入并重写所有周文件")
+    parser.add_argument("--stats", choices=["day", "week", "month", "year"], help="不导入，只打印该周期的完成统计")
+    parser.add_argument("--date", help="--stats 的日期 YYYY-MM-DD，默认今天")
+    args = parser.parse_args()
+
+    db = TaskDB(args.out_dir / DB_NAME)
+    try:
+        if args.stats:
+            start, end, label = period_bounds(args.stats, date.fromisoformat(args.date) if args.date else date.today())
+            with span("stats"):
+                stats = db.stats(day_ts(start), day_ts(end))
+            print(json.dumps({"period": args.stats, "label": label, **stats}, ensure_ascii=False, indent=2))
+            return 0
+
+        stores = args.db if args.db else default_stores()
+        export = args.export or (DEFAULT_EXPORT if DEFAULT_EXPORT.exists() else None)
+        if not stores and not export:
+            print(f"[reminders] 未找到 Reminders 存储（{STORE_GLOB}），也没有 --export 文件")
+            return 1
+        missing = [p for p in [*stores, *([export] if export else [])] if not p.is_file()]
+        if missing:
+            print(f"[reminders] 文件不存在：{', '.join(str(p) for p in missing)}")
+            return 1
+        if args.full:
+            db.conn.execute("DELETE FROM tasks")
+
+        affected: Set[str] = set()
+        summary: Dict[str, Dict[str, int]] = {}
+        seen: Set[str] = set()
+        for path in stores:
+            with span("store"):
+                store = ReminderStore(path)
+                try:
+                    with span("store/scan"):
+                        current = store.stamps()
+                    seen.update(current)
+                    pk_of = {task_id: pk for task_id, (pk, _) in current.items()}
+                    stamp_of = {pk: stamp for pk, stamp in current.values()}
+                    with span("store/fetch"):
+                        weeks, stats = sync_source(
+                            db, store.source, {task_id: stamp for task_id, (_, stamp) in current.items()},
+                            lambda ids: store.fetch([pk_of[i] for i in ids], stamp_of),
+                        )
+                finally:
+                    store.close()
+            affected |= weeks
+            summary[store.source] = stats
+        if export:
+            with span("export"):
+                # 同一条提醒同时出现在存储与导出里时以存储为准，避免两个源来回覆盖
+                tasks = {i: t for i, t in load_export(export).items() if i not in seen}
+                weeks, stats = sync_source(db, str(export), {i: t["stamp"] for i, t in tasks.items()}, lambda ids: (tasks[i] for i in ids))
+            affected |= weeks
+            summary[str(export)] = stats
+        with span("prune"):
+            pruned, weeks = db.prune_sources(summary)
+        affected |= weeks
+        for source, removed in pruned.items():
+            summary[source] = {"items": 0, "changed": 0, "new": 0, "removed": removed}
+        db.conn.commit()
+
+        if args.full:
+            # 全量重建：旧周文件里可能有已不存在的任务，一并重写
+            affected |= {p.stem[len("week-") :] for p in args.out_dir.glob("week-*.json")}
+        with span("write_weeks"):
+            written = [write_week(db, args.out_dir, label) for label in sorted(affected)]
+        for stats in summary.values():
+            count("items", stats["items"])
+            count("changed", stats["changed"])
+            count("removed", stats["removed"])
+        count("weeks_written", sum(1 for p in written if p))
+        print(json.dumps({"sources": summary, "weeks_rewritten": len(affected)}, ensure_ascii=False, indent=2))
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(run_main("fetch_reminders", main))
@@ -0,0 +1,625 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+从预导出的 .ics 文件导入日历事件（绕开 icalBuddy / TCC 授权弹窗，Linux 可跑），输出与 fetch_calendar.py
+相同结构的 data/calendar/sources/ics/week-<ISO周>.json（source 为 "ics"）；单独成目录，不覆盖 icalBuddy 的周文件，
+读取方按 calendar_sources 合并。
+- 流式解析：逐行读取、展开折行，一次只在内存里保留一个 VEVENT；窗口外的单次事件读完即丢，多年大文件也不整体加载。
+- 重复事件：RRULE 惰性展开，只生成请求窗口内的实例；支持 FREQ=DAILY/WEEKLY/MONTHLY/YEARLY 及
+  INTERVAL/COUNT/UNTIL/BYDAY/BYMONTHDAY/BYMONTH/BYSETPOS，处理 EXDATE/RDATE、RECURRENCE-ID 改期与取消。
+- 事件保留 uid（重复实例另带 recurrence_id），build_calendar_archive 据此去重，不再依赖 title+start+end；
+  同一 uid 出现多次（多个文件 / 重复导出）时保留 SEQUENCE 较大的版本。
+- 时区：TZID 按 IANA 名解析（zoneinfo），统一换算到本机时区；偏移按每个时刻各自计算（跨夏令时的多年导入不会差一小时），
+  浮动时间与全天事件按本机墙上时间解释；全天事件与 fetch_calendar 一致记为 00:00 ~ 23:59:59。
+
+用法示例：
+  python scripts/import_ics.py ~/Downloads/work.ics                 # 本周
+  python scripts/import_ics.py a.ics b.ics --year 2025             # 全年按周输出
+  python scripts/import_ics.py --start 2025-03-03 --end 2025-04-01  # 默认读取 data/calendar/ics/*.ics
+"""
+
+from __future__ import annotations
+
+import argparse
+import calendar
+import re
+from datetime import date, datetime, time, timedelta, timezone, tzinfo
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from calendar_sources import source_dir
+from fetch_calendar import OUT_DIR, iso_week_str, week_payload, write_week
+from instrument import count, run_main, span
+
+BASE = Path(__file__).resolve().parent.parent
+ICS_DIR = OUT_DIR / "ics"
+WEEKS_OUT_DIR = source_dir(OUT_DIR, "ics")
+WEEKDAYS = {"MO": 0, "TU": 1, "WE": 2, "TH": 3, "FR": 4, "SA": 5, "SU": 6}
+SUPPORTED_FREQ = {"DAILY", "WEEKLY", "MONTHLY", "YEARLY"}
+SUPPORTED_PARTS = {"FREQ", "INTERVAL", "COUNT", "UNTIL", "BYDAY", "BYMONTHDAY", "BYMONTH", "BYSETPOS", "WKST"}
+DURATION_RE = re.compile(r"([+-])?P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$")
+BYDAY_RE = re.compile(r"([+-]?\d+)?(MO|TU|WE|TH|FR|SA|SU)$")
+
+Props = Dict[str, List[Tuple[Dict[str, str], str]]]
+
+
+class LocalTimezone(tzinfo):
+    """本机时区，偏移按每个墙上时间分别取（夏令时前后不同）；浮动时间挂它，RRULE 展开后仍按各自日期换算。"""
+
+    def utcoffset(self, dt: Optional[datetime]) -> timedelta:
+        return dt.replace(tzinfo=None).astimezone().utcoffset() if dt is not None else datetime.now().astimezone().utcoffset()
+
+    def dst(self, dt: Optional[datetime]) -> Optional[timedelta]:
+        return None
+
+    def tzname(self, dt: Optional[datetime]) -> Optional[str]:
+        return (dt.replace(tzinfo=None) if dt is not None else datetime.now()).astimezone().tzname()
+
+    def fromutc(self, dt: datetime) -> datetime:
+        return datetime.fromtimestamp(dt.replace(tzinfo=timezone.utc).timestamp()).replace(tzinfo=self)
+
+
+LOCAL_TZ = LocalTimezone()
+
+
+# ---------- 流式读取 ----------
+
+
+def unfold(fh: TextIO) -> Iterator[str]:
+    """按 RFC 5545 展开折行（以空格/制表符开头的行接到上一行）。"""
+    parts: List[str] = []
+    for raw in fh:
+        line = raw.rstrip("\r\n")
+        if line[:1] in (" ", "\t"):
+            if parts:
+                parts.append(line[1:])
+            continue
+        if parts:
+            yield "".join(parts)
+        parts = [line] if line else []
+    if parts:
+        yield "".join(parts)
+
+
+def parse_content_line(line: str) -> Optional[Tuple[str, Dict[str, str], str]]:
+    """NAME;PARAM=V;PARAM="a:b":value → (NAME, {PARAM: V}, value)。"""
+    idx = line.find(":")
+    if idx < 0:
+        return None
+    if '"' in line[:idx]:
+        in_quote = False
+        for idx, ch in enumerate(line):
+            if ch == '"':
+                in_quote = not in_quote
+            elif ch == ":" and not in_quote:
+                break
+        else:
+            return None
+    head, value = line[:idx], line[idx + 1 :]
+    name, *raw_params = head.split(";")
+    params: Dict[str, str] = {}
+    for item in raw_params:
+        key, _, val = item.partition("=")
+        params[key.upper()] = val.strip('"')
+    return name.upper(), params, value
+
+
+def iter_vevents(path: Path) -> Iterator[Tuple[str, Props]]:
+    """逐个产出 (日历名, VEVENT 属性)；日历名取 X-WR-CALNAME，缺省为文件名。嵌套的 VALARM 等被忽略。"""
+    cal_name = path.stem
+    props: Optional[Props] = None
+    depth = 0
+    with path.open("r", encoding="utf-8", errors="replace", newline="") as fh:
+        for line in unfold(fh):
+            parsed = parse_content_line(line)
+            if not parsed:
+                continue
+            name, params, value = parsed
+            if name == "BEGIN":
+                if value.upper() == "VEVENT" and props is None:
+                    props, depth = {}, 0
+                elif props is not None:
+                    depth += 1
+                continue
+            if name == "END":
+                if props is not None:
+                    if depth:
+                        depth -= 1
+                    elif value.upper() == "VEVENT":
+                        count("ics.vevents")
+                        yield cal_name, props
+                        props = None
+                continue
+            if props is None:
+                if name == "X-WR-CALNAME" and value.strip():
+                    cal_name = unescape(value).strip()
+                continue
+            if not depth:
+                props.setdefault(name, []).append((params, value))
+
+
+# ---------- 值解析 ----------
+
+
+def unescape(text: str) -> str:
+    if "\\" not in text:
+        return text
+    return re.sub(r"\\([\\;,nN])", lambda m: "\n" if m.group(1) in "nN" else m.group(1), text)
+
+
+@lru_cache(maxsize=None)
+def resolve_tz(tzid: str) -> Any:
+    """IANA 名直接用；"/mozilla.org/.../Europe/Berlin" 这类前缀取末两段；无法识别时按本机时区处理。"""
+    candidates = [tzid, "/".join(tzid.strip("/").split("/")[-2:]), tzid.strip("/").split("/")[-1]]
+    for name in candidates:
+        try:
+            return ZoneInfo(name)
+        except (ZoneInfoNotFoundError, ValueError):
+            continue
+    count("ics.tz_unknown")
+    return LOCAL_TZ
+
+
+def parse_dt(value: str, params: Dict[str, str]) -> date | datetime | None:
+    value = value.strip()
+    # 按位切片而非 strptime：大文件里每个事件都要解析两次时间，strptime 是流式读取的主要开销
+    try:
+        day = date(int(value[0:4]), int(value[4:6]), int(value[6:8]))
+        if params.get("VALUE", "").upper() == "DATE" or len(value) == 8:
+            return day
+        if value[8] != "T":
+            return None
+        dt = datetime(day.year, day.month, day.day, int(value[9:11]), int(value[11:13]), int(value[13:15]))
+    except (ValueError, IndexError):
+        return None
+    if value.endswith("Z"):
+        return dt.replace(tzinfo=timezone.utc)
+    if params.get("TZID"):
+        return dt.replace(tzinfo=resolve_tz(params["TZID"]))
+    # 浮动时间：按本机时区
+    return dt.replace(tzinfo=LOCAL_TZ)
+
+
+def parse_dt_list(entries: List[Tuple[Dict[str, str], str]]) -> List[date | datetime]:
+    out = []
+    for params, value in entries:
+        if params.get("VALUE", "").upper() == "PERIOD":
+            continue
+        for item in value.split(","):
+            dt = parse_dt(item, params)
+            if dt is not None:
+                out.append(dt)
+    return out
+
+
+def parse_duration(value: str) -> Optional[timedelta]:
+    m = DURATION_RE.match(value.strip())
+    if not m:
+        return None
+    sign, weeks, days, hours, minutes, seconds = m.groups()
+    delta = timedelta(
+        weeks=int(weeks or 0), days=int(days or 0), hours=int(hours or 0), minutes=int(minutes or 0), seconds=int(seconds or 0)
+    )
+    return -delta if sign == "-" else delta
+
+
+def instant_key(value: date | datetime) -> str:
+    """EXDATE / RECURRENCE-ID 与实例比对用的键：时间统一到 UTC，日期原样。"""
+    if isinstance(value, datetime):
+        return value.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    return value.strftime("%Y%m%d")
+
+
+def first(props: Props, name: str) -> Tuple[Dict[str, str], str] | None:
+    values = props.get(name)
+    return values[0] if values else None
+
+
+def text_prop(props: Props, name: str) -> str:
+    entry = first(props, name)
+    return unescape(entry[1]).strip() if entry else ""
+
+
+# ---------- RRULE 惰性展开 ----------
+
+
+def parse_rrule(value: str) -> Dict[str, str]:
+    rule = {}
+    for part in value.split(";"):
+        key, _, val = part.partition("=")
+        if key:
+            rule[key.upper()] = val.upper()
+    return rule
+
+
+def _ints(text: Optional[str]) -> List[int]:
+    return [int(x) for x in text.split(",") if x.strip()] if text else []
+
+
+def _byday(text: Optional[str]) -> List[Tuple[Optional[int], int]]:
+    out = []
+    for item in (text or "").split(","):
+        m = BYDAY_RE.match(item.strip())
+        if m:
+            out.append((int(m.group(1)) if m.group(1) else None, WEEKDAYS[m.group(2)]))
+    return out
+
+
+def _nth_weekdays(days: List[date], byday: List[Tuple[Optional[int], int]]) -> List[date]:
+    """在一个周期（月/年）的全部日期里挑出 BYDAY（可带序号，如 2MO、-1FR）。"""
+    picked = set()
+    for nth, wd in byday:
+        matches = [d for d in days if d.weekday() == wd]
+        if nth is None:
+            picked.update(matches)
+        elif nth and -len(matches) <= nth <= len(matches):
+            picked.add(matches[nth - 1 if nth > 0 else nth])
+    return sorted(picked)
+
+
+def _month_days(year: int, month: int) -> List[date]:
+    return [date(year, month, d) for d in range(1, calendar.monthrange(year, month)[1] + 1)]
+
+
+def _by_monthday(year: int, month: int, monthdays: List[int]) -> List[date]:
+    last = calendar.monthrange(year, month)[1]
+    out = []
+    for md in monthdays:
+        day = md if md > 0 else last + md + 1
+        if 1 <= day <= last:
+            out.append(date(year, month, day))
+    return out
+
+
+def _period_dates(freq: str, period: date, rule: Dict[str, Any], anchor: date) -> List[date]:
+    byday, bymonthday, bymonth = rule["byday"], rule["bymonthday"], rule["bymonth"]
+    if freq == "DAILY":
+        days = [period]
+    elif freq == "WEEKLY":
+        weekdays = sorted({wd for _, wd in byday}) or [anchor.weekday()]
+        days = [period + timedelta(days=wd) for wd in weekdays]
+    elif freq == "MONTHLY":
+        if bymonth and period.month not in bymonth:
+            return []
+        if bymonthday:
+            days = _by_monthday(period.year, period.month, bymonthday)
+            if byday:
+                days = [d for d in days if d.weekday() in {wd for _, wd in byday}]
+        elif byday:
+            days = _nth_weekdays(_month_days(period.year, period.month), byday)
+        else:
+            days = _by_monthday(period.year, period.month, [anchor.day]) if anchor.day <= calendar.monthrange(period.year, period.month)[1] else []
+    else:  # YEARLY
+        if byday and not bymonth and not bymonthday:
+            year_days = [d for m in range(1, 13) for d in _month_days(period.year, m)]
+            days = _nth_weekdays(year_days, byday)
+        else:
+            days = []
+            for month in bymonth or [anchor.month]:
+                if bymonthday:
+                    days.extend(_by_monthday(period.year, month, bymonthday))
+                elif byday:
+                    days.extend(_nth_weekdays(_month_days(period.year, month), byday))
+                elif anchor.day <= calendar.monthrange(period.year, month)[1]:
+                    days.append(date(period.year, month, anchor.day))
+            days.sort()
+    if freq in ("DAILY", "WEEKLY"):
+        if bymonth:
+            days = [d for d in days if d.month in bymonth]
+        if bymonthday:
+            days = [d for d in days if d in set(_by_monthday(d.year, d.month, bymonthday))]
+        if byday and freq == "DAILY":
+            days = [d for d in days if d.weekday() in {wd for _, wd in byday}]
+    if rule["bysetpos"] and days:
+        days = sorted({days[p - 1 if p > 0 else p] for p in rule["bysetpos"] if p and -len(days) <= p <= len(days)})
+    return days
+
+
+def _advance(freq: str, period: date, steps: int) -> date:
+    if freq == "DAILY":
+        return period + timedelta(days=steps)
+    if freq == "WEEKLY":
+        return period + timedelta(weeks=steps)
+    if freq == "MONTHLY":
+        months = period.year * 12 + period.month - 1 + steps
+        return date(months // 12, months % 12 + 1, 1)
+    return date(period.year + steps, 1, 1)
+
+
+def rrule_dates(anchor: date, raw_rule: Dict[str, str], stop: date, skip_to: Optional[date] = None) -> Iterator[date]:
+    """
+    按 RRULE 依次产出实例日期（含 DTSTART 当天），到 stop（不含）为止；UNTIL 由调用方按完整时间判断。
+    无 COUNT 时 DAILY/WEEKLY 直接跳到 skip_to 附近的周期，多年前开始的每日事件也不必从头数。
+    """
+    freq = raw_rule["FREQ"]
+    interval = max(1, int(raw_rule.get("INTERVAL") or 1))
+    limit = int(raw_rule["COUNT"]) if raw_rule.get("COUNT") else None
+    rule = {
+        "byday": _byday(raw_rule.get("BYDAY")),
+        "bymonthday": _ints(raw_rule.get("BYMONTHDAY")),
+        "bymonth": _ints(raw_rule.get("BYMONTH")),
+        "bysetpos": _ints(raw_rule.get("BYSETPOS")),
+    }
+    if freq == "DAILY":
+        period = anchor
+    elif freq == "WEEKLY":
+        period = anchor - timedelta(days=anchor.weekday())
+    elif freq == "MONTHLY":
+        period = anchor.replace(day=1)
+    else:
+        period = date(anchor.year, 1, 1)
+    if limit is None and skip_to and freq in ("DAILY", "WEEKLY"):
+        step_days = interval * (1 if freq == "DAILY" else 7)
+        jumps = (skip_to - period).days // step_days
+        if jumps > 0:
+            period += timedelta(days=jumps * step_days)
+
+    emitted = 0
+    if period <= anchor:
+        yield anchor
+        emitted += 1
+    while period < stop and (limit is None or emitted < limit):
+        for d in _period_dates(freq, period, rule, anchor):
+            if d <= anchor:
+                continue
+            if d >= stop or (limit is not None and emitted >= limit):
+                return
+            yield d
+            emitted += 1
+        period = _advance(freq, period, interval)
+
+
+# ---------- 事件 → 周文件 ----------
+
+
+class Window:
+    """导入窗口 [start, end)，按周一对齐的若干周。"""
+
+    def __init__(self, weeks: List[date]) -> None:
+        self.weeks = weeks
+        self.start = datetime.combine(weeks[0], time(0, 0)).astimezone()
+        self.end = datetime.combine(weeks[-1] + timedelta(days=7), time(0, 0)).astimezone()
+        self.buckets: Dict[date, Dict[Tuple[str, str], Tuple[int, Dict[str, Any]]]] = {w: {} for w in weeks}
+
+    def overlaps(self, start: datetime, end: datetime) -> bool:
+        return start < self.end and (end > self.start or start >= self.start)
+
+    def add(self, event: Dict[str, Any], start: datetime, end: datetime, sequence: int) -> None:
+        """按事件跨越的每一周入桶（与 icalBuddy 按区间查询的行为一致）；同一 uid + recurrence_id 保留 SEQUENCE 大的。"""
+        key = (event["uid"], event.get("recurrence_id", ""))
+        week = start.date() - timedelta(days=start.weekday())
+        last = max(start, end - timedelta(microseconds=1)).date()
+        while week <= last:
+            bucket = self.buckets.get(week)
+            if bucket is not None:
+                existing = bucket.get(key)
+                if existing is None or sequence > existing[0]:
+                    bucket[key] = (sequence, event)
+                else:
+                    count("events.duplicate_uid")
+            week += timedelta(days=7)
+
+
+def to_local(value: date | datetime, allday_end: bool = False) -> datetime:
+    """换算到本机时区，偏移取该时刻自己的（astimezone() 不带参数），不是导入时的当前偏移。"""
+    if isinstance(value, datetime):
+        return value.astimezone()
+    return datetime.combine(value, time(23, 59, 59) if allday_end else time(0, 0)).astimezone()
+
+
+def event_times(props: Props, start: date | datetime) -> Tuple[date | datetime, bool, timedelta]:
+    """(开始, 是否全天, 时长)；DTEND 缺失时用 DURATION，再缺省则全天 1 天、定时 0。"""
+    allday = not isinstance(start, datetime)
+    end_entry = first(props, "DTEND")
+    end = parse_dt(end_entry[1], end_entry[0]) if end_entry else None
+    if end is not None and isinstance(end, datetime) == isinstance(start, datetime):
+        length = end - start
+    else:
+        dur_entry = first(props, "DURATION")
+        length = parse_duration(dur_entry[1]) if dur_entry else None
+        if length is None:
+            length = timedelta(days=1) if allday else timedelta(0)
+    return start, allday, max(length, timedelta(0))
+
+
+def local_span(start: date | datetime, length: timedelta, allday: bool) -> Tuple[datetime, datetime]:
+    if allday:
+        last_day = start + max(length - timedelta(days=1), timedelta(0))
+        return to_local(start), to_local(last_day, allday_end=True)
+    return to_local(start), to_local(start + length)
+
+
+def make_event(
+    props: Props, cal_name: str, start: datetime, end: datetime, allday: bool, uid: str, recurrence_id: Optional[str]
+) -> Dict[str, Any]:
+    event: Dict[str, Any] = {
+        "title": text_prop(props, "SUMMARY"),
+        "calendar": cal_name,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "allday": allday,
+        "location": text_prop(props, "LOCATION"),
+        "notes": text_prop(props, "DESCRIPTION"),
+        "uid": uid,
+    }
+    if recurrence_id:
+        event["recurrence_id"] = recurrence_id
+    return event
+
+
+def sequence_of(props: Props) -> int:
+    try:
+        return int(text_prop(props, "SEQUENCE") or 0)
+    except ValueError:
+        return 0
+
+
+def expand_master(props: Props, cal_name: str, overridden: set, window: Window) -> None:
+    """展开一个重复事件在窗口内的实例；被 RECURRENCE-ID 覆盖或 EXDATE 排除的实例跳过。"""
+    dt_entry = first(props, "DTSTART")
+    dtstart = parse_dt(dt_entry[1], dt_entry[0]) if dt_entry else None
+    if dtstart is None:
+        return
+    start, allday, length = event_times(props, dtstart)
+    uid = text_prop(props, "UID")
+    sequence = sequence_of(props)
+    rule = parse_rrule(first(props, "RRULE")[1])
+    excluded = {instant_key(v) for v in parse_dt_list(props.get("EXDATE", []))}
+
+    def emit(inst: date | datetime) -> None:
+        key = instant_key(inst)
+        if key in excluded or (uid, key) in overridden:
+            return
+        s, e = local_span(inst, length, allday)
+        if window.overlaps(s, e):
+            count("events.instances")
+            window.add(make_event(props, cal_name, s, e, allday, uid, s.isoformat()), s, e, sequence)
+
+    unsupported = set(rule) - SUPPORTED_PARTS
+    if rule.get("FREQ") not in SUPPORTED_FREQ or unsupported:
+        count("ics.rrule_unsupported")
+        emit(start)
+    else:
+        # UNTIL 为 UTC（Z）、日期，或与 DTSTART 同一时区的本地时间
+        until = parse_dt(rule["UNTIL"], dt_entry[0]) if rule.get("UNTIL") else None
+        anchor = start.date() if isinstance(start, datetime) else start
+        stop = (window.end + timedelta(days=1)).date()
+        skip_to = (window.start - length - timedelta(days=2)).date()
+        for day in rrule_dates(anchor, rule, stop, skip_to):
+            inst = datetime.combine(day, start.time(), tzinfo=start.tzinfo) if isinstance(start, datetime) else day
+            if until is not None:
+                if isinstance(inst, datetime) and isinstance(until, datetime):
+                    past = inst > until
+                else:
+                    past = (inst.date() if isinstance(inst, datetime) else inst) > (until.date() if isinstance(until, datetime) else until)
+                if past:
+                    break
+            emit(inst)
+    for extra in parse_dt_list(props.get("RDATE", [])):
+        if isinstance(extra, datetime) == isinstance(start, datetime):
+            emit(extra)
+
+
+def import_files(paths: List[Path], window: Window, cal_override: Optional[str]) -> Dict[str, int]:
+    """流式读取所有文件：单次事件直接入桶，重复事件的主记录留到读完后再按窗口展开。"""
+    masters: Dict[str, Tuple[int, str, Props]] = {}
+    overridden: set = set()
+    stats = {"files": 0, "vevents": 0, "cancelled": 0}
+    for path in paths:
+        stats["files"] += 1
+        with span("stream"):
+            for cal_name, props in iter_vevents(path):
+                stats["vevents"] += 1
+                cal_name = cal_override or cal_name
+                uid = text_prop(props, "UID") or f"{path.name}#{stats['vevents']}"
+                props.setdefault("UID", [({}, uid)])
+                cancelled = text_prop(props, "STATUS").upper() == "CANCELLED"
+                recur_entry = first(props, "RECURRENCE-ID")
+                if recur_entry:
+                    recur = parse_dt(recur_entry[1], recur_entry[0])
+                    if recur is None:
+                        continue
+                    overridden.add((uid, instant_key(recur)))
+                    recurrence_id = to_local(recur).isoformat()
+                elif "RRULE" in props:
+                    if cancelled:
+                        stats["cancelled"] += 1
+                        continue
+                    seq = sequence_of(props)
+                    if uid not in masters or seq > masters[uid][0]:
+                        masters[uid] = (seq, cal_name, props)
+                    continue
+                else:
+                    recurrence_id = None
+                if cancelled:
+                    stats["cancelled"] += 1
+                    continue
+                dt_entry = first(props, "DTSTART")
+                dtstart = parse_dt(dt_entry[1], dt_entry[0]) if dt_entry else None
+                if dtstart is None:
+                    count("ics.no_dtstart")
+                    continue
+                start, allday, length = event_times(props, dtstart)
+                s, e = local_span(start, length, allday)
+                if window.overlaps(s, e):
+                    window.add(make_event(props, cal_name, s, e, allday, uid, recurrence_id), s, e, sequence_of(props))
+    with span("expand"):
+        for _, cal_name, props in masters.values():
+            expand_master(props, cal_name, overridden, window)
+    stats["recurring"] = len(masters)
+    return stats
+
+
+def year_weeks(year: int) -> List[date]:
+    """与 fetch_calendar --year 相同的周范围：含 1 月 1 日的那周起，到与该年有交集的最后一周。"""
+    first_day = date(year, 1, 1)
+    week_start = first_day - timedelta(days=first_day.weekday())
+    weeks = []
+    while week_start.year <= year or (week_start + timedelta(days=7)).year == year:
+        weeks.append(week_start)
+        week_start += timedelta(days=7)
+    return weeks
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="从 .ics 导入日历事件，按周写入 data/calendar/sources/ics/week-*.json")
+    parser.add_argument("ics", nargs="*", type=Path, help="ICS 文件（默认 data/calendar/ics/*.ics）")
+    parser.add_argument("--start", help="起始日期 YYYY-MM-DD（默认本周周一，按周一对齐）")
+    parser.add_argument("--end", help="结束日期 YYYY-MM-DD（不含，默认 start+7 天）")
+    parser.add_argument("--year", type=int, help="导入整个年份，按周输出 week-*.json")
+    parser.add_argument("--out-dir", type=Path, default=WEEKS_OUT_DIR, help="输出目录，默认 data/calendar/sources/ics")
+    parser.add_argument("--calendar-name", help="覆盖日历名（默认取 X-WR-CALNAME，缺省为文件名）")
+    parser.add_argument("--cals", help="限定日历名称（逗号分隔，子串匹配，可含 emoji）")
+    parser.add_argument("--exclude-cals", help="排除日历名称（逗号分隔，子串匹配，可含 emoji）")
+    args = parser.parse_args()
+
+    paths = args.ics or sorted(ICS_DIR.glob("*.ics"))
+    if not paths:
+        print(f"未指定 ICS 文件，且 {ICS_DIR} 下没有 *.ics")
+        return 1
+    missing = [p for p in paths if not p.exists()]
+    if missing:
+        print(f"ICS 文件不存在：{', '.join(str(p) for p in missing)}")
+        return 1
+
+    if args.year:
+        weeks = year_weeks(args.year)
+    else:
+        today = date.today()
+        start_day = date.fromisoformat(args.start) if args.start else today - timedelta(days=today.weekday())
+        start_day -= timedelta(days=start_day.weekday())
+        end_day = date.fromisoformat(args.end) if args.end else start_day + timedelta(days=7)
+        weeks = []
+        week_start = start_day
+        while week_start < end_day or not weeks:
+            weeks.append(week_start)
+            week_start += timedelta(days=7)
+    allow_cals = [c.strip() for c in args.cals.split(",") if c.strip()] if args.cals else None
+    exclude_cals = [c.strip() for c in args.exclude_cals.split(",") if c.strip()] if args.exclude_cals else None
+
+    window = Window(weeks)
+    stats = import_files(paths, window, args.calendar_name)
+
+    total = 0
+    for week_start in weeks:
+        events = [evt for _, evt in window.buckets[week_start].values()]
+        if allow_cals:
+            events = [e for e in events if any(c in e["calendar"] for c in allow_cals)]
+        if exclude_cals:
+            events = [e for e in events if not any(c in e["calendar"] for c in exclude_cals)]
+        events.sort(key=lambda e: (e["start"], e["title"]))
+        count("events", len(events))
+        total += len(events)
+        out_path = write_week(args.out_dir, week_payload(week_start, events, allow_cals, exclude_cals, source="ics"))
+        print(f"写入完成：{out_path}（{len(events)} 条事件）")
+    print(
+        f"ICS 导入完成：{iso_week_str(weeks[0])} ~ {iso_week_str(weeks[-1])}，{stats['files']} 个文件，"
+        f"{stats['vevents']} 个 VEVENT（重复事件 {stats['recurring']}，取消 {stats['cancelled']}），写入事件 {total}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(run_main("import_ics", main))
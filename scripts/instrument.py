@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+各脚本共用的计时/计数埋点，每次运行写一份机器可读的报告，便于对热点路径做回归对比。
+
+- span(name)：计时上下文（可嵌套，嵌套名以 / 连接，如 week/icalbuddy），按名称累计次数、总耗时、最大耗时。
+- count(name, n)：计数器（事件数、字节数等）。
+- run_main(script, main)：包住脚本入口；结束时写 artifacts/reports/<script>.json（最近一次），
+  并追加一行到 artifacts/reports/<script>.jsonl（历史，只保留最近 HISTORY_LIMIT 次）。
+  artifacts/ 在 .gitignore 中，报告不会弄脏工作区。
+- 环境变量（均可选）：
+  ORCHARD_PROFILE=cprofile|tracemalloc|all   额外输出 cProfile（.prof）/ tracemalloc（top 分配点）
+  ORCHARD_REPORT_DIR=<目录>                  报告目录（默认 artifacts/reports）
+  ORCHARD_REPORT=0                           不写报告
+未经 run_main 启动时（如被其它脚本 import），span/count 只在内存里累计，不产生文件。
+
+查看报告：python scripts/instrument.py [script ...]
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+BASE = Path(__file__).resolve().parent.parent
+DEFAULT_REPORT_DIR = BASE / "artifacts" / "reports"
+TRACEMALLOC_TOP = 25
+HISTORY_LIMIT = 500
+
+
+class Recorder:
+    """一次运行的 span 与计数器；每个线程各自累计（热路径不加锁），snapshot() 时合并。"""
+
+    def __init__(self, script: str) -> None:
+        self.script = script
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._threads: List[Dict[str, Any]] = []
+
+    def _data(self) -> Dict[str, Any]:
+        data = getattr(self._local, "data", None)
+        if data is None:
+            data = self._local.data = {"stack": [], "spans": {}, "counters": {}}
+            with self._lock:
+                self._threads.append(data)
+        return data
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        data = self._data()
+        stack = data["stack"]
+        stack.append(name)
+        key = "/".join(stack)
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - t0
+            stack.pop()
+            entry = data["spans"].get(key)
+            if entry is None:
+                data["spans"][key] = [1, elapsed, elapsed]
+            else:
+                entry[0] += 1
+                entry[1] += elapsed
+                if elapsed > entry[2]:
+                    entry[2] = elapsed
+
+    def count(self, name: str, n: int = 1) -> None:
+        counters = self._data()["counters"]
+        counters[name] = counters.get(name, 0) + n
+
+    def snapshot(self) -> Dict[str, Any]:
+        spans: Dict[str, List[float]] = {}
+        counters: Dict[str, int] = {}
+        with self._lock:
+            threads = list(self._threads)
+        for data in threads:
+            for key, (n, total, peak) in list(data["spans"].items()):
+                entry = spans.setdefault(key, [0, 0.0, 0.0])
+                entry[0] += n
+                entry[1] += total
+                entry[2] = max(entry[2], peak)
+            for key, value in list(data["counters"].items()):
+                counters[key] = counters.get(key, 0) + value
+        return {
+            "spans": {
+                k: {"count": int(v[0]), "total_s": round(v[1], 6), "max_s": round(v[2], 6)} for k, v in sorted(spans.items())
+            },
+            "counters": dict(sorted(counters.items())),
+        }
+
+
+_current = Recorder(Path(sys.argv[0]).stem or "python")
+
+
+def span(name: str):
+    return _current.span(name)
+
+
+def count(name: str, n: int = 1) -> None:
+    _current.count(name, n)
+
+
+def timed(name: Optional[str] = None) -> Callable:
+    """装饰器版本的 span；默认用函数名。"""
+
+    def wrap(fn: Callable) -> Callable:
+        label = name or fn.__name__
+
+        def inner(*args, **kwargs):
+            with _current.span(label):
+                return fn(*args, **kwargs)
+
+        inner.__name__ = fn.__name__
+        inner.__doc__ = fn.__doc__
+        return inner
+
+    return wrap
+
+
+def _peak_rss_kb() -> Optional[int]:
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 以字节计，Linux 以 KB 计
+    return int(peak / 1024) if sys.platform == "darwin" else int(peak)
+
+
+def report_dir() -> Path:
+    return Path(os.environ.get("ORCHARD_REPORT_DIR") or DEFAULT_REPORT_DIR)
+
+
+def append_history(path: Path, report: Dict[str, Any]) -> None:
+    """追加一行历史；超过 HISTORY_LIMIT 行时丢掉最早的（整文件改写，行数有上限所以开销固定）。"""
+    line = json.dumps(report, ensure_ascii=False) + "\n"
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            lines = f.readlines()
+    except FileNotFoundError:
+        lines = []
+    if len(lines) < HISTORY_LIMIT:
+        with path.open("a", encoding="utf-8") as f:
+            f.write(line)
+        return
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_text("".join(lines[len(lines) - HISTORY_LIMIT + 1 :]) + line, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def run_main(script: str, main: Callable[[], Optional[int]]) -> int:
+    """运行脚本入口并写报告；返回退出码（main 返回 None 视为 0）。"""
+    global _current
+    _current = Recorder(script)
+    profile = (os.environ.get("ORCHARD_PROFILE") or "").lower()
+    out_dir = report_dir()
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    profiler = None
+    if profile in ("cprofile", "all"):
+        import cProfile
+
+        profiler = cProfile.Profile()
+    if profile in ("tracemalloc", "all"):
+        import tracemalloc
+
+        tracemalloc.start(10)
+
+    started = datetime.now().isoformat(timespec="seconds")
+    wall0 = time.perf_counter()
+    cpu0 = time.process_time()
+    exit_code: Any = 0
+    try:
+        if profiler:
+            profiler.enable()
+        try:
+            exit_code = main() or 0
+        finally:
+            if profiler:
+                profiler.disable()
+    except SystemExit as exc:
+        exit_code = exc.code if exc.code is not None else 0
+        raise
+    except BaseException as exc:
+        exit_code = f"{type(exc).__name__}: {exc}"
+        raise
+    finally:
+        report: Dict[str, Any] = {
+            "script": script,
+            "started": started,
+            "argv": sys.argv[1:],
+            "exit_code": exit_code,
+            "wall_s": round(time.perf_counter() - wall0, 6),
+            "cpu_s": round(time.process_time() - cpu0, 6),
+            "peak_rss_kb": _peak_rss_kb(),
+            "python": sys.version.split()[0],
+        }
+        report.update(_current.snapshot())
+        write_report = os.environ.get("ORCHARD_REPORT", "1") != "0"
+        if write_report or profile:
+            out_dir.mkdir(parents=True, exist_ok=True)
+            if profiler:
+                prof_path = out_dir / f"{script}-{stamp}.prof"
+                profiler.dump_stats(str(prof_path))
+                report["cprofile"] = str(prof_path)
+            if profile in ("tracemalloc", "all"):
+                import tracemalloc
+
+                snap = tracemalloc.take_snapshot()
+                current, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                report["tracemalloc"] = {
+                    "current_kb": current // 1024,
+                    "peak_kb": peak // 1024,
+                    "top": [
+                        {"where": str(stat.traceback[0]), "size_kb": stat.size // 1024, "count": stat.count}
+                        for stat in snap.statistics("lineno")[:TRACEMALLOC_TOP]
+                    ],
+                }
+            if write_report:
+                (out_dir / f"{script}.json").write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+                append_history(out_dir / f"{script}.jsonl", report)
+    return int(exit_code) if isinstance(exit_code, int) else 1
+
+
+def summarize(report: Dict[str, Any]) -> str:
+    lines = [
+        f"{report['script']}  {report['started']}  wall {report['wall_s']:.3f}s  cpu {report['cpu_s']:.3f}s"
+        f"  rss {report.get('peak_rss_kb') or '-'} KB  exit {report['exit_code']}"
+    ]
+    spans = sorted(report.get("spans", {}).items(), key=lambda kv: -kv[1]["total_s"])
+    for name, s in spans:
+        lines.append(f"  {s['total_s']:9.4f}s  x{s['count']:<6} max {s['max_s']:.4f}s  {name}")
+    for name, value in report.get("counters", {}).items():
+        lines.append(f"  {value:>12}  {name}")
+    return "\n".join(lines)
+
+
+def main() -> int:
+    names = sys.argv[1:]
+    directory = report_dir()
+    paths = [directory / f"{n}.json" for n in names] if names else sorted(directory.glob("*.json"))
+    if not paths:
+        print(f"暂无报告：{directory}")
+        return 0
+    for path in paths:
+        if not path.exists():
+            print(f"未找到报告：{path}", file=sys.stderr)
+            continue
+        print(summarize(json.loads(path.read_text(encoding="utf-8"))))
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -2,46 +2,226 @@
 """
 Append a mood/energy entry to a local JSONL file.
 Fields are compatible with a simple daily schema: day, slot (morning/noon/evening), score, tags, notes.
+
+- Appends hold an exclusive lock (<log>.lock) and are fsync'd, so concurrent writers never interleave lines.
+- --batch FILE|- ingests many records (JSONL or a JSON array) in one locked append.
+- --dedup skips records whose (day, slot) is already logged (first record wins).
+- --compact rewrites the log sorted by day (stable), so range readers can binary-search it.
+
+Usage examples:
+  python scripts/log_mood.py --slot morning --score 7 --tags work,focus
+  shortcut-export | python scripts/log_mood.py --batch - --dedup
+  python scripts/log_mood.py --compact --dedup
 """
 
 from __future__ import annotations
 
 import argparse
+import fcntl
 import json
+import os
+import sys
+from contextlib import contextmanager
 from datetime import date
 from pathlib import Path
-from typing import List
+from typing import Any, Dict, Iterator, List, Set, Tuple
+
+from mood_index import MoodIndex, open_index
+
+SLOTS = ["morning", "noon", "evening"]
 
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Append a mood/energy record to data/mood/log.jsonl")
     parser.add_argument("--day", default=str(date.today()), help="Day YYYY-MM-DD (default: today)")
-    parser.add_argument("--slot", choices=["morning", "noon", "evening"], required=True, help="Day slot")
-    parser.add_argument("--score", type=float, required=True, help="Score 1-10")
+    parser.add_argument("--slot", choices=SLOTS, help="Day slot")
+    parser.add_argument("--score", type=float, help="Score 1-10")
     parser.add_argument("--tags", default="", help="Comma-separated tags")
     parser.add_argument("--notes", default="", help="Free-form notes")
     parser.add_argument("--output", default="data/mood/log.jsonl", help="Output JSONL path (git-ignored)")
-    return parser.parse_args()
+    parser.add_argument("--batch", help="Read records from a JSONL/JSON-array file, or '-' for stdin")
+    parser.add_argument("--dedup", action="store_true", help="Skip records whose (day, slot) is already logged")
+    parser.add_argument("--compact", action="store_true", help="Rewrite the log sorted by day")
+    args = parser.parse_args()
+    if not (args.batch or args.compact) and (args.slot is None or args.score is None):
+        parser.error("--slot and --score are required unless --batch or --compact is given")
+    return args
 
 
 def ensure_range(score: float) -> float:
     return max(1.0, min(10.0, score))
 
 
+def normalize_record(raw: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate one incoming record and coerce it to the log schema; raises ValueError on bad input."""
+    day = str(raw.get("day") or date.today())
+    date.fromisoformat(day)
+    slot = raw.get("slot")
+    if slot not in SLOTS:
+        raise ValueError(f"invalid slot {slot!r}")
+    if raw.get("score") is None:
+        raise ValueError("missing score")
+    tags = raw.get("tags") or []
+    if isinstance(tags, str):
+        tags = tags.split(",")
+    return {
+        "day": day,
+        "slot": slot,
+        "score": ensure_range(float(raw["score"])),
+        "tags": [str(t).strip() for t in tags if str(t).strip()],
+        "notes": str(raw.get("notes") or ""),
+    }
+
+
+def read_batch(source: str) -> List[Dict[str, Any]]:
+    text = sys.stdin.read() if source == "-" else Path(source).read_text(encoding="utf-8")
+    stripped = text.strip()
+    if not stripped:
+        return []
+    if stripped.startswith("["):
+        items = json.loads(stripped)
+    else:
+        items = [json.loads(line) for line in stripped.splitlines() if line.strip()]
+    records = []
+    for pos, item in enumerate(items, start=1):
+        try:
+            records.append(normalize_record(item))
+        except (ValueError, TypeError, AttributeError) as exc:
+            raise ValueError(f"record {pos}: {exc}") from exc
+    return records
+
+
+@contextmanager
+def locked(path: Path) -> Iterator[None]:
+    # Lock a sidecar file, not the log itself: --compact replaces the log inode.
+    lock_path = path.with_name(path.name + ".lock")
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with lock_path.open("a") as lock:
+        fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+
+def existing_keys(path: Path, days: Set[str]) -> Set[Tuple[str, str]]:
+    idx = open_index(path)
+    keys: Set[Tuple[str, str]] = set()
+    for day in sorted(days):
+        d = date.fromisoformat(day)
+        for record in idx.read_range(d, d):
+            keys.add((str(record.get("day")), str(record.get("slot"))))
+    return keys
+
+
+def dedup_records(records: List[Dict[str, Any]], seen: Set[Tuple[str, str]]) -> List[Dict[str, Any]]:
+    kept = []
+    for record in records:
+        key = (record["day"], record["slot"])
+        if key in seen:
+            continue
+        seen.add(key)
+        kept.append(record)
+    return kept
+
+
+def append_records(path: Path, records: List[Dict[str, Any]], dedup: bool = False) -> int:
+    """Append records in a single locked, fsync'd write. Returns the number written."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with locked(path):
+        if dedup:
+            records = dedup_records(records, existing_keys(path, {r["day"] for r in records}))
+        if not records:
+            return 0
+        data = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records).encode("utf-8")
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            view = memoryview(data)
+            while view:
+                written = os.write(fd, view)
+                view = view[written:]
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+    return len(records)
+
+
+def compact_log(path: Path, dedup: bool = False) -> Tuple[int, int]:
+    """Rewrite the log sorted by (day, slot order), atomically. Returns (before, after) record counts."""
+    if not path.exists():
+        return 0, 0
+    slot_rank = {s: i for i, s in enumerate(SLOTS)}
+    with locked(path):
+        lines = [line for line in path.read_text(encoding="utf-8").splitlines() if line.strip()]
+        records = []
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            if not isinstance(record, dict):
+                # Keep unparsable or non-object lines verbatim at the end rather than dropping data.
+                record = {"day": "9999-12-31", "_raw": line}
+            records.append(record)
+        records.sort(key=lambda r: (str(r.get("day")), slot_rank.get(r.get("slot"), len(SLOTS))))
+        if dedup:
+            seen: Set[Tuple[str, str]] = set()
+            kept = []
+            for r in records:
+                key = (str(r.get("day")), str(r.get("slot")))
+                if "_raw" not in r and key in seen:
+                    continue
+                seen.add(key)
+                kept.append(r)
+            records = kept
+        tmp = path.with_name(path.name + ".compact.tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            for r in records:
+                f.write((r["_raw"] if "_raw" in r else json.dumps(r, ensure_ascii=False)) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        idx = MoodIndex(path)
+        idx.rebuild()
+        idx.save()
+    return len(lines), len(records)
+
+
 def main() -> int:
     args = parse_args()
-    record = {
-        "day": args.day,
-        "slot": args.slot,
-        "score": ensure_range(args.score),
-        "tags": [t.strip() for t in args.tags.split(",") if t.strip()] if args.tags else [],
-        "notes": args.notes,
-    }
     path = Path(args.output)
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(record, ensure_ascii=False) + "\n")
-    print(f"Appended mood record to {path}")
+
+    if args.compact:
+        before, after = compact_log(path, args.dedup)
+        print(f"Compacted {path}: {before} -> {after} records")
+        return 0
+
+    if args.batch:
+        try:
+            records = read_batch(args.batch)
+        except (OSError, ValueError) as exc:
+            print(f"Invalid batch input: {exc}", file=sys.stderr)
+            return 1
+        if args.dedup:
+            records = dedup_records(records, set())
+    else:
+        records = [
+            {
+                "day": args.day,
+                "slot": args.slot,
+                "score": ensure_range(args.score),
+                "tags": [t.strip() for t in args.tags.split(",") if t.strip()] if args.tags else [],
+                "notes": args.notes,
+            }
+        ]
+
+    written = append_records(path, records, args.dedup)
+    if args.batch:
+        print(f"Appended {written}/{len(records)} mood record(s) to {path}")
+    elif written:
+        print(f"Appended mood record to {path}")
+    else:
+        print(f"Skipped duplicate {args.day}/{args.slot} in {path}")
     return 0
 
 
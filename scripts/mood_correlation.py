@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+情绪/精力 × 日程相关性：把 log_mood.py 的每个时段打分（morning/noon/evening）对齐到该时段之前窗口内
+各日历（类别）的占用分钟数，计算整体与滚动相关系数、按类别的精力差值，输出给周报页绘图的 JSON。
+
+- 对齐：每个时段取一个打分时刻（--slot-times，默认 morning=10:00, noon=14:00, evening=21:00），
+  窗口默认回溯到上一个时段的打分时刻（早上回溯到前一晚），三个窗口首尾相接覆盖全天；--window-hours 改为固定时长。
+  同一天同一时段的多条记录取平均。
+- 日程：每个日历的事件区间排序后用 np.maximum.accumulate 合并成互不重叠的忙碌段（同一日历内重叠只算一次），
+  段长前缀和 + np.searchsorted 得到任一时刻之前的累计忙碌分钟，窗口内分钟数 = 两个时刻相减；
+  不栅格化时间轴、不逐样本循环，十年数据也是毫秒级。「全部」为所有日历的并集。
+- 指标（均为 样本 × 类别 矩阵上的向量化运算）：
+  overall.corr        皮尔逊相关（分钟数 vs 分数），另给 by_slot；
+  overall.delta       窗口内该类别 ≥ --min-minutes 时的平均分 − 不足时的平均分；
+  rolling_corr        每月末向前 --rolling-days 天的样本相关（累积和相减，按月一次取出）；
+  monthly_delta       每月的 delta；monthly_score 每月平均分。
+  样本数不足 --min-samples 或方差为 0 时记 null。
+- 输入：data/mood/log.jsonl（经 mood_index 侧车索引按区间读取）；日历读 artifacts/calendar/all-<年>*.json，缺归档的年份直接读周文件。
+- 输出：artifacts/mood/correlation.json；build_weekly 生成周报时并入 payload.mood_correlation。
+
+用法示例：
+  python scripts/mood_correlation.py
+  python scripts/mood_correlation.py --years 2024,2025 --window-hours 3 --rolling-days 60
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from datetime import date, datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple
+
+import build_calendar_archive as archive
+from instrument import count, run_main, span
+from mood_index import SLOTS, open_index
+
+if TYPE_CHECKING:
+    # numpy 与 calendar_heatmap 只在真正计算时导入，`orchard mood-corr --help` 不必先加载它们
+    import numpy as np
+
+BASE = Path(__file__).resolve().parent.parent
+MOOD_LOG = BASE / "data" / "mood" / "log.jsonl"
+DEFAULT_OUT = BASE / "artifacts" / "mood" / "correlation.json"
+DEFAULT_SLOT_TIMES = "morning=10:00,noon=14:00,evening=21:00"
+MINUTES_PER_DAY = 1440
+
+
+def parse_slot_times(spec: str) -> np.ndarray:
+    """'morning=10:00,...' → 按 SLOTS 顺序的打分时刻（当天第几分钟）；三个时刻须递增。"""
+    import numpy as np
+
+    given: Dict[str, int] = {}
+    for part in spec.split(","):
+        if not part.strip():
+            continue
+        slot, _, hhmm = part.partition("=")
+        hour, _, minute = hhmm.strip().partition(":")
+        given[slot.strip()] = int(hour) * 60 + int(minute or 0)
+    missing = [s for s in SLOTS if s not in given]
+    if missing:
+        raise ValueError(f"缺少时段：{', '.join(missing)}")
+    anchors = np.array([given[s] for s in SLOTS], dtype=np.int64)
+    if np.any(np.diff(anchors) <= 0) or anchors[-1] >= MINUTES_PER_DAY:
+        raise ValueError("时段时刻须在当天内且按 morning < noon < evening 递增")
+    return anchors
+
+
+def window_lengths(anchors: np.ndarray, window_hours: float) -> np.ndarray:
+    """每个时段的回溯窗口（分钟）：固定时长，或回溯到上一时段的打分时刻。"""
+    import numpy as np
+
+    if window_hours > 0:
+        return np.full(len(anchors), int(window_hours * 60), dtype=np.int64)
+    previous = np.roll(anchors, 1)
+    previous[0] -= MINUTES_PER_DAY
+    return anchors - previous
+
+
+def load_samples(mood_log: Path, years: List[int], anchors: np.ndarray, origin: np.datetime64) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """情绪记录 → (打分分钟（相对 origin）, 时段编号, 分数)，按时间升序、同一时刻已取平均。"""
+    import numpy as np
+
+    days: List[str] = []
+    slots: List[int] = []
+    scores: List[float] = []
+    slot_index = {s: i for i, s in enumerate(SLOTS)}
+    idx = open_index(mood_log)
+    for record in idx.read_range(date(years[0], 1, 1), date(years[-1], 12, 31)):
+        slot = slot_index.get(str(record.get("slot")))
+        if slot is None or record.get("score") is None:
+            continue
+        days.append(str(record.get("day")))
+        slots.append(slot)
+        scores.append(float(record["score"]))
+    count("mood.records", len(scores))
+    if not scores:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, np.zeros(0)
+    slot_arr = np.array(slots, dtype=np.int64)
+    day_minutes = (np.array(days, dtype="datetime64[D]") - origin.astype("datetime64[D]")).astype(np.int64) * MINUTES_PER_DAY
+    minute = day_minutes + anchors[slot_arr]
+    # 同一 (天, 时段) 的多条记录合并为平均分；np.unique 顺带按时间排好序
+    uniq, inverse = np.unique(minute, return_inverse=True)
+    mean = np.bincount(inverse, weights=np.array(scores)) / np.bincount(inverse)
+    slot_of = np.zeros(len(uniq), dtype=np.int64)
+    slot_of[inverse] = slot_arr
+    return uniq, slot_of, mean
+
+
+def merge_intervals(start: np.ndarray, end: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """[start, end) 区间 → 合并后互不重叠、按开始排序的忙碌段（相接或重叠的并为一段）。"""
+    import numpy as np
+
+    keep = end > start
+    start, end = start[keep], end[keep]
+    if not len(start):
+        return start, end
+    order = np.argsort(start, kind="stable")
+    start, end = start[order], end[order]
+    reach = np.maximum.accumulate(end)
+    # 开始时刻超过此前所有区间的最远结束时刻，即新的一段
+    first = np.concatenate(([True], start[1:] > reach[:-1]))
+    return start[first], np.maximum.reduceat(end, np.flatnonzero(first))
+
+
+def busy_before(seg_start: np.ndarray, seg_end: np.ndarray, at: np.ndarray) -> np.ndarray:
+    """各时刻之前的累计忙碌分钟：完整落在其前的段长之和 + 所在段已过去的部分。"""
+    import numpy as np
+
+    if not len(seg_start):
+        return np.zeros(len(at), dtype=np.int64)
+    lengths = seg_end - seg_start
+    before = np.concatenate(([0], np.cumsum(lengths)))
+    k = np.searchsorted(seg_start, at, side="right")
+    partial = np.clip(at - seg_start[np.maximum(k - 1, 0)], 0, lengths[np.maximum(k - 1, 0)])
+    return before[np.maximum(k - 1, 0)] + np.where(k > 0, partial, 0)
+
+
+def window_minutes(
+    events: List[Dict[str, Any]], origin: np.datetime64, sample_at: np.ndarray, lengths: np.ndarray
+) -> Tuple[np.ndarray, List[str]]:
+    """(样本, 类别) 的窗口 [打分时刻 − 窗口, 打分时刻) 内忙碌分钟数；类别为各日历 + 「全部」。"""
+    import numpy as np
+
+    from calendar_heatmap import ALL, event_arrays
+
+    start_m, end_m, codes, calendars = event_arrays(events, include_allday=False)
+    count("events", len(start_m))
+    start_idx = (start_m - origin).astype(np.int64)
+    end_idx = (end_m - origin).astype(np.int64)
+    lo = sample_at - lengths
+
+    columns: List[np.ndarray] = []
+    for mask in [codes == i for i in range(len(calendars))] + [np.ones(len(codes), dtype=bool)]:
+        seg_start, seg_end = merge_intervals(start_idx[mask], end_idx[mask])
+        columns.append(busy_before(seg_start, seg_end, sample_at) - busy_before(seg_start, seg_end, lo))
+    return np.stack(columns, axis=1).astype(np.float64), calendars + [ALL]
+
+
+def pearson(x: np.ndarray, y: np.ndarray, min_samples: int) -> np.ndarray:
+    """x: (样本, 类别)，y: (样本,) → 每列的相关系数，不可算时为 NaN。"""
+    import numpy as np
+
+    if len(y) < min_samples:
+        return np.full(x.shape[1], np.nan)
+    xc = x - x.mean(axis=0)
+    yc = y - y.mean()
+    denom = np.sqrt((xc * xc).sum(axis=0) * (yc * yc).sum())
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(denom > 0, (xc * yc[:, None]).sum(axis=0) / denom, np.nan)
+
+
+def group_delta(
+    exposed: np.ndarray, y: np.ndarray, group: np.ndarray, groups: int, min_samples: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """按分组（如月份）算 平均分(有该类别) − 平均分(无该类别)，返回 (delta, 有样本数, 无样本数)，形状 (分组, 类别)。"""
+    import numpy as np
+
+    shape = (groups, exposed.shape[1])
+    n_exp = np.zeros(shape)
+    n_all = np.zeros(shape)
+    s_exp = np.zeros(shape)
+    s_all = np.zeros(shape)
+    np.add.at(n_exp, group, exposed)
+    np.add.at(s_exp, group, exposed * y[:, None])
+    n_all += np.bincount(group, minlength=groups)[:, None]
+    s_all += np.bincount(group, weights=y, minlength=groups)[:, None]
+    n_base = n_all - n_exp
+    with np.errstate(invalid="ignore", divide="ignore"):
+        delta = s_exp / n_exp - (s_all - s_exp) / n_base
+    delta[(n_exp < min_samples) | (n_base < min_samples)] = np.nan
+    return delta, n_exp, n_base
+
+
+def rolling_corr(
+    x: np.ndarray, y: np.ndarray, sample_at: np.ndarray, ends: np.ndarray, span_minutes: int, min_samples: int
+) -> np.ndarray:
+    """每个截止时刻向前 span_minutes 内的样本相关：五组累积和相减，(截止时刻, 类别) 一次算出。"""
+    import numpy as np
+
+    def cum(a: np.ndarray) -> np.ndarray:
+        return np.concatenate((np.zeros((1,) + a.shape[1:]), np.cumsum(a, axis=0)))
+
+    sx, sxx, sxy = cum(x), cum(x * x), cum(x * y[:, None])
+    sy, syy = cum(y), cum(y * y)
+    hi = np.searchsorted(sample_at, ends, side="left")
+    lo = np.searchsorted(sample_at, ends - span_minutes, side="left")
+    n = (hi - lo).astype(np.float64)[:, None]
+    dx, dxx, dxy = sx[hi] - sx[lo], sxx[hi] - sxx[lo], sxy[hi] - sxy[lo]
+    dy, dyy = (sy[hi] - sy[lo])[:, None], (syy[hi] - syy[lo])[:, None]
+    cov = n * dxy - dx * dy
+    var = (n * dxx - dx * dx) * (n * dyy - dy * dy)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        r = np.where(var > 1e-9, cov / np.sqrt(np.maximum(var, 1e-9)), np.nan)
+    r[(n < min_samples).ravel()] = np.nan
+    return np.clip(r, -1.0, 1.0)
+
+
+def _clean(values: np.ndarray, digits: int = 3) -> List[Any]:
+    """NaN → None，其余保留 digits 位小数（JSON 友好）。"""
+    import numpy as np
+
+    return [None if np.isnan(v) else round(float(v), digits) for v in values]
+
+
+def build_report(
+    x: np.ndarray, y: np.ndarray, slot_of: np.ndarray, sample_at: np.ndarray, categories: List[str],
+    origin: np.datetime64, years: List[int], min_minutes: float, rolling_days: int, min_samples: int,
+) -> Dict[str, Any]:
+    import numpy as np
+
+    exposed = (x >= min_minutes).astype(np.float64)
+    corr = pearson(x, y, min_samples)
+    by_slot = {slot: pearson(x[slot_of == i], y[slot_of == i], min_samples) for i, slot in enumerate(SLOTS)}
+    delta, n_exp, n_base = group_delta(exposed, y, np.zeros(len(y), dtype=np.int64), 1, min_samples)
+
+    months = np.arange(np.datetime64(f"{years[0]}-01", "M"), np.datetime64(f"{years[-1] + 1}-01", "M"))
+    sample_month = ((origin + sample_at.astype("timedelta64[m]")).astype("datetime64[M]") - months[0]).astype(np.int64)
+    month_delta, _, _ = group_delta(exposed, y, sample_month, len(months), min_samples)
+    month_n = np.bincount(sample_month, minlength=len(months))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        month_score = np.bincount(sample_month, weights=y, minlength=len(months)) / month_n
+    month_ends = ((months + 1).astype("datetime64[m]") - origin).astype(np.int64)
+    rolling = rolling_corr(x, y, sample_at, month_ends, rolling_days * MINUTES_PER_DAY, min_samples)
+
+    overall: Dict[str, Any] = {}
+    for c, name in enumerate(categories):
+        overall[name] = {
+            "corr": _clean(corr[c : c + 1])[0],
+            "delta": _clean(delta[0, c : c + 1])[0],
+            "exposed": int(n_exp[0, c]),
+            "baseline": int(n_base[0, c]),
+            "mean_minutes": round(float(x[:, c].mean()), 1),
+            "by_slot": {slot: _clean(values[c : c + 1])[0] for slot, values in by_slot.items()},
+        }
+    # 按 |corr| 降序排列类别，前端直接取前几个画图
+    ranked = sorted(categories, key=lambda n: -abs(overall[n]["corr"] or 0.0))
+    return {
+        "samples": int(len(y)),
+        "mean_score": round(float(y.mean()), 3),
+        "categories": ranked,
+        "overall": overall,
+        "months": [str(m) for m in months],
+        "monthly_samples": month_n.tolist(),
+        "monthly_score": _clean(month_score),
+        "rolling_corr": {name: _clean(rolling[:, c]) for c, name in enumerate(categories)},
+        "monthly_delta": {name: _clean(month_delta[:, c]) for c, name in enumerate(categories)},
+    }
+
+
+def mood_years(mood_log: Path) -> List[int]:
+    span = open_index(mood_log).day_span()
+    return list(range(span[0].year, span[1].year + 1)) if span else []
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="情绪时段打分 × 之前窗口的日程分钟数：相关系数与精力差值（NumPy 向量化）")
+    parser.add_argument("--mood-log", type=Path, default=MOOD_LOG, help="情绪日志 JSONL，默认 data/mood/log.jsonl")
+    parser.add_argument("--years", help="逗号分隔的年份，默认情绪日志覆盖的全部年份")
+    parser.add_argument("--slot-times", default=DEFAULT_SLOT_TIMES, help=f"各时段打分时刻，默认 {DEFAULT_SLOT_TIMES}")
+    parser.add_argument("--window-hours", type=float, default=0, help="固定回溯窗口（小时）；默认 0 表示回溯到上一时段")
+    parser.add_argument("--min-minutes", type=float, default=30, help="窗口内该类别至少多少分钟算「有」，默认 30")
+    parser.add_argument("--rolling-days", type=int, default=90, help="滚动相关的窗口（天），默认 90")
+    parser.add_argument("--min-samples", type=int, default=8, help="计算相关/差值所需的最少样本，默认 8")
+    parser.add_argument("--archive-dir", type=Path, default=archive.DEFAULT_OUT_DIR, help="年度归档目录，默认 artifacts/calendar")
+    parser.add_argument("--weeks-dir", type=Path, default=archive.DEFAULT_WEEKS_DIR, help="无归档时读取的周文件目录，默认 data/calendar")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUT, help="输出 JSON，默认 artifacts/mood/correlation.json")
+    args = parser.parse_args()
+    try:
+        import numpy as np
+    except ImportError:
+        print("[mood-corr] 需要 numpy：pip install numpy")
+        return 1
+    from calendar_heatmap import load_year
+
+    if not args.mood_log.exists():
+        print(f"[mood-corr] 找不到情绪日志：{args.mood_log}")
+        return 1
+    try:
+        anchors = parse_slot_times(args.slot_times)
+    except ValueError as exc:
+        print(f"[mood-corr] 无法解析 --slot-times：{exc}")
+        return 2
+    years = sorted({int(y) for y in args.years.split(",") if y.strip()}) if args.years else mood_years(args.mood_log)
+    if not years:
+        print(f"[mood-corr] {args.mood_log} 没有记录")
+        return 1
+    years = list(range(years[0], years[-1] + 1))
+    origin = np.datetime64(f"{years[0]}-01-01T00:00", "m")
+
+    with span("load_mood"):
+        sample_at, slot_of, scores = load_samples(args.mood_log, years, anchors, origin)
+    count("samples", len(scores))
+    if not len(scores):
+        print(f"[mood-corr] {years[0]}–{years[-1]} 没有情绪记录")
+        return 1
+    events: List[Dict[str, Any]] = []
+    with span("load_calendar"):
+        for year in years:
+            events.extend(load_year(year, args.archive_dir, args.weeks_dir))
+    lengths = window_lengths(anchors, args.window_hours)[slot_of]
+    with span("window_minutes"):
+        x, categories = window_minutes(events, origin, sample_at, lengths)
+    with span("stats"):
+        report = build_report(
+            x, scores, slot_of, sample_at, categories, origin, years, args.min_minutes, args.rolling_days, args.min_samples
+        )
+
+    output = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "years": years,
+        "slot_times": {slot: f"{int(m) // 60:02d}:{int(m) % 60:02d}" for slot, m in zip(SLOTS, anchors)},
+        "window_minutes": {slot: int(w) for slot, w in zip(SLOTS, window_lengths(anchors, args.window_hours))},
+        "min_minutes": args.min_minutes,
+        "rolling_days": args.rolling_days,
+        "min_samples": args.min_samples,
+        **report,
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with span("write"):
+        text = json.dumps(output, ensure_ascii=False, separators=(",", ":"))
+        args.output.write_text(text, encoding="utf-8")
+    count("bytes_written", len(text.encode("utf-8")))
+    top = ", ".join(f"{n} {output['overall'][n]['corr']}" for n in output["categories"][:3])
+    print(f"[mood-corr] {report['samples']} 个时段样本，{len(events)} 条事件，{years[0]}–{years[-1]} → {args.output}（|r| 最高：{top}）")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(run_main("mood_correlation", main))
@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+Indexed reader and rolling aggregates for the mood log written by log_mood.py.
+
+- Sidecar index: data/mood/log.jsonl.idx.sqlite keeps the byte offset of every record keyed by day,
+  so a date range is read by seeking instead of scanning the whole JSONL.
+- Aggregates (per day / per ISO week: slot score sum+count, tag counts) are maintained
+  incrementally: only bytes appended since the last run are parsed.
+- Records with an unknown slot, a missing/non-numeric score or malformed tags are counted in
+  bad_lines and left out of the index, so they never reach the aggregates or range reads.
+- Opening the index reads one meta table; offsets and aggregates stay on disk and are queried
+  per range, so the cost of opening does not grow with the log.
+- If the log was rewritten (size shrank or the indexed prefix changed), the index is rebuilt.
+
+Usage examples:
+  python scripts/mood_index.py --from 2025-01-01 --to 2025-01-31
+  python scripts/mood_index.py --week 2025-W02
+  python scripts/mood_index.py --rebuild
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import math
+import sqlite3
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_LOG = Path("data/mood/log.jsonl")
+INDEX_VERSION = 3
+SLOTS = ("morning", "noon", "evening")
+# Bytes hashed right before the indexed end; detects a rewritten log with the same or larger size.
+TAIL_PROBE = 256
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS records (day TEXT NOT NULL, offset INTEGER NOT NULL, PRIMARY KEY (day, offset)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS days (day TEXT PRIMARY KEY, bucket TEXT NOT NULL) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS weeks (week TEXT PRIMARY KEY, bucket TEXT NOT NULL) WITHOUT ROWID;
+"""
+
+
+def index_path_for(log_path: Path) -> Path:
+    return log_path.with_name(log_path.name + ".idx.sqlite")
+
+
+def iso_week_label(d: date) -> str:
+    y, w, _ = d.isocalendar()
+    return f"{y}-W{w:02d}"
+
+
+def _empty_bucket() -> Dict[str, Any]:
+    return {"slots": {}, "tags": {}, "count": 0}
+
+
+def _check_record(record: Dict[str, Any]) -> None:
+    """Raise ValueError/TypeError unless the record has a known slot, a finite score and a list of string tags."""
+    if record.get("slot") not in SLOTS:
+        raise ValueError(f"unknown slot: {record.get('slot')!r}")
+    score = record.get("score")
+    if score is None or isinstance(score, bool) or not math.isfinite(float(score)):
+        raise ValueError(f"bad score: {score!r}")
+    tags = record.get("tags") or []
+    if not isinstance(tags, list) or not all(isinstance(tag, str) for tag in tags):
+        raise ValueError(f"bad tags: {tags!r}")
+
+
+def _add_to_bucket(bucket: Dict[str, Any], record: Dict[str, Any]) -> None:
+    slot = record["slot"]
+    score = float(record["score"])
+    acc = bucket["slots"].setdefault(slot, [0.0, 0])
+    acc[0] += score
+    acc[1] += 1
+    for tag in record.get("tags") or []:
+        bucket["tags"][tag] = bucket["tags"].get(tag, 0) + 1
+    bucket["count"] += 1
+
+
+def _merge_bucket(into: Dict[str, Any], other: Dict[str, Any]) -> None:
+    for slot, (total, n) in other["slots"].items():
+        acc = into["slots"].setdefault(slot, [0.0, 0])
+        acc[0] += total
+        acc[1] += n
+    for tag, n in other["tags"].items():
+        into["tags"][tag] = into["tags"].get(tag, 0) + n
+    into["count"] += other["count"]
+
+
+def summarize_bucket(bucket: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn sum/count accumulators into averages (per slot and overall)."""
+    slot_avg = {slot: round(total / n, 2) for slot, (total, n) in bucket["slots"].items() if n}
+    total = sum(t for t, _ in bucket["slots"].values())
+    n = sum(c for _, c in bucket["slots"].values())
+    return {
+        "count": bucket["count"],
+        "avg": round(total / n, 2) if n else None,
+        "slot_avg": slot_avg,
+        "tags": dict(sorted(bucket["tags"].items(), key=lambda kv: (-kv[1], kv[0]))),
+    }
+
+
+class MoodIndex:
+    """Byte-offset index plus per-day/per-week aggregates over an append-only mood JSONL, stored in SQLite."""
+
+    def __init__(self, log_path: Path = DEFAULT_LOG, index_path: Optional[Path] = None) -> None:
+        self.log_path = log_path
+        self.index_path = index_path or index_path_for(log_path)
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        # The dashboard server shares one index between request threads; queries only read.
+        self.conn = sqlite3.connect(str(self.index_path), check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+        self.indexed_bytes = 0
+        self.tail_hash = ""
+        self.bad_lines = 0
+
+    def _reset(self) -> None:
+        self.indexed_bytes = 0
+        self.tail_hash = ""
+        self.bad_lines = 0
+        for table in ("records", "days", "weeks"):
+            self.conn.execute(f"DELETE FROM {table}")
+
+    # -- persistence -------------------------------------------------------
+
+    def load(self) -> "MoodIndex":
+        meta = dict(self.conn.execute("SELECT key, value FROM meta"))
+        if meta.get("version") == str(INDEX_VERSION):
+            self.indexed_bytes = int(meta.get("indexed_bytes", 0))
+            self.tail_hash = meta.get("tail_hash", "")
+            self.bad_lines = int(meta.get("bad_lines", 0))
+        else:
+            self._reset()
+        return self
+
+    def save(self) -> None:
+        """Commit the rows written by refresh() together with the new log position."""
+        meta = {
+            "version": INDEX_VERSION,
+            "log": str(self.log_path),
+            "indexed_bytes": self.indexed_bytes,
+            "tail_hash": self.tail_hash,
+            "bad_lines": self.bad_lines,
+        }
+        self.conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", [(k, str(v)) for k, v in meta.items()])
+        self.conn.commit()
+
+    # -- maintenance -------------------------------------------------------
+
+    def _probe(self, f, end: int) -> str:
+        start = max(0, end - TAIL_PROBE)
+        f.seek(start)
+        return hashlib.sha1(f.read(end - start)).hexdigest()
+
+    def refresh(self) -> int:
+        """Index records appended since the last run; rebuild if the log was rewritten. Returns new records."""
+        if not self.log_path.exists():
+            if self.indexed_bytes:
+                self._reset()
+            return 0
+        size = self.log_path.stat().st_size
+        with self.log_path.open("rb") as f:
+            if size < self.indexed_bytes or (self.indexed_bytes and self._probe(f, self.indexed_bytes) != self.tail_hash):
+                self._reset()
+            if size == self.indexed_bytes:
+                return 0
+            f.seek(self.indexed_bytes)
+            pos = self.indexed_bytes
+            offsets: List[Tuple[str, int]] = []
+            touched: Dict[Tuple[str, str], Dict[str, Any]] = {}
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    # Partially written last line: leave it for the next refresh.
+                    break
+                offset = pos
+                pos += len(raw)
+                line = raw.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                    day = date.fromisoformat(str(record["day"]))
+                    _check_record(record)
+                except (ValueError, KeyError, TypeError, OverflowError):
+                    # Unparsable or invalid (unknown slot, missing/non-numeric score): not indexed at all.
+                    self.bad_lines += 1
+                    continue
+                key = day.isoformat()
+                offsets.append((key, offset))
+                _add_to_bucket(self._bucket(touched, "days", key), record)
+                _add_to_bucket(self._bucket(touched, "weeks", iso_week_label(day)), record)
+            self.indexed_bytes = pos
+            self.tail_hash = self._probe(f, pos) if pos else ""
+        self.conn.executemany("INSERT OR IGNORE INTO records (day, offset) VALUES (?, ?)", offsets)
+        for (table, key), bucket in touched.items():
+            self.conn.execute(f"INSERT OR REPLACE INTO {table} VALUES (?, ?)", (key, json.dumps(bucket, ensure_ascii=False)))
+        return len(offsets)
+
+    def _bucket(self, touched: Dict[Tuple[str, str], Dict[str, Any]], table: str, key: str) -> Dict[str, Any]:
+        """Stored aggregate for a day/week, loaded once per refresh and updated in memory."""
+        bucket = touched.get((table, key))
+        if bucket is None:
+            column = "day" if table == "days" else "week"
+            row = self.conn.execute(f"SELECT bucket FROM {table} WHERE {column} = ?", (key,)).fetchone()
+            bucket = touched[(table, key)] = json.loads(row[0]) if row else _empty_bucket()
+        return bucket
+
+    def rebuild(self) -> int:
+        self._reset()
+        return self.refresh()
+
+    # -- queries -----------------------------------------------------------
+
+    def day_count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM days").fetchone()[0]
+
+    def day_span(self) -> Optional[Tuple[date, date]]:
+        """First and last day that has records, or None for an empty log."""
+        first, last = self.conn.execute("SELECT MIN(day), MAX(day) FROM days").fetchone()
+        return (date.fromisoformat(first), date.fromisoformat(last)) if first else None
+
+    def read_range(self, start: date, end: date) -> Iterator[Dict[str, Any]]:
+        """Yield raw records for days in [start, end] by seeking to indexed offsets."""
+        wanted = [
+            row[0]
+            for row in self.conn.execute(
+                "SELECT offset FROM records WHERE day BETWEEN ? AND ? ORDER BY offset", (start.isoformat(), end.isoformat())
+            )
+        ]
+        if not wanted:
+            return
+        with self.log_path.open("rb") as f:
+            for off in wanted:
+                f.seek(off)
+                yield json.loads(f.readline())
+
+    def day_summary(self, day: date) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute("SELECT bucket FROM days WHERE day = ?", (day.isoformat(),)).fetchone()
+        return summarize_bucket(json.loads(row[0])) if row else None
+
+    def week_summary(self, label: str) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute("SELECT bucket FROM weeks WHERE week = ?", (label,)).fetchone()
+        return summarize_bucket(json.loads(row[0])) if row else None
+
+    def range_summary(self, start: date, end: date) -> Dict[str, Any]:
+        merged = _empty_bucket()
+        rows = self.conn.execute("SELECT bucket FROM days WHERE day BETWEEN ? AND ? ORDER BY day", (start.isoformat(), end.isoformat())).fetchall()
+        for (bucket,) in rows:
+            _merge_bucket(merged, json.loads(bucket))
+        return summarize_bucket(merged)
+
+    def week_payload(self, label: str) -> Dict[str, Any]:
+        """Mood block for the weekly page: per-day slot scores plus week averages and tags."""
+        year_part, week_part = label.split("-W")
+        monday = date.fromisocalendar(int(year_part), int(week_part), 1)
+        days: List[Dict[str, Any]] = []
+        for i in range(7):
+            d = monday + timedelta(days=i)
+            summary = self.day_summary(d)
+            row: Dict[str, Any] = {"date": d.isoformat(), "avg": summary["avg"] if summary else None}
+            for slot in SLOTS:
+                row[slot] = summary["slot_avg"].get(slot) if summary else None
+            days.append(row)
+        week = self.week_summary(label) or summarize_bucket(_empty_bucket())
+        return {
+            "source": "log",
+            "week": label,
+            "days": days,
+            "avg": week["avg"],
+            "slot_avg": week["slot_avg"],
+            "tags": week["tags"],
+            "count": week["count"],
+        }
+
+
+def _line_from(f, pos: int) -> Tuple[int, bytes]:
+    """Start offset and content of the first full line beginning at or after pos."""
+    if pos == 0:
+        f.seek(0)
+    else:
+        f.seek(pos - 1)
+        f.readline()
+    start = f.tell()
+    return start, f.readline()
+
+
+def _parse_line(line: bytes) -> Optional[Dict[str, Any]]:
+    """A record line as a dict; None for blank, unparsable or non-object lines (kept verbatim by --compact)."""
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return None
+    return record if isinstance(record, dict) else None
+
+
+def _line_day(line: bytes) -> Optional[str]:
+    record = _parse_line(line)
+    return None if record is None else str(record.get("day") or "")
+
+
+def read_sorted_range(log_path: Path, start: date, end: date) -> Iterator[Dict[str, Any]]:
+    """
+    Binary-search a day-sorted log (see log_mood.py --compact) without the sidecar index.
+    Records appended after the last compaction may be out of order and are not guaranteed to be found.
+    """
+    lo_key, hi_key = start.isoformat(), end.isoformat()
+    with log_path.open("rb") as f:
+        lo, hi = 0, log_path.stat().st_size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            _, line = _line_from(f, mid)
+            day = _line_day(line) if line else None
+            while line and day is None:
+                # Skip lines that are not records; past the last record counts as "after the range".
+                line = f.readline()
+                day = _line_day(line) if line else None
+            if day is not None and day < lo_key:
+                lo = mid + 1
+            else:
+                hi = mid
+        pos, _ = _line_from(f, lo)
+        f.seek(pos)
+        for line in f:
+            record = _parse_line(line)
+            if record is None:
+                continue
+            if str(record.get("day") or "") > hi_key:
+                break
+            yield record
+
+
+def open_index(log_path: Path = DEFAULT_LOG, save: bool = True) -> MoodIndex:
+    """Load the sidecar index, apply any appended records, and persist it if it changed."""
+    idx = MoodIndex(log_path).load()
+    before = (idx.indexed_bytes, idx.tail_hash)
+    idx.refresh()
+    if save and (idx.indexed_bytes, idx.tail_hash) != before:
+        idx.save()
+    return idx
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Read mood records and aggregates via a sidecar day index.")
+    parser.add_argument("--log", type=Path, default=DEFAULT_LOG, help="Mood JSONL path")
+    parser.add_argument("--from", dest="start", help="Start day YYYY-MM-DD")
+    parser.add_argument("--to", dest="end", help="End day YYYY-MM-DD (inclusive, default: --from)")
+    parser.add_argument("--week", help="ISO week label like 2025-W02 (prints the weekly payload)")
+    parser.add_argument("--records", action="store_true", help="Print raw records of the range instead of a summary")
+    parser.add_argument("--bisect", action="store_true", help="With --records: binary-search a compacted log, skip the index")
+    parser.add_argument("--rebuild", action="store_true", help="Drop the sidecar index and rescan the log")
+    args = parser.parse_args()
+    if args.bisect and not args.records:
+        parser.error("--bisect requires --records")
+    return args
+
+
+def main() -> int:
+    args = parse_args()
+    if args.bisect:
+        try:
+            start = date.fromisoformat(args.start or "")
+            end = date.fromisoformat(args.end) if args.end else start
+        except ValueError:
+            print("Invalid --from/--to, expected YYYY-MM-DD", file=sys.stderr)
+            return 1
+        for record in read_sorted_range(args.log, start, end):
+            print(json.dumps(record, ensure_ascii=False))
+        return 0
+
+    if args.rebuild:
+        idx = MoodIndex(args.log)
+        count = idx.rebuild()
+        idx.save()
+        print(f"Rebuilt {idx.index_path} ({count} records, {idx.day_count()} days, {idx.bad_lines} bad lines skipped)")
+        if not (args.start or args.week):
+            return 0
+    else:
+        idx = open_index(args.log)
+
+    if args.week:
+        try:
+            payload = idx.week_payload(args.week)
+        except ValueError:
+            print("Invalid --week, expected YYYY-Www", file=sys.stderr)
+            return 1
+        print(json.dumps(payload, ensure_ascii=False, indent=2))
+        return 0
+
+    if not args.start:
+        print("Pass --from/--to or --week", file=sys.stderr)
+        return 1
+    try:
+        start = date.fromisoformat(args.start)
+        end = date.fromisoformat(args.end) if args.end else start
+    except ValueError:
+        print("Invalid --from/--to, expected YYYY-MM-DD", file=sys.stderr)
+        return 1
+
+    if args.records:
+        for record in idx.read_range(start, end):
+            print(json.dumps(record, ensure_ascii=False))
+    else:
+        print(json.dumps(idx.range_summary(start, end), ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+统一入口：orchard <子命令> [参数...]，子命令模块按需导入，cron / 语音触发时只付一个脚本的导入开销。
+
+- 子命令表只含模块名与说明，`orchard --help` 不导入任何子命令模块；
+- 选中子命令后才 import 对应脚本，sys.argv 换成 `orchard <子命令> 参数...` 交给脚本自己的 argparse，
+  已接入埋点的脚本照旧经 run_main 写报告（报告名与单独运行时相同）；
+- 共享配置：仓库根目录的 orchard.json（或 ORCHARD_CONFIG 指向的文件）里 "env" 段作为环境变量默认值，
+  例如 {"env": {"AW_URL": "http://127.0.0.1:5600/api/0", "CALDAV_URL": "..."}}；已设置的环境变量优先。
+
+用法示例：
+  python scripts/orchard.py fetch-calendar --year 2026
+  python scripts/orchard.py aw --date 2026-03-02
+  python scripts/orchard.py mood --help
+启动耗时基准：python scripts/bench_startup.py
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+
+# 入口本身只用 os/sys：pathlib、typing 留给子命令按需导入，`orchard --help` 近乎零开销
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CONFIG = os.path.join(BASE, "orchard.json")
+
+# 子命令 → (模块, run_main 报告名；None 表示脚本未接入埋点, 说明)
+COMMANDS: dict[str, tuple[str, str | None, str]] = {
+    "fetch-calendar": ("fetch_calendar", "fetch_calendar", "icalBuddy 抓取日历，写 week-*.json"),
+    "archive": ("build_calendar_archive", "build_calendar_archive", "合并周文件生成年度日历归档"),
+    "weekly": ("build_weekly", "build_weekly", "生成可交互周报 html/output/weekly.html"),
+    "heatmap": ("calendar_heatmap", "calendar_heatmap", "多年星期 × 时段占用热力图（需 numpy）"),
+    "aw": ("fetch_aw", "fetch_aw", "拉取 ActivityWatch 当日事件与汇总"),
+    "mood": ("log_mood", None, "记录/查询情绪日志"),
+    "mood-corr": ("mood_correlation", "mood_correlation", "情绪时段 × 日程分钟数相关性（需 numpy）"),
+    "bear": ("export_bear_notes", "export_bear_notes", "导出 Bear 笔记"),
+    "reminders": ("fetch_reminders", "fetch_reminders", "增量导入 Apple Reminders，写按周任务 JSON"),
+    "read-week": ("read_calendar_week", "read_calendar_week", "按周读取日历 JSON 并打印"),
+    "ics": ("import_ics", "import_ics", "导入 .ics 文件（RRULE 按窗口展开）"),
+    "caldav": ("caldav_sync", "caldav_sync", "CalDAV 增量同步"),
+    "pipeline": ("pipeline", None, "按依赖图运行整条刷新链路"),
+    "serve": ("serve_dashboard", "serve_dashboard", "仪表盘本地查询服务"),
+}
+
+
+def apply_config(path: str | None = None) -> None:
+    """把配置文件的 env 段写入环境变量默认值；文件缺失或格式不对时忽略。"""
+    path = path or os.environ.get("ORCHARD_CONFIG") or DEFAULT_CONFIG
+    if not os.path.isfile(path):
+        return
+    import json
+
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as exc:
+        print(f"[orchard] 忽略无法读取的配置 {path}：{exc}", file=sys.stderr)
+        return
+    for key, value in (data.get("env") or {}).items():
+        os.environ.setdefault(str(key), str(value))
+
+
+def usage() -> str:
+    width = max(len(name) for name in COMMANDS)
+    lines = ["用法：orchard <子命令> [参数...]   （orchard <子命令> --help 查看子命令参数）", "", "子命令："]
+    lines += [f"  {name.ljust(width)}  {desc}" for name, (_, _, desc) in COMMANDS.items()]
+    return "\n".join(lines)
+
+
+def dispatch(name: str, argv: list[str]) -> int:
+    import importlib
+
+    module_name, report, _ = COMMANDS[name]
+    sys.argv = [f"orchard {name}", *argv]
+    module = importlib.import_module(module_name)
+    if report is None:
+        return module.main() or 0
+    from instrument import run_main
+
+    return run_main(report, module.main)
+
+
+def main() -> int:
+    args = sys.argv[1:]
+    if not args or args[0] in ("-h", "--help", "help"):
+        print(usage())
+        return 0
+    name = args[0]
+    if name not in COMMANDS:
+        print(f"未知子命令：{name}\n\n{usage()}", file=sys.stderr)
+        return 2
+    apply_config()
+    return dispatch(name, args[1:])
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+一条命令刷新整个仪表盘：把各脚本声明为带输入/输出的阶段（stage），按依赖图调度。
+- 指纹：输入文件（路径 + 大小 + mtime）、阶段脚本及其依赖模块的内容、命令行参数；与上次成功运行相同且输出仍在则跳过。
+- 外部数据源（icalBuddy 日历、CalDAV、ActivityWatch）没有本地输入，按 --refresh-minutes 控制最短重抓间隔。
+- 互不依赖的阶段（日历 / AW / Bear）并发运行（--jobs），每个阶段的输出写入 artifacts/pipeline/logs/<阶段>.log。
+- 状态：artifacts/pipeline/state.json；每次运行的阶段耗时追加到 artifacts/pipeline/runs.jsonl。
+- 运行环境缺失（非 macOS 无 icalBuddy、data/calendar/ics/ 下没有 .ics、未设置 CALDAV_URL、找不到 Bear / Reminders 数据库、没有情绪日志、未安装 numpy）的阶段记为 unavailable，不算失败。
+
+用法示例：
+  python scripts/pipeline.py                   # 刷新全部
+  python scripts/pipeline.py --list            # 查看阶段、输入/输出与依赖
+  python scripts/pipeline.py --only weekly --force
+  python scripts/pipeline.py --dry-run          # 只看哪些阶段需要运行
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import date, datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+BASE = Path(__file__).resolve().parent.parent
+SCRIPTS = BASE / "scripts"
+PIPELINE_DIR = BASE / "artifacts" / "pipeline"
+STATE_FILE = PIPELINE_DIR / "state.json"
+RUNS_FILE = PIPELINE_DIR / "runs.jsonl"
+LOG_DIR = PIPELINE_DIR / "logs"
+NOTES_EXPORT_DIR = BASE / "data" / "notes_export" / "all"
+DEFAULT_REFRESH_MINUTES = 60
+
+
+class Stage:
+    """一个流水线阶段：命令 + 声明的输入/输出（相对 BASE 的 glob）+ 依赖。"""
+
+    def __init__(
+        self,
+        name: str,
+        argv: List[str],
+        inputs: Optional[List[str]] = None,
+        outputs: Optional[List[str]] = None,
+        deps: Optional[List[str]] = None,
+        code: Optional[List[str]] = None,
+        external: bool = False,
+        check: Optional[Callable[[], Optional[str]]] = None,
+    ) -> None:
+        self.name = name
+        self.argv = list(argv)
+        self.inputs = inputs or []
+        self.outputs = outputs or []
+        self.deps = deps or []
+        self.code = [argv[0]] + (code or [])
+        # external：数据来自本地文件以外（日历、AW 服务），只能按时间间隔判断是否重抓
+        self.external = external
+        self.check = check
+
+    def command(self) -> List[str]:
+        return [sys.executable, str(SCRIPTS / self.argv[0])] + self.argv[1:]
+
+    def unavailable_reason(self) -> Optional[str]:
+        return self.check() if self.check else None
+
+    def fingerprint(self) -> str:
+        h = hashlib.sha256()
+        h.update(json.dumps(self.argv, ensure_ascii=False).encode("utf-8"))
+        for name in self.code:
+            path = SCRIPTS / name
+            h.update(name.encode("utf-8"))
+            h.update(path.read_bytes() if path.exists() else b"-")
+        for path in expand(self.inputs):
+            st = path.stat()
+            h.update(f"{path}\0{st.st_size}\0{st.st_mtime_ns}\n".encode("utf-8"))
+        return h.hexdigest()
+
+    def outputs_present(self) -> bool:
+        return all(any(True for _ in expand([pattern])) for pattern in self.outputs)
+
+
+def expand(patterns: List[str]) -> List[Path]:
+    """Glob 模式（相对 BASE）或绝对路径 → 存在的文件，排序保证指纹稳定。"""
+    found = set()
+    for pattern in patterns:
+        p = Path(pattern)
+        if p.is_absolute():
+            if p.exists():
+                found.add(p)
+            continue
+        found.update(x for x in BASE.glob(pattern) if x.is_file())
+    return sorted(found)
+
+
+def _need_icalbuddy() -> Optional[str]:
+    return None if shutil.which("icalBuddy") else "未找到 icalBuddy（仅 macOS）"
+
+
+def _need_ics() -> Optional[str]:
+    return None if any((BASE / "data" / "calendar" / "ics").glob("*.ics")) else "data/calendar/ics/ 下没有 .ics 文件"
+
+
+def _need_caldav() -> Optional[str]:
+    return None if os.environ.get("CALDAV_URL") else "未设置 CALDAV_URL"
+
+
+def _need_numpy() -> Optional[str]:
+    import importlib.util
+
+    return None if importlib.util.find_spec("numpy") else "未安装 numpy"
+
+
+def _need_mood_correlation() -> Optional[str]:
+    if not (BASE / "data" / "mood" / "log.jsonl").exists():
+        return "没有情绪日志 data/mood/log.jsonl"
+    return _need_numpy()
+
+
+def _bear_db() -> Path:
+    from export_bear_notes import DEFAULT_DB
+
+    return Path(DEFAULT_DB)
+
+
+def _need_bear() -> Optional[str]:
+    return None if _bear_db().exists() else f"未找到 Bear 数据库：{_bear_db()}"
+
+
+def _reminders_inputs() -> List[str]:
+    from fetch_reminders import DEFAULT_EXPORT, default_stores
+
+    paths = [str(p) for p in default_stores()]
+    return paths + [f"{p}-wal" for p in paths] + [str(DEFAULT_EXPORT.relative_to(BASE))]
+
+
+def _need_reminders() -> Optional[str]:
+    return None if expand(_reminders_inputs()) else "未找到 Reminders 存储，也没有 data/reminders/export.json"
+
+
+def build_stages(year: int) -> Dict[str, Stage]:
+    today = date.today().isoformat()
+    bear_db = _bear_db()
+    stages = [
+        Stage("calendar.fetch", ["fetch_calendar.py"], outputs=["data/calendar/week-*.json"], external=True, code=["calendar_event.py"], check=_need_icalbuddy),
+        Stage(
+            "calendar.ics",
+            ["import_ics.py", "--year", str(year)],
+            inputs=["data/calendar/ics/*.ics"],
+            # 写自己的来源目录，不覆盖 icalBuddy 的周文件，可与 calendar.fetch 并行
+            outputs=["data/calendar/sources/ics/week-*.json"],
+            code=["fetch_calendar.py", "calendar_event.py", "calendar_sources.py"],
+            check=_need_ics,
+        ),
+        Stage(
+            "calendar.caldav",
+            ["caldav_sync.py", "--year", str(year)],
+            # 写 data/calendar/sources/caldav/，与另两个日历来源互不覆盖
+            outputs=["data/calendar/caldav/state.json", "data/calendar/sources/caldav/week-*.json"],
+            external=True,
+            code=["fetch_calendar.py", "calendar_event.py", "calendar_sources.py", "import_ics.py"],
+            check=_need_caldav,
+        ),
+        Stage(
+            "calendar.archive",
+            ["build_calendar_archive.py", "--year", str(year)],
+            inputs=["data/calendar/week-*.json", "data/calendar/sources/*/week-*.json"],
+            outputs=[f"artifacts/calendar/all-{year}*.json"],
+            deps=["calendar.fetch", "calendar.ics", "calendar.caldav"],
+            code=["calendar_event.py", "calendar_sources.py"],
+        ),
+        Stage(
+            "calendar.heatmap",
+            ["calendar_heatmap.py"],
+            inputs=["artifacts/calendar/all-*.json"],
+            outputs=["artifacts/calendar/heatmap.json"],
+            deps=["calendar.archive"],
+            code=["build_calendar_archive.py", "calendar_event.py", "calendar_sources.py"],
+            check=_need_numpy,
+        ),
+        Stage(
+            "mood.correlation",
+            ["mood_correlation.py"],
+            inputs=["data/mood/log.jsonl", "artifacts/calendar/all-*.json"],
+            outputs=["artifacts/mood/correlation.json"],
+            deps=["calendar.archive"],
+            code=["build_calendar_archive.py", "calendar_event.py", "calendar_sources.py", "calendar_heatmap.py", "mood_index.py"],
+            check=_need_mood_correlation,
+        ),
+        Stage(
+            "weekly",
+            ["build_weekly.py"],
+            inputs=[
+                "data/calendar/week-*.json",
+                "data/calendar/sources/*/week-*.json",
+                "data/mood/log.jsonl",
+                "data/reminders/week-*.json",
+                "artifacts/mood/correlation.json",
+                "html/v1/weekly_mock.html",
+                "specs/time-energy-visualization/mock-data/*.json",
+            ],
+            outputs=["html/output/weekly.html"],
+            deps=["calendar.fetch", "calendar.ics", "calendar.caldav", "reminders.fetch", "mood.correlation"],
+            code=["calendar_event.py", "calendar_sources.py", "mood_index.py"],
+        ),
+        Stage(
+            "reminders.fetch",
+            ["fetch_reminders.py"],
+            inputs=_reminders_inputs(),
+            outputs=["data/reminders/reminders.sqlite"],
+            code=["mood_index.py"],
+            check=_need_reminders,
+        ),
+        Stage(
+            "aw.fetch",
+            ["fetch_aw.py", "--date", today],
+            outputs=[f"data/activitywatch/{today}.*"],
+            external=True,
+            code=["aw_columnar.py"],
+        ),
+        Stage(
+            "bear.export",
+            [
+                "export_bear_notes.py",
+                "--incremental",
+                "--search-index",
+                "--output-dir",
+                str(NOTES_EXPORT_DIR.relative_to(BASE)),
+                "--progress-interval",
+                "-1",
+            ],
+            inputs=[str(bear_db), f"{bear_db}-wal"],
+            outputs=[f"{NOTES_EXPORT_DIR.relative_to(BASE)}/manifest.json"],
+            code=["bear_attachments.py", "bear_links.py", "bear_search.py"],
+            check=_need_bear,
+        ),
+    ]
+    return {s.name: s for s in stages}
+
+
+def load_state() -> Dict[str, Dict[str, object]]:
+    try:
+        return json.loads(STATE_FILE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state: Dict[str, Dict[str, object]]) -> None:
+    STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp = STATE_FILE.with_name(STATE_FILE.name + ".tmp")
+    tmp.write_text(json.dumps(state, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, STATE_FILE)
+
+
+def skip_reason(stage: Stage, previous: Optional[Dict[str, object]], fingerprint: str, refresh_minutes: float) -> Optional[str]:
+    """返回跳过原因；None 表示需要运行。"""
+    if not previous or previous.get("status") != "ok" or previous.get("fingerprint") != fingerprint:
+        return None
+    if not stage.outputs_present():
+        return None
+    if stage.external:
+        age_min = (time.time() - float(previous.get("finished_at", 0))) / 60
+        if age_min >= refresh_minutes:
+            return None
+        return f"{age_min:.0f} 分钟前已抓取"
+    return "输入未变"
+
+
+def run_stage(stage: Stage) -> Dict[str, object]:
+    LOG_DIR.mkdir(parents=True, exist_ok=True)
+    log_path = LOG_DIR / f"{stage.name}.log"
+    t0 = time.perf_counter()
+    with log_path.open("w", encoding="utf-8") as log:
+        proc = subprocess.run(stage.command(), cwd=BASE, stdout=log, stderr=subprocess.STDOUT)
+    return {
+        "status": "ok" if proc.returncode == 0 else "failed",
+        "returncode": proc.returncode,
+        "seconds": round(time.perf_counter() - t0, 3),
+        "log": str(log_path.relative_to(BASE)),
+    }
+
+
+def order_stages(stages: Dict[str, Stage]) -> List[str]:
+    """拓扑序（声明顺序优先），检测环与未知依赖。"""
+    ordered: List[str] = []
+    visiting: set = set()
+
+    def visit(name: str) -> None:
+        if name in ordered:
+            return
+        if name in visiting:
+            raise ValueError(f"阶段依赖存在环：{name}")
+        if name not in stages:
+            raise ValueError(f"未知阶段：{name}")
+        visiting.add(name)
+        for dep in stages[name].deps:
+            visit(dep)
+        visiting.discard(name)
+        ordered.append(name)
+
+    for name in stages:
+        visit(name)
+    return ordered
+
+
+def run(stages: Dict[str, Stage], selected: List[str], args: argparse.Namespace) -> Dict[str, Dict[str, object]]:
+    """按依赖并发调度被选中的阶段；未选中的依赖视为已满足。"""
+    state = load_state()
+    results: Dict[str, Dict[str, object]] = {}
+    pending = [n for n in order_stages(stages) if n in selected]
+    running: Dict[Future, str] = {}
+    fingerprint_seconds: Dict[str, float] = {}
+
+    def settle(name: str, result: Dict[str, object]) -> None:
+        results[name] = result
+        status = result["status"]
+        extra = f"（{result['reason']}）" if result.get("reason") else ""
+        timing = f" {result['seconds']:.2f}s" if "seconds" in result else ""
+        print(f"[{status}] {name}{timing}{extra}", flush=True)
+
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        while pending or running:
+            for name in list(pending):
+                stage = stages[name]
+                deps = [d for d in stage.deps if d in selected]
+                if any(d not in results for d in deps):
+                    continue
+                pending.remove(name)
+                blocked = [d for d in deps if results[d]["status"] in ("failed", "blocked")]
+                if blocked:
+                    settle(name, {"status": "blocked", "reason": f"依赖失败：{', '.join(blocked)}"})
+                    continue
+                reason = stage.unavailable_reason()
+                if reason:
+                    settle(name, {"status": "unavailable", "reason": reason})
+                    continue
+                t0 = time.perf_counter()
+                fingerprint = stage.fingerprint()
+                fp_seconds = round(time.perf_counter() - t0, 4)
+                skip = None if args.force else skip_reason(stage, state.get(name), fingerprint, args.refresh_minutes)
+                if skip:
+                    settle(name, {"status": "skipped", "reason": skip, "fingerprint_seconds": fp_seconds})
+                    continue
+                if args.dry_run:
+                    settle(name, {"status": "would-run", "fingerprint_seconds": fp_seconds})
+                    continue
+                print(f"[start] {name}", flush=True)
+                fingerprint_seconds[name] = fp_seconds
+                running[pool.submit(run_stage, stage)] = name
+            if not running:
+                continue
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                result = future.result()
+                result["fingerprint_seconds"] = fingerprint_seconds.pop(name)
+                if result["status"] == "ok":
+                    # 取运行后的指纹：阶段改写自身输入（如 Bear 数据库的 -wal 检查点）不应导致下次重跑
+                    state[name] = {
+                        "status": "ok",
+                        "fingerprint": stages[name].fingerprint(),
+                        "finished_at": time.time(),
+                        "seconds": result["seconds"],
+                    }
+                else:
+                    state[name] = {"status": result["status"], "finished_at": time.time()}
+                settle(name, result)
+    if not args.dry_run:
+        save_state(state)
+    return results
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="按依赖图刷新日历 / ActivityWatch / 情绪 / Bear 数据与周报")
+    parser.add_argument("--only", help="仅运行指定阶段（逗号分隔；未选中的依赖视为已满足）")
+    parser.add_argument("--force", action="store_true", help="忽略指纹，强制运行")
+    parser.add_argument("--dry-run", action="store_true", help="只判断哪些阶段需要运行，不执行")
+    parser.add_argument("--jobs", type=int, default=3, help="并发阶段数，默认 3")
+    parser.add_argument("--year", type=int, default=datetime.now().year, help="calendar.archive 的年份，默认当前年")
+    parser.add_argument(
+        "--refresh-minutes",
+        type=float,
+        default=DEFAULT_REFRESH_MINUTES,
+        help=f"外部数据源（日历、AW）的最短重抓间隔（分钟），默认 {DEFAULT_REFRESH_MINUTES}",
+    )
+    parser.add_argument("--list", action="store_true", help="列出阶段及依赖")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    stages = build_stages(args.year)
+    if args.list:
+        for name in order_stages(stages):
+            s = stages[name]
+            deps = f" ← {', '.join(s.deps)}" if s.deps else ""
+            print(f"{name}{deps}\n  命令：{' '.join(s.argv)}\n  输入：{s.inputs or '（外部数据源）'}\n  输出：{s.outputs}")
+        return 0
+
+    selected = [n.strip() for n in args.only.split(",")] if args.only else list(stages)
+    unknown = [n for n in selected if n not in stages]
+    if unknown:
+        print(f"未知阶段：{', '.join(unknown)}（可选：{', '.join(stages)}）", file=sys.stderr)
+        return 1
+
+    t0 = time.perf_counter()
+    started = datetime.now().isoformat(timespec="seconds")
+    results = run(stages, selected, args)
+    total = round(time.perf_counter() - t0, 3)
+    if not args.dry_run:
+        RUNS_FILE.parent.mkdir(parents=True, exist_ok=True)
+        with RUNS_FILE.open("a", encoding="utf-8") as f:
+            record = {"started": started, "seconds": total, "jobs": args.jobs, "stages": results}
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    failed = [n for n, r in results.items() if r["status"] in ("failed", "blocked")]
+    print(f"完成：{len(results)} 个阶段，用时 {total:.2f}s" + (f"，失败：{', '.join(failed)}" if failed else ""))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
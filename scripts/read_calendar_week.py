@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """
-读取 `scripts/fetch_calendar.py` 生成的周级日历 JSON，转换为渲染需要的日/周结构。
+读取 `scripts/fetch_calendar.py` 生成的周级日历 JSON（及 ics / caldav 来源的同一周，按 calendar_sources 合并），
+转换为渲染需要的日/周结构。
 输出结构参考 specs/time-energy-visualization/mock-data/calendar.mock.json 的 day/week。
 """
 
@@ -9,10 +10,14 @@ from __future__ import annotations
 
 import argparse
 import json
-from datetime import date, datetime, timedelta
+from datetime import date, timedelta
 from pathlib import Path
 from typing import Any, Dict, List
 
+from calendar_event import Event, from_dicts
+from calendar_sources import SOURCES, merge_sources, source_dir
+from instrument import count, run_main, span
+
 BASE = Path(__file__).resolve().parent.parent
 DATA_DIR = BASE / "data" / "calendar"
 
@@ -37,59 +42,57 @@ def week_start_from_label(label: str) -> date:
     return date.fromisocalendar(int(year_part), int(week_part), 1)
 
 
-def find_source_path(week_label: str, explicit: str | None) -> Path:
+def find_source_paths(week_label: str, explicit: str | None) -> List[Path]:
+    """该周各来源的周文件（icalbuddy 在前）；--input 指定时只读该文件。"""
     if explicit:
         path = Path(explicit)
         if not path.exists():
             raise FileNotFoundError(f"指定的输入不存在：{path}")
-        return path
+        return [path]
 
     candidates = [
         DATA_DIR / f"week-{week_label}.json",
         DATA_DIR / f"week-{week_label}-icalbuddy.json",
     ]
-    for path in candidates:
-        if path.exists():
-            return path
-    raise FileNotFoundError(f"未找到日历源文件：{', '.join(str(c) for c in candidates)}")
+    paths = [path for path in candidates if path.exists()][:1]
+    paths += [p for p in (source_dir(DATA_DIR, s) / f"week-{week_label}.json" for s in SOURCES[1:]) if p.exists()]
+    if not paths:
+        raise FileNotFoundError(f"未找到日历源文件：{', '.join(str(c) for c in candidates)} 及 {DATA_DIR / 'sources'} 下的同名周文件")
+    return paths
 
 
-def load_events(path: Path) -> List[Dict[str, Any]]:
-    data = json.loads(path.read_text(encoding="utf-8"))
-    events = data.get("events") or []
-    return [evt for evt in events if isinstance(evt, dict)]
+def load_events(paths: List[Path]) -> List[Event]:
+    groups = []
+    for path in paths:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        groups.append((path, data.get("events") or []))
+    return from_dicts(evt for _, evt in merge_sources(groups))
 
 
-def normalize_events(events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def normalize_events(events: List[Event]) -> List[Dict[str, Any]]:
     normalized: List[Dict[str, Any]] = []
     for evt in events:
-        start_raw = evt.get("start")
-        end_raw = evt.get("end")
-        if not start_raw or not end_raw:
-            continue
-        try:
-            start_dt = datetime.fromisoformat(str(start_raw))
-            end_dt = datetime.fromisoformat(str(end_raw))
-        except ValueError:
+        if not evt.parsed:
             continue
-        duration_min = max(0, int((end_dt - start_dt).total_seconds() // 60))
+        day, start = evt.wall("start")
+        category = (evt.extra or {}).get("category")
         normalized.append(
             {
-                "date": start_dt.date().isoformat(),
-                "start": start_dt.strftime("%H:%M"),
-                "end": end_dt.strftime("%H:%M"),
-                "title": evt.get("title") or "",
-                "calendar": evt.get("calendar") or "",
-                "category": evt.get("category") or evt.get("calendar") or "",
-                "duration_minutes": duration_min,
-                "notes": evt.get("notes") or "",
+                "date": day,
+                "start": start,
+                "end": evt.wall("end")[1],
+                "title": evt.title or "",
+                "calendar": evt.calendar or "",
+                "category": category or evt.calendar or "",
+                "duration_minutes": evt.minutes,
+                "notes": evt.notes or "",
             }
         )
     normalized.sort(key=lambda x: (x["date"], x["start"], x["title"]))
     return normalized
 
 
-def build_payload(week_label: str, day_label: str | None, events: List[Dict[str, Any]], source_path: Path) -> Dict[str, Any]:
+def build_payload(week_label: str, day_label: str | None, events: List[Dict[str, Any]], source_paths: List[Path]) -> Dict[str, Any]:
     day_for_view = day_label or (week_start_from_label(week_label).isoformat() if events else None)
     day_rows = [evt for evt in events if evt["date"] == day_for_view] if day_for_view else []
     return {
@@ -99,7 +102,7 @@ def build_payload(week_label: str, day_label: str | None, events: List[Dict[str,
         "meta": {
             "week": week_label,
             "selected_day": day_for_view,
-            "source": str(source_path),
+            "source": ", ".join(str(p) for p in source_paths),
             "event_count": len(events),
         },
     }
@@ -109,7 +112,7 @@ def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="读取周级日历 JSON 并输出 day/week 结构")
     parser.add_argument("--week", default=None, type=parse_week, help="周标签，如 2025-W50（默认当前周）")
     parser.add_argument("--day", help="day 视图展示的日期，YYYY-MM-DD，可选")
-    parser.add_argument("--input", help="源文件路径，默认 data/calendar/week-<week>.json 或 -icalbuddy 版本")
+    parser.add_argument("--input", help="源文件路径，默认合并 data/calendar/week-<week>.json（或 -icalbuddy 版本）与 sources/<来源>/ 下的同一周")
     parser.add_argument("--output", help="输出路径，默认 data/calendar/normalized-week-<week>.json")
     return parser.parse_args()
 
@@ -118,15 +121,23 @@ def main() -> int:
     args = parse_args()
     today = date.today()
     week_label = args.week or iso_week_str(today - timedelta(days=today.weekday()))
-    source_path = find_source_path(week_label, args.input)
-    events = normalize_events(load_events(source_path))
-    payload = build_payload(week_label, args.day, events, source_path)
+    source_paths = find_source_paths(week_label, args.input)
+    with span("load"):
+        raw_events = load_events(source_paths)
+    with span("normalize"):
+        events = normalize_events(raw_events)
+    count("events", len(events))
+    with span("aggregate"):
+        payload = build_payload(week_label, args.day, events, source_paths)
     out_path = Path(args.output) if args.output else DATA_DIR / f"normalized-week-{week_label}.json"
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    out_path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+    with span("write"):
+        text = json.dumps(payload, ensure_ascii=False, indent=2)
+        out_path.write_text(text, encoding="utf-8")
+    count("bytes_written", len(text.encode("utf-8")))
     print(f"写入完成：{out_path}，事件数：{len(events)}")
     return 0
 
 
 if __name__ == "__main__":
-    raise SystemExit(main())
+    raise SystemExit(run_main("read_calendar_week", main))
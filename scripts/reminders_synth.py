@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+生成仿 Apple Reminders 存储结构的合成 SQLite（Data-<UUID>.sqlite），让 fetch_reminders.py 在 Linux 上也能跑。
+- 只建导入用到的两张表：ZREMCDBASELIST（列表）与 ZREMCDREMINDER（提醒事项），时间为 Core Data 秒数（2001-01-01 起）。
+- 覆盖：全天 / 定时截止、无截止日期、已完成（准时 / 逾期完成）、子任务、旗标与优先级、中英文与 emoji 标题。
+- --mutate：在已有文件上模拟一次同步后的变化（修改 / 完成 / 改期、标记删除、物理删除、新增），用来验证增量导入。
+- --format json：改写 reminders-cli `show-all --format json` 风格的导出文件。
+同一 --seed 结果可复现。
+
+用法示例：
+  python scripts/reminders_synth.py --items 5000 --output /tmp/rem/Data-TEST.sqlite
+  python scripts/reminders_synth.py --mutate 0.02 --output /tmp/rem/Data-TEST.sqlite
+  python scripts/reminders_synth.py --items 500 --format json --output /tmp/rem/export.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sqlite3
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+APPLE_EPOCH = 978307200  # 2001-01-01T00:00:00Z 的 Unix 秒数
+
+SCHEMA = """
+CREATE TABLE ZREMCDBASELIST (Z_PK INTEGER PRIMARY KEY, ZNAME VARCHAR, ZMARKEDFORDELETION INTEGER);
+CREATE TABLE ZREMCDREMINDER (
+    Z_PK INTEGER PRIMARY KEY, ZCKIDENTIFIER VARCHAR, ZTITLE VARCHAR, ZNOTES VARCHAR, ZLIST INTEGER,
+    ZCOMPLETED INTEGER, ZCOMPLETIONDATE TIMESTAMP, ZDUEDATE TIMESTAMP, ZALLDAY INTEGER,
+    ZPRIORITY INTEGER, ZFLAGGED INTEGER, ZCREATIONDATE TIMESTAMP, ZLASTMODIFIEDDATE TIMESTAMP,
+    ZMARKEDFORDELETION INTEGER, ZPARENTREMINDER INTEGER
+);
+CREATE INDEX ZREMCDREMINDER_ZLIST_INDEX ON ZREMCDREMINDER (ZLIST);
+"""
+COLUMNS = (
+    "Z_PK", "ZCKIDENTIFIER", "ZTITLE", "ZNOTES", "ZLIST", "ZCOMPLETED", "ZCOMPLETIONDATE", "ZDUEDATE", "ZALLDAY",
+    "ZPRIORITY", "ZFLAGGED", "ZCREATIONDATE", "ZLASTMODIFIEDDATE", "ZMARKEDFORDELETION", "ZPARENTREMINDER",
+)
+LISTS = ["📥 收件箱", "💼 工作", "🏠 家务", "📚 学习", "🛒 购物", "Someday"]
+TITLES = [
+    "写周报", "回复邮件", "买牛奶", "Review PR", "预约体检", "整理书签", "交水电费", "Prepare slides", "备份照片",
+    "读完第 3 章", "Call mom", "更新简历", "浇花", "Plan sprint", "报销发票", "跑步 5km",
+]
+NOTES = ["", "", "", "记得带发票", "https://example.com/ticket", "优先处理 ⚡️", "follow up next week"]
+
+
+def to_apple(dt: datetime) -> float:
+    return dt.timestamp() - APPLE_EPOCH
+
+
+def make_row(rng: random.Random, pk: int, list_pks: List[int], start: datetime, days: int, now: datetime, completed_ratio: float) -> Dict[str, Any]:
+    created = start + timedelta(seconds=rng.randrange(days * 86400))
+    due: Optional[datetime] = None
+    allday = 0
+    if rng.random() < 0.8:
+        due_day = created + timedelta(days=rng.randint(0, 14))
+        if rng.random() < 0.5:
+            allday = 1
+            due = due_day.replace(hour=0, minute=0, second=0, microsecond=0)
+        else:
+            due = due_day.replace(hour=rng.choice([9, 10, 14, 17, 20]), minute=rng.choice([0, 30]), second=0, microsecond=0)
+    completed_at: Optional[datetime] = None
+    if rng.random() < completed_ratio:
+        anchor = due or created
+        # 大多数按时完成，一部分逾期 1–5 天
+        completed_at = anchor + timedelta(hours=rng.uniform(-48, 0) if rng.random() < 0.7 else rng.uniform(24, 120))
+        completed_at = min(max(completed_at, created), now)
+    modified = max(created, completed_at or created)
+    return {
+        "Z_PK": pk,
+        "ZCKIDENTIFIER": str(uuid.UUID(int=rng.getrandbits(128))).upper(),
+        "ZTITLE": f"{rng.choice(TITLES)} #{pk}",
+        "ZNOTES": rng.choice(NOTES) or None,
+        "ZLIST": rng.choice(list_pks),
+        "ZCOMPLETED": 1 if completed_at else 0,
+        "ZCOMPLETIONDATE": to_apple(completed_at) if completed_at else None,
+        "ZDUEDATE": to_apple(due) if due else None,
+        "ZALLDAY": allday,
+        "ZPRIORITY": rng.choice([0, 0, 0, 1, 5, 9]),
+        "ZFLAGGED": 1 if rng.random() < 0.05 else 0,
+        "ZCREATIONDATE": to_apple(created),
+        "ZLASTMODIFIEDDATE": to_apple(modified),
+        "ZMARKEDFORDELETION": 0,
+        "ZPARENTREMINDER": None,
+    }
+
+
+def insert_rows(conn: sqlite3.Connection, rows: List[Dict[str, Any]]) -> None:
+    conn.executemany(
+        f"INSERT INTO ZREMCDREMINDER ({', '.join(COLUMNS)}) VALUES ({', '.join('?' for _ in COLUMNS)})",
+        [tuple(row[c] for c in COLUMNS) for row in rows],
+    )
+
+
+def generate(path: Path, items: int, days: int = 365, end: Optional[datetime] = None, completed_ratio: float = 0.6, seed: int = 42) -> Dict[str, int]:
+    """新建合成存储；最近一条提醒落在 end（默认现在）附近。"""
+    rng = random.Random(seed)
+    now = end or datetime.now().replace(microsecond=0)
+    start = now - timedelta(days=days)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.exists():
+        path.unlink()
+    conn = sqlite3.connect(str(path))
+    conn.executescript(SCHEMA)
+    conn.executemany("INSERT INTO ZREMCDBASELIST (Z_PK, ZNAME, ZMARKEDFORDELETION) VALUES (?, ?, 0)", list(enumerate(LISTS, 1)))
+    list_pks = list(range(1, len(LISTS) + 1))
+    rows = [make_row(rng, pk, list_pks, start, days, now, completed_ratio) for pk in range(1, items + 1)]
+    # 约 5% 是子任务：挂到同一列表里更早创建的提醒下
+    for row in rows[1:]:
+        if rng.random() < 0.05:
+            parent = rows[rng.randrange(row["Z_PK"] - 1)]
+            row["ZPARENTREMINDER"], row["ZLIST"] = parent["Z_PK"], parent["ZLIST"]
+    insert_rows(conn, rows)
+    conn.commit()
+    conn.close()
+    return {"items": items, "lists": len(LISTS), "completed": sum(r["ZCOMPLETED"] for r in rows), "undated": sum(r["ZDUEDATE"] is None for r in rows)}
+
+
+def mutate(path: Path, ratio: float, seed: int = 7) -> Dict[str, int]:
+    """模拟一次同步后的变化：约 ratio 比例的提醒被修改，另有少量标记删除、物理删除与新增。"""
+    conn = sqlite3.connect(str(path))
+    pks = [pk for (pk,) in conn.execute("SELECT Z_PK FROM ZREMCDREMINDER WHERE ZMARKEDFORDELETION = 0")]
+    # 种子里带上当前最大主键：同一 --seed 连续变更多次也各不相同，新增条目的标识不会与生成时撞车
+    rng = random.Random(f"mutate:{seed}:{max(pks, default=0)}")
+    list_pks = [pk for (pk,) in conn.execute("SELECT Z_PK FROM ZREMCDBASELIST")]
+    now = datetime.now().replace(microsecond=0)
+    # 修改戳保留小数秒，并且至少比该行原来的戳大 1ms：刚生成的条目戳落在同一秒时，增量导入也能看出变化
+    stamp = to_apple(datetime.now())
+    bumped = "MAX(?, COALESCE(ZLASTMODIFIEDDATE, 0) + 0.001)"
+    n = max(1, int(len(pks) * ratio))
+    picked = rng.sample(pks, min(len(pks), n + n // 2))
+    edited, marked, dropped = picked[:n], picked[n : n + n // 4], picked[n + n // 4 :]
+    stats = {"edited": 0, "completed": 0, "rescheduled": 0, "marked_deleted": len(marked), "deleted": len(dropped), "added": 0}
+    for pk in edited:
+        action = rng.choice(["title", "complete", "reschedule"])
+        if action == "complete":
+            conn.execute(f"UPDATE ZREMCDREMINDER SET ZCOMPLETED = 1, ZCOMPLETIONDATE = ?, ZLASTMODIFIEDDATE = {bumped} WHERE Z_PK = ?", (stamp, stamp, pk))
+            stats["completed"] += 1
+        elif action == "reschedule":
+            conn.execute(
+                f"UPDATE ZREMCDREMINDER SET ZDUEDATE = ?, ZLASTMODIFIEDDATE = {bumped} WHERE Z_PK = ?",
+                (to_apple(now + timedelta(days=rng.randint(1, 10))), stamp, pk),
+            )
+            stats["rescheduled"] += 1
+        else:
+            conn.execute(f"UPDATE ZREMCDREMINDER SET ZTITLE = ZTITLE || ' ✏️', ZLASTMODIFIEDDATE = {bumped} WHERE Z_PK = ?", (stamp, pk))
+        stats["edited"] += 1
+    conn.executemany(f"UPDATE ZREMCDREMINDER SET ZMARKEDFORDELETION = 1, ZLASTMODIFIEDDATE = {bumped} WHERE Z_PK = ?", [(stamp, pk) for pk in marked])
+    conn.executemany("DELETE FROM ZREMCDREMINDER WHERE Z_PK = ?", [(pk,) for pk in dropped])
+    next_pk = (conn.execute("SELECT MAX(Z_PK) FROM ZREMCDREMINDER").fetchone()[0] or 0) + 1
+    added = [make_row(rng, pk, list_pks, now - timedelta(days=2), 2, now, 0.3) for pk in range(next_pk, next_pk + max(1, n // 2))]
+    insert_rows(conn, added)
+    stats["added"] = len(added)
+    conn.commit()
+    conn.close()
+    return stats
+
+
+def apple_iso(ts: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(ts + APPLE_EPOCH, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ") if ts is not None else None
+
+
+def generate_json(path: Path, items: int, days: int = 365, completed_ratio: float = 0.6, seed: int = 42) -> Dict[str, int]:
+    """reminders-cli 风格的 JSON 导出（externalId / isCompleted / dueDate / lastModified 等字段）。"""
+    rng = random.Random(seed)
+    now = datetime.now().replace(microsecond=0)
+    rows = [make_row(rng, pk, list(range(1, len(LISTS) + 1)), now - timedelta(days=days), days, now, completed_ratio) for pk in range(1, items + 1)]
+    out = [
+        {
+            "externalId": row["ZCKIDENTIFIER"],
+            "title": row["ZTITLE"],
+            "notes": row["ZNOTES"],
+            "list": LISTS[row["ZLIST"] - 1],
+            "isCompleted": bool(row["ZCOMPLETED"]),
+            "completionDate": apple_iso(row["ZCOMPLETIONDATE"]),
+            "dueDate": apple_iso(row["ZDUEDATE"]),
+            "priority": row["ZPRIORITY"],
+            "creationDate": apple_iso(row["ZCREATIONDATE"]),
+            "lastModified": apple_iso(row["ZLASTMODIFIEDDATE"]),
+        }
+        for row in rows
+    ]
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(out, ensure_ascii=False, indent=2), encoding="utf-8")
+    return {"items": items, "completed": sum(r["ZCOMPLETED"] for r in rows)}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="生成仿 Apple Reminders 的合成存储 / 导出文件")
+    parser.add_argument("--output", required=True, help="输出文件（.sqlite 或 --format json 时的 .json）")
+    parser.add_argument("--items", type=int, default=1000, help="提醒事项数，默认 1000")
+    parser.add_argument("--days", type=int, default=365, help="创建时间跨度（天），默认 365")
+    parser.add_argument("--completed-ratio", type=float, default=0.6, help="已完成比例，默认 0.6")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    parser.add_argument("--format", choices=["sqlite", "json"], default="sqlite", help="sqlite：Reminders 存储；json：reminders-cli 导出")
+    parser.add_argument("--mutate", type=float, help="不新建，而是按该比例修改已有 .sqlite（模拟一次增量变化）")
+    args = parser.parse_args()
+
+    out = Path(args.output)
+    t0 = time.perf_counter()
+    if args.mutate is not None:
+        stats = mutate(out, args.mutate, args.seed)
+    elif args.format == "json":
+        stats = generate_json(out, args.items, args.days, args.completed_ratio, args.seed)
+    else:
+        stats = generate(out, args.items, args.days, None, args.completed_ratio, args.seed)
+    stats["seconds"] = round(time.perf_counter() - t0, 3)
+    print(json.dumps(stats, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
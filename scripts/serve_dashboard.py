@@ -0,0 +1,461 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+仪表盘本地查询服务：把日历归档、ActivityWatch 日汇总、情绪日志一次性载入内存并建有序索引，
+页面按需请求区间/汇总，不再下载整年的静态 JSON 再在浏览器里过滤。
+- GET /events?from=YYYY-MM-DD&to=YYYY-MM-DD[&calendar=子串][&q=子串][&limit=N]
+      按开始时间落在 [from, to) 的事件（二分定位，不扫全表）
+- GET /rollup?period=day|week|month|year&date=YYYY-MM-DD
+      该周期及上一周期的日历分类时长、AW 使用时长/热门标题、情绪均值
+- GET /meta   数据源、事件数、最新事件时间、数据版本
+- 其余路径只从 html/ 目录提供静态文件，如 /output/calendar-dynamic.html（页面检测到服务后改走上述接口）；
+  仓库其它内容（data/、.git 等）不对外提供。页面与接口同源，不发 CORS 头，其它网页无法跨域读取数据。
+- 缓存：ETag 由数据版本 + 请求决定，命中 If-None-Match 返回 304；响应 Cache-Control: no-cache，浏览器每次带条件请求。
+- 压缩：客户端支持时 gzip（超过 1KB 的响应）。
+- 热加载：请求时（至多每 --reload-interval 秒一次）检查源文件的 mtime/大小，只重新解析变化的文件；
+  新数据建成不可变快照后一次性替换，每个请求只读取一份快照（ETag 也取自它的版本）。
+
+用法示例：
+  python scripts/serve_dashboard.py                  # http://127.0.0.1:8710/output/calendar-dynamic.html
+  python scripts/serve_dashboard.py --port 9000 --calendar-glob 'data/calendar/week-*.json'
+"""
+
+from __future__ import annotations
+
+import argparse
+import calendar as cal_mod
+import gzip
+import hashlib
+import json
+import threading
+import time
+from bisect import bisect_left
+from datetime import date, datetime, timedelta
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from aw_columnar import ColumnarDay
+from instrument import count, run_main, span
+from mood_index import MoodIndex, open_index
+
+BASE = Path(__file__).resolve().parent.parent
+STATIC_DIR = BASE / "html"
+DEFAULT_CALENDAR_GLOB = "artifacts/calendar/all-*.json"
+DEFAULT_AW_DIR = BASE / "data" / "activitywatch"
+DEFAULT_MOOD_LOG = BASE / "data" / "mood" / "log.jsonl"
+EVENT_FIELDS = ("title", "calendar", "start", "end", "allday", "location", "notes", "uid")
+GZIP_MIN_BYTES = 1024
+TOP_TITLES = 10
+
+
+def local_ts(value: str) -> Optional[float]:
+    """ISO 时间 → epoch 秒；不带时区的按本机时区。"""
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def day_ts(d: date) -> float:
+    return datetime(d.year, d.month, d.day).timestamp()
+
+
+def period_range(period: str, d: date) -> Tuple[date, date, str]:
+    """与 calendar-dynamic.html 相同的周期划分：[start, end) 与标签。"""
+    if period == "day":
+        return d, d + timedelta(days=1), d.isoformat()
+    if period == "week":
+        start = d - timedelta(days=d.weekday())
+        y, w, _ = start.isocalendar()
+        return start, start + timedelta(days=7), f"{y}-W{w:02d}"
+    if period == "month":
+        start = d.replace(day=1)
+        return start, start + timedelta(days=cal_mod.monthrange(d.year, d.month)[1]), f"{d.year}-{d.month:02d}"
+    if period == "year":
+        return date(d.year, 1, 1), date(d.year + 1, 1, 1), str(d.year)
+    raise ValueError(f"未知 period：{period}")
+
+
+def previous_anchor(period: str, d: date) -> date:
+    if period == "day":
+        return d - timedelta(days=1)
+    if period == "week":
+        return d - timedelta(days=7)
+    if period == "month":
+        prev = d.replace(day=1) - timedelta(days=1)
+        return prev.replace(day=min(d.day, cal_mod.monthrange(prev.year, prev.month)[1]))
+    return d.replace(year=d.year - 1, day=28) if (d.month, d.day) == (2, 29) else d.replace(year=d.year - 1)
+
+
+class FileCache:
+    """按 (mtime_ns, size) 缓存每个文件的解析结果；changed() 只重新解析变化或新增的文件。"""
+
+    def __init__(self, loader: Callable[[Path], Any]) -> None:
+        self.loader = loader
+        self.entries: Dict[Path, Tuple[Tuple[int, int], Any]] = {}
+
+    def sync(self, paths: List[Path]) -> bool:
+        changed = False
+        seen = set()
+        for path in paths:
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            sig = (st.st_mtime_ns, st.st_size)
+            seen.add(path)
+            cached = self.entries.get(path)
+            if cached and cached[0] == sig:
+                continue
+            try:
+                value = self.loader(path)
+            except (OSError, ValueError) as exc:
+                print(f"[serve] 跳过无法解析的文件 {path}：{exc}", flush=True)
+                value = None
+            self.entries[path] = (sig, value)
+            count("reload.files")
+            changed = True
+        for path in list(self.entries):
+            if path not in seen:
+                del self.entries[path]
+                changed = True
+        return changed
+
+    def values(self) -> List[Any]:
+        return [v for _, v in self.entries.values() if v is not None]
+
+    def signature(self) -> str:
+        return "|".join(f"{p}:{sig[0]}:{sig[1]}" for p, (sig, _) in sorted(self.entries.items()))
+
+
+def load_calendar_file(path: Path) -> List[Dict[str, Any]]:
+    data = json.loads(path.read_text(encoding="utf-8"))
+    events = data.get("events", []) if isinstance(data, dict) else data
+    out = []
+    for evt in events:
+        start, end = local_ts(evt.get("start")), local_ts(evt.get("end"))
+        if start is None:
+            continue
+        slim = {k: evt[k] for k in EVENT_FIELDS if k in evt}
+        out.append((start, max(0, int(((end or start) - start) // 60)), slim))
+    return out
+
+
+def load_aw_file(path: Path) -> Tuple[str, Dict[str, Any]]:
+    """一天的 AW 汇总：总秒数、事件数、按标题秒数（.awc 读头部，.json 读各 bucket 的 aggregate）。"""
+    if path.suffix == ".awc":
+        with ColumnarDay(path) as col:
+            buckets = [b.get("aggregate") or {} for b in col.header.get("buckets", [])]
+            day = str(col.header.get("date") or path.stem)
+    else:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+        buckets = [b.get("aggregate") or {} for b in payload.get("buckets", [])]
+        day = str(payload.get("date") or path.stem)
+    summary: Dict[str, Any] = {"total_seconds": 0.0, "event_count": 0, "by_title_seconds": {}}
+    for agg in buckets:
+        summary["total_seconds"] += float(agg.get("total_seconds") or 0.0)
+        summary["event_count"] += int(agg.get("event_count") or 0)
+        for title, secs in (agg.get("by_title_seconds") or {}).items():
+            summary["by_title_seconds"][title] = summary["by_title_seconds"].get(title, 0.0) + float(secs)
+    return day, summary
+
+
+class Snapshot(NamedTuple):
+    """一次载入后的全部查询数据，创建后不再修改；热加载整体换成新的 Snapshot，请求只读自己取到的那一份。"""
+
+    version: str
+    loaded_at: str
+    starts: Tuple[float, ...]
+    minutes: Tuple[int, ...]
+    events: Tuple[Dict[str, Any], ...]
+    aw_keys: Tuple[str, ...]
+    aw_days: Dict[str, Dict[str, Any]]
+    mood: Optional[MoodIndex]
+    calendar_files: Tuple[str, ...]
+    mood_log: str
+
+    def _slice(self, start: date, end: date) -> Tuple[int, int]:
+        return bisect_left(self.starts, day_ts(start)), bisect_left(self.starts, day_ts(end))
+
+    def events_between(self, start: date, end: date, calendar: str = "", q: str = "", limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        lo, hi = self._slice(start, end)
+        out = []
+        for evt in self.events[lo:hi]:
+            if calendar and calendar not in str(evt.get("calendar") or ""):
+                continue
+            if q and q.lower() not in f"{evt.get('title', '')}\n{evt.get('notes', '')}".lower():
+                continue
+            out.append(evt)
+            if limit is not None and len(out) >= limit:
+                break
+        return out
+
+    def calendar_rollup(self, start: date, end: date) -> Dict[str, Any]:
+        lo, hi = self._slice(start, end)
+        by_cal: Dict[str, int] = {}
+        for evt, minutes in zip(self.events[lo:hi], self.minutes[lo:hi]):
+            name = evt.get("calendar") or "未分类"
+            by_cal[name] = by_cal.get(name, 0) + minutes
+        return {
+            "events": hi - lo,
+            "total_minutes": sum(by_cal.values()),
+            "by_calendar": [{"name": k, "minutes": v} for k, v in sorted(by_cal.items(), key=lambda kv: -kv[1])],
+        }
+
+    def aw_rollup(self, start: date, end: date) -> Dict[str, Any]:
+        keys = self.aw_keys
+        lo, hi = bisect_left(keys, start.isoformat()), bisect_left(keys, end.isoformat())
+        total, events, titles = 0.0, 0, {}
+        for key in keys[lo:hi]:
+            day = self.aw_days[key]
+            total += day["total_seconds"]
+            events += day["event_count"]
+            for title, secs in day["by_title_seconds"].items():
+                titles[title] = titles.get(title, 0.0) + secs
+        top = sorted(titles.items(), key=lambda kv: -kv[1])[:TOP_TITLES]
+        return {
+            "days": hi - lo,
+            "total_seconds": round(total, 1),
+            "event_count": events,
+            "top_titles": [{"title": t, "seconds": round(s, 1)} for t, s in top],
+        }
+
+    def rollup(self, period: str, anchor: date) -> Dict[str, Any]:
+        start, end, label = period_range(period, anchor)
+        prev_start, prev_end, prev_label = period_range(period, previous_anchor(period, anchor))
+        return {
+            "period": period,
+            "label": label,
+            "from": start.isoformat(),
+            "to": end.isoformat(),
+            "calendar": self.calendar_rollup(start, end),
+            "activitywatch": self.aw_rollup(start, end),
+            "mood": self.mood.range_summary(start, end - timedelta(days=1)) if self.mood else None,
+            "previous": {
+                "label": prev_label,
+                "from": prev_start.isoformat(),
+                "to": prev_end.isoformat(),
+                "calendar": self.calendar_rollup(prev_start, prev_end),
+                "activitywatch": self.aw_rollup(prev_start, prev_end),
+            },
+        }
+
+    def meta(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "loaded_at": self.loaded_at,
+            "events": len(self.events),
+            "first_start": self.events[0]["start"] if self.events else None,
+            "latest_start": self.events[-1]["start"] if self.events else None,
+            "calendar_files": list(self.calendar_files),
+            "aw_days": len(self.aw_days),
+            "mood_log": self.mood_log if self.mood else None,
+        }
+
+
+EMPTY = Snapshot("", "", (), (), (), (), {}, None, (), "")
+
+
+class DashboardData:
+    """
+    三类数据源的内存索引；refresh() 在源文件变化时增量重载。
+    查询数据都在 self.snapshot 里：重载时先在锁内建好新的 Snapshot，再一次赋值替换，
+    处理请求的线程只取一次 snapshot，不会读到新旧混合的数据。
+    """
+
+    def __init__(self, calendar_glob: str, aw_dir: Path, mood_log: Path, reload_interval: float) -> None:
+        self.calendar_glob = calendar_glob
+        self.aw_dir = aw_dir
+        self.mood_log = mood_log
+        self.reload_interval = reload_interval
+        self.lock = threading.Lock()
+        self.calendar_files = FileCache(load_calendar_file)
+        self.aw_files = FileCache(load_aw_file)
+        self.mood_sig: Optional[Tuple[int, int]] = None
+        self.snapshot = EMPTY
+        self.checked_at = 0.0
+
+    def refresh(self, force: bool = False) -> Snapshot:
+        """按需重载，返回当前快照；同一请求内的查询与 ETag 都应使用这一份。"""
+        now = time.monotonic()
+        if not force and now - self.checked_at < self.reload_interval:
+            return self.snapshot
+        with self.lock:
+            if not force and now - self.checked_at < self.reload_interval:
+                return self.snapshot
+            self.checked_at = now
+            old = self.snapshot
+            with span("reload.check"):
+                cal_changed = self.calendar_files.sync(sorted(BASE.glob(self.calendar_glob)))
+                aw_paths = sorted(self.aw_dir.glob("*.awc")) + sorted(self.aw_dir.glob("*.json")) if self.aw_dir.exists() else []
+                aw_changed = self.aw_files.sync(aw_paths)
+                mood_changed, mood = self._refresh_mood(old.mood)
+            if not (cal_changed or aw_changed or mood_changed or not old.version):
+                return old
+            starts, minutes, events = old.starts, old.minutes, old.events
+            if cal_changed:
+                with span("reload.calendar"):
+                    merged = sorted((e for chunk in self.calendar_files.values() for e in chunk), key=lambda e: e[0])
+                    starts = tuple(e[0] for e in merged)
+                    minutes = tuple(e[1] for e in merged)
+                    events = tuple(e[2] for e in merged)
+            aw_days = old.aw_days
+            if aw_changed:
+                # 同一天既有 .json 又有 .awc 时以 .awc 为准（.awc 排在前面，setdefault 先到先得）
+                days: Dict[str, Dict[str, Any]] = {}
+                for _, (_, value) in sorted(self.aw_files.entries.items(), key=lambda kv: kv[0].suffix != ".awc"):
+                    if value:
+                        days.setdefault(value[0], value[1])
+                aw_days = dict(sorted(days.items()))
+            sig = f"{self.calendar_files.signature()}#{self.aw_files.signature()}#{self.mood_sig}"
+            snap = Snapshot(
+                version=hashlib.sha1(sig.encode("utf-8")).hexdigest()[:16],
+                loaded_at=datetime.now().isoformat(timespec="seconds"),
+                starts=starts,
+                minutes=minutes,
+                events=events,
+                aw_keys=tuple(aw_days),
+                aw_days=aw_days,
+                mood=mood,
+                calendar_files=tuple(str(p.relative_to(BASE)) for p in sorted(self.calendar_files.entries)),
+                mood_log=str(self.mood_log),
+            )
+            self.snapshot = snap
+            print(f"[serve] 数据已载入：{len(snap.events)} 条日历事件，AW {len(snap.aw_days)} 天，版本 {snap.version}", flush=True)
+            return snap
+
+    def _refresh_mood(self, current: Optional[MoodIndex]) -> Tuple[bool, Optional[MoodIndex]]:
+        """日志变化时另建一个 MoodIndex（旧快照里的那个仍被正在处理的请求使用，不能原地更新）。"""
+        try:
+            st = self.mood_log.stat()
+        except OSError:
+            self.mood_sig = None
+            return current is not None, None
+        sig = (st.st_mtime_ns, st.st_size)
+        if sig == self.mood_sig:
+            return False, current
+        # 侧车索引只解析新追加的字节；日志被改写时会整体重建
+        mood = open_index(self.mood_log)
+        self.mood_sig = sig
+        return True, mood
+
+
+class QueryError(ValueError):
+    pass
+
+
+def _param(query: Dict[str, List[str]], name: str, default: Optional[str] = None) -> Optional[str]:
+    values = query.get(name)
+    return values[0] if values else default
+
+
+def _date_param(query: Dict[str, List[str]], name: str, default: Optional[date] = None) -> date:
+    raw = _param(query, name)
+    if raw is None:
+        if default is None:
+            raise QueryError(f"缺少参数 {name}")
+        return default
+    try:
+        return date.fromisoformat(raw[:10])
+    except ValueError as exc:
+        raise QueryError(f"{name} 需为 YYYY-MM-DD") from exc
+
+
+class Handler(SimpleHTTPRequestHandler):
+    data: DashboardData
+    routes = ("/events", "/rollup", "/meta")
+
+    def log_message(self, fmt: str, *args) -> None:
+        if not getattr(self.server, "quiet", False):
+            super().log_message(fmt, *args)
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        if url.path not in self.routes:
+            super().do_GET()
+            return
+        count(f"requests{url.path.replace('/', '.')}")
+        snap = self.data.refresh()
+        query = parse_qs(url.query)
+        etag = '"' + hashlib.sha1(f"{snap.version}|{url.path}|{sorted(query.items())}".encode("utf-8")).hexdigest()[:20] + '"'
+        if etag in [t.strip() for t in (self.headers.get("If-None-Match") or "").split(",")]:
+            count("responses.304")
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            return
+        try:
+            with span(f"query{url.path.replace('/', '.')}"):
+                payload = self.answer(snap, url.path, query)
+        except QueryError as exc:
+            self.send_json(400, {"error": str(exc)})
+            return
+        self.send_json(200, payload, etag)
+
+    def answer(self, data: Snapshot, path: str, query: Dict[str, List[str]]) -> Dict[str, Any]:
+        if path == "/meta":
+            return data.meta()
+        if path == "/events":
+            start = _date_param(query, "from")
+            end = _date_param(query, "to", start + timedelta(days=1))
+            limit_raw = _param(query, "limit")
+            limit = int(limit_raw) if limit_raw and limit_raw.isdigit() else None
+            events = data.events_between(start, end, _param(query, "calendar", "") or "", _param(query, "q", "") or "", limit)
+            return {"from": start.isoformat(), "to": end.isoformat(), "count": len(events), "events": events}
+        period = _param(query, "period", "week") or "week"
+        if period not in ("day", "week", "month", "year"):
+            raise QueryError("period 需为 day/week/month/year")
+        return data.rollup(period, _date_param(query, "date", date.today()))
+
+    def send_json(self, status: int, payload: Dict[str, Any], etag: Optional[str] = None) -> None:
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        gzipped = len(body) > GZIP_MIN_BYTES and "gzip" in (self.headers.get("Accept-Encoding") or "")
+        if gzipped:
+            body = gzip.compress(body, compresslevel=6)
+        count("bytes_sent", len(body))
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Vary", "Accept-Encoding")
+        if gzipped:
+            self.send_header("Content-Encoding", "gzip")
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="仪表盘本地查询服务（内存索引 + ETag/gzip + 热加载）")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址，默认 127.0.0.1")
+    parser.add_argument("--port", type=int, default=8710, help="端口，默认 8710")
+    parser.add_argument("--calendar-glob", default=DEFAULT_CALENDAR_GLOB, help=f"日历归档文件（相对仓库根的 glob），默认 {DEFAULT_CALENDAR_GLOB}")
+    parser.add_argument("--aw-dir", type=Path, default=DEFAULT_AW_DIR, help="ActivityWatch 日文件目录，默认 data/activitywatch")
+    parser.add_argument("--mood-log", type=Path, default=DEFAULT_MOOD_LOG, help="情绪日志，默认 data/mood/log.jsonl")
+    parser.add_argument("--reload-interval", type=float, default=1.0, help="两次检查源文件变化的最短间隔（秒），默认 1")
+    parser.add_argument("--quiet", action="store_true", help="不打印访问日志")
+    args = parser.parse_args()
+
+    data = DashboardData(args.calendar_glob, args.aw_dir, args.mood_log, args.reload_interval)
+    with span("load"):
+        data.refresh(force=True)
+    Handler.data = data
+    server = ThreadingHTTPServer((args.host, args.port), partial(Handler, directory=str(STATIC_DIR)))
+    server.quiet = args.quiet
+    print(f"查询服务已启动：http://{args.host}:{args.port}/output/calendar-dynamic.html", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(run_main("serve_dashboard", main))
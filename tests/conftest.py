@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# 脚本之间按同目录直接 import，测试沿用同样的方式
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
@@ -0,0 +1,21 @@
+from bear_links import LinkResolver
+
+
+def note(title, ident):
+    return {"title": title, "identifier": ident}
+
+
+def test_exact_case_title_wins():
+    for order in (("Plan", "plan"), ("plan", "Plan")):
+        index = {title: [note(title, f"id-{title}")] for title in order}
+        resolver = LinkResolver(index, mentions=True)
+        forward, mentions = resolver.resolve("[[Plan]] [[plan]] [[PLAN]] [[plan/Next]] see plan", "Other")
+        assert [link["identifier"] for link in forward] == ["id-Plan", "id-plan", f"id-{order[0]}", "id-plan"]
+        assert forward[0]["title"] == "Plan" and forward[1]["title"] == "plan"
+        assert mentions == []
+
+
+def test_mention_prefers_exact_case():
+    index = {"Plan": [note("Plan", "id-Plan")], "plan": [note("plan", "id-plan")], "Roadmap": [note("Roadmap", "id-r")]}
+    _, mentions = LinkResolver(index, mentions=True).resolve("the Roadmap and the plan", "Other")
+    assert [m["identifier"] for m in mentions] == ["id-r", "id-plan"]
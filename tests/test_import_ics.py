@@ -0,0 +1,62 @@
+import os
+import time
+from datetime import date, timedelta
+
+import pytest
+
+from import_ics import Window, import_files
+
+ICS = """BEGIN:VCALENDAR
+X-WR-CALNAME:Work
+BEGIN:VEVENT
+UID:jan
+SUMMARY:Jan
+DTSTART;TZID=Europe/Berlin:20250106T090000
+DTEND;TZID=Europe/Berlin:20250106T100000
+END:VEVENT
+BEGIN:VEVENT
+UID:jul
+SUMMARY:Jul
+DTSTART;TZID=Europe/Berlin:20250707T090000
+DTEND;TZID=Europe/Berlin:20250707T100000
+END:VEVENT
+BEGIN:VEVENT
+UID:float
+SUMMARY:Float
+DTSTART:20250324T090000
+DTEND:20250324T100000
+RRULE:FREQ=WEEKLY;COUNT=2
+END:VEVENT
+END:VCALENDAR
+"""
+
+
+@pytest.fixture
+def berlin_tz():
+    if not hasattr(time, "tzset"):
+        pytest.skip("需要 time.tzset")
+    old = os.environ.get("TZ")
+    os.environ["TZ"] = "Europe/Berlin"
+    time.tzset()
+    yield
+    if old is None:
+        os.environ.pop("TZ", None)
+    else:
+        os.environ["TZ"] = old
+    time.tzset()
+
+
+def test_offsets_follow_dst(tmp_path, berlin_tz):
+    path = tmp_path / "a.ics"
+    path.write_text(ICS, encoding="utf-8")
+    first = date(2025, 1, 6)
+    window = Window([first + timedelta(days=7 * i) for i in range(27)])
+    import_files([path], window, None)
+    starts = sorted(evt["start"] for bucket in window.buckets.values() for _, evt in bucket.values())
+    assert starts == [
+        "2025-01-06T09:00:00+01:00",
+        "2025-03-24T09:00:00+01:00",
+        # 浮动时间的重复实例跨过 3 月 30 日夏令时切换，仍是当地 09:00
+        "2025-03-31T09:00:00+02:00",
+        "2025-07-07T09:00:00+02:00",
+    ]